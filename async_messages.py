@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+消息中心异步接口（ASGI）
+聊天轮询和收件箱请求绝大部分时间在等 MySQL，同步 worker 每个请求占一个线程；
+这里用 SQLAlchemy asyncio + aiomysql 提供同样的四个接口，一个进程即可挂住大量空闲的聊天客户端：
+    GET  /api/message/list
+    GET  /api/message/unread_count
+    GET  /api/message/chat?to_user_id=
+    POST /api/message/send
+
+SQL、参数校验和返回格式全部复用 ershou/messaging.py 中的 MESSAGE_LIST_SQL / format_* / check_message_send，
+登录态直接解析 Flask 的签名 session cookie，两边共用 SECRET_KEY 即可。
+
+依赖：pip install -r requirements-async.txt   （aiomysql + uvicorn；greenlet 已在 requirements.txt 中）
+启动：uvicorn async_messages:application --host 0.0.0.0 --port 5001 --workers 2
+部署：反向代理把 /api/message/ 前缀转发到 5001，其余仍走原 Flask 服务。
+数据库：默认把 DATABASE_URL 中的 +pymysql 换成 +aiomysql，也可单独配置 ASYNC_DATABASE_URL。
+"""
+import asyncio
+import datetime
+import json
+import os
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ershou import create_app
+from ershou.messaging import (
+    MESSAGE_LIST_SQL, UNREAD_COUNT_SQL, CHAT_MARK_READ_SQL, MESSAGE_ARCHIVE_TABLE,
+    MESSAGE_SEND_LIMIT, MESSAGE_SEND_WINDOW, MESSAGE_SEND_LIMIT_MSG,
+    format_conversation, format_chat_messages, check_message_send, format_sent_message,
+    chat_history_sql, chat_page_params, merge_chat_pages, chat_next_before, parse_chat_cursor,
+)
+from ershou.ratelimit import hit
+
+# 只借用配置和 session 签名，不注册任何同步路由
+app = create_app({'BLUEPRINTS': ()})
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL') or \
+    (app.config['SQLALCHEMY_DATABASE_URI'] or '').replace('+pymysql', '+aiomysql')
+
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=int(os.getenv('ASYNC_DB_POOL_SIZE', 20)),
+    max_overflow=int(os.getenv('ASYNC_DB_MAX_OVERFLOW', 20)),
+    pool_pre_ping=True,
+    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+)
+
+_session_serializer = app.session_interface.get_signing_serializer(app)
+
+
+# ====================== 请求 / 响应工具 ======================
+def current_user_id(scope):
+    """从 Flask session cookie 中取出 user_id，未登录或签名无效返回 None"""
+    cookie_header = dict(scope['headers']).get(b'cookie', b'').decode('latin-1')
+    morsel = SimpleCookie(cookie_header).get(app.config['SESSION_COOKIE_NAME'])
+    if morsel is None or _session_serializer is None:
+        return None
+    try:
+        data = _session_serializer.loads(
+            morsel.value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except Exception:
+        return None
+    return data.get('user_id')
+
+
+async def read_json(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def send_json(send, payload, status=200):
+    body = app.json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# ====================== 接口实现（与 ershou/views/message.py 同步版一一对应） ======================
+async def message_list(uid, query, receive):
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(MESSAGE_LIST_SQL), {'uid': uid})).fetchall()
+    return {'code': 200, 'data': [format_conversation(r) for r in rows]}
+
+
+async def unread_count(uid, query, receive):
+    async with engine.connect() as conn:
+        count = (await conn.execute(text(UNREAD_COUNT_SQL), {'uid': uid})).scalar()
+    return {'code': 200, 'count': count or 0}
+
+
+async def message_chat(uid, query, receive):
+    try:
+        to_user_id = int(query.get('to_user_id', [''])[0])
+    except ValueError:
+        to_user_id = 0
+    if not to_user_id:
+        return {'code': 400, 'msg': '缺少对方ID'}
+    if to_user_id == uid:
+        return {'code': 400, 'msg': '参数错误'}
+
+    try:
+        before = parse_chat_cursor(query.get('before', [''])[0])
+    except ValueError:
+        return {'code': 400, 'msg': '参数错误'}
+
+    async with engine.begin() as conn:
+        params = chat_page_params(uid, to_user_id, before)
+        rows = (await conn.execute(text(chat_history_sql('message', before is not None)), params)).fetchall()
+        try:
+            # 与同步版 load_chat_page 一致：归档表缺失或出错时只返回热表里的记录
+            archived = (await conn.execute(text(chat_history_sql(MESSAGE_ARCHIVE_TABLE, before is not None)),
+                                           params)).fetchall()
+        except Exception as e:
+            print("【读取归档聊天记录失败】", str(e))
+            archived = []
+        rows = merge_chat_pages(rows, archived)
+        if before is None:
+            await conn.execute(text(CHAT_MARK_READ_SQL), {'me': uid, 'you': to_user_id})
+    return {'code': 200, 'data': format_chat_messages(rows, uid), 'next_before': chat_next_before(rows)}
+
+
+def message_rate_limited(uid):
+    """与同步接口的 @rate_limit('message', ...) 同一规则、同一计数键；返回还需等待的秒数，放行时返回 None"""
+    with app.app_context():
+        if not app.config['RATELIMIT_ENABLED']:
+            return None
+        allowed, retry_after = hit(f'message:user:{uid}', MESSAGE_SEND_LIMIT, MESSAGE_SEND_WINDOW)
+    return None if allowed else retry_after
+
+
+async def message_send(uid, query, receive):
+    data = await read_json(receive)
+    # hit() 在 Redis 后端下是阻塞的网络调用，放到线程池里跑，不卡住事件循环上的其他连接
+    if await asyncio.to_thread(message_rate_limited, uid) is not None:
+        return {'code': 429, 'msg': MESSAGE_SEND_LIMIT_MSG}
+
+    error, params = check_message_send(data, uid)
+    if error:
+        return {'code': 400, 'msg': error}
+
+    created_at = datetime.datetime.now().replace(microsecond=0)
+    try:
+        async with engine.begin() as conn:
+            sender = (await conn.execute(text("SELECT nickname, avatar FROM user WHERE user_id = :uid"),
+                                         {'uid': uid})).fetchone()
+            result = await conn.execute(text("""
+                INSERT INTO message (from_user_id, from_nickname, to_user_id, order_id, goods_id, type, content, created_at)
+                VALUES (:uid, :nickname, :to_user_id, :order_id, :goods_id, 'chat', :content, :created_at)
+            """), {'uid': uid, 'nickname': sender.nickname, 'created_at': created_at, **params})
+    except Exception as e:
+        print("发送失败:", str(e))
+        return {'code': 500, 'msg': '发送失败'}
+
+    return {'code': 200, 'data': format_sent_message(result.lastrowid, uid, sender.nickname, sender.avatar,
+                                                     params['content'], created_at)}
+
+
+ROUTES = {
+    ('GET', '/api/message/list'): message_list,
+    ('GET', '/api/message/unread_count'): unread_count,
+    ('GET', '/api/message/chat'): message_chat,
+    ('POST', '/api/message/send'): message_send,
+}
+
+
+async def application(scope, receive, send):
+    """ASGI 入口"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        return await send_json(send, {'code': 404, 'msg': '接口不存在'}, status=404)
+
+    uid = current_user_id(scope)
+    if not uid:
+        return await send_json(send, {'code': 401, 'msg': '请先登录'})
+
+    query = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+    await send_json(send, await handler(uid, query, receive))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化 & 压缩基准：模拟 /api/goods/list 的一页（20 条商品），
+对比原手动转换写法与 FastJSONProvider（std / orjson 两种后端，走 response() 实际调用的 dumps）的序列化耗时，
+以及原始 / gzip / brotli 的响应体积。
+
+用法：python benchmarks/json_serialization.py [--rounds 2000]
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ershou import create_app  # noqa: E402
+from ershou.responses import COMPACT_SEPARATORS, orjson, brotli  # noqa: E402
+
+# 只做序列化，不连库、不注册路由；两个应用分别固定一种后端
+app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'BLUEPRINTS': (), 'JSON_BACKEND': 'std'})
+orjson_app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'BLUEPRINTS': (), 'JSON_BACKEND': 'auto'})
+
+
+def make_page(size=20):
+    """构造与 api_goods_list 同结构的一页数据（保留 Decimal / datetime 原始类型）"""
+    now = datetime.datetime(2025, 6, 1, 12, 0, 0)
+    return [{
+        'goods_id': 100000 + i,
+        'title': f'九成新 高等数学教材 第七版 同济大学出版社 {i}',
+        'price': Decimal('35.50') + i,
+        'cover_img': f'/static/avatars/goodspictures/{100000 + i}_0.jpg',
+        'degree': 9,
+        'view_num': 1200 + i * 7,
+        'wish_num': 15 + i,
+        'favor_num': 30 + i,
+        'sold_num': i % 3,
+        'is_batch': i % 2,
+        'on_shelf_time': now - datetime.timedelta(hours=i),
+        'user_nickname': f'计算机学院小王{i}',
+        'user_college': '计算机科学与技术学院',
+    } for i in range(size)]
+
+
+def legacy_dumps(page):
+    """原写法：逐行手动转换后交给标准库（Flask 默认 ensure_ascii=True）"""
+    rows = []
+    for item in page:
+        item = dict(item)
+        item['price'] = float(item['price'])
+        item['on_shelf_time'] = item['on_shelf_time'].strftime('%Y-%m-%d %H:%M:%S')
+        rows.append(item)
+    return json.dumps({'code': 200, 'data': rows, 'total': 2000, 'page': 1}, separators=(',', ':'))
+
+
+def timeit(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = fn()
+    return (time.perf_counter() - start) / rounds * 1e6, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    page = make_page()
+    payload = {'code': 200, 'data': page, 'total': 2000, 'page': 1}
+
+    cases = [('legacy stdlib', lambda: legacy_dumps(page))]
+    cases.append(('provider std', lambda: app.json.dumps(payload, separators=COMPACT_SEPARATORS)))
+    if orjson is not None:
+        cases.append(('provider orjson', lambda: orjson_app.json.dumps(payload, separators=COMPACT_SEPARATORS)))
+
+    print(f"{'case':<18}{'us/op':>10}{'raw':>10}{'gzip':>10}{'br':>10}")
+    for name, fn in cases:
+        cost, body = timeit(fn, args.rounds)
+        raw = body if isinstance(body, bytes) else body.encode('utf-8')
+        gz = len(gzip.compress(raw, compresslevel=app.config['COMPRESS_LEVEL']))
+        br = len(brotli.compress(raw, quality=app.config['COMPRESS_BR_LEVEL'])) if brotli else '-'
+        print(f'{name:<18}{cost:>10.1f}{len(raw):>10}{gz:>10}{br:>10}')
+
+
+if __name__ == '__main__':
+    main()
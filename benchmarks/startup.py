@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准：每轮起一个全新的 Python 子进程，分别计时
+    import   —— import ershou（配置与扩展对象）
+    create   —— create_app()（导入模型 / 蓝图、注册路由与钩子）
+    first    —— 第一个请求（GET /admin，只渲染模板不连库，包含 Jinja 模板首次编译）
+以及子进程从启动到退出的总耗时。gunicorn 不开 --preload 时每个 worker 都要付出 import + create 的开销，
+开启后只在 master 付一次。
+
+用法：python benchmarks/startup.py [--rounds 10] [--blueprints visitor goods]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import ershou
+t1 = time.perf_counter()
+app = ershou.create_app(json.loads(sys.argv[1]))
+t2 = time.perf_counter()
+status = app.test_client().get('/admin').status_code if 'admin' in app.blueprints else None
+t3 = time.perf_counter()
+print(json.dumps({'import': (t1 - t0) * 1000, 'create': (t2 - t1) * 1000,
+                  'first': (t3 - t2) * 1000, 'status': status}))
+'''
+
+
+def run_once(config):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', PROBE, json.dumps(config)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result['process'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=10, help='子进程启动次数')
+    parser.add_argument('--blueprints', nargs='*', help='只注册指定蓝图（默认全部）')
+    parser.add_argument('--database-url', default='sqlite://', help='创建应用时使用的数据库（启动阶段不会连接）')
+    args = parser.parse_args()
+
+    config = {'SQLALCHEMY_DATABASE_URI': args.database_url}
+    if args.blueprints is not None:
+        config['BLUEPRINTS'] = args.blueprints
+
+    runs = [run_once(config) for _ in range(args.rounds)]
+    print(f"{'phase':<10}{'median':>10}{'min':>10}{'max':>10}")
+    for phase in ('import', 'create', 'first', 'process'):
+        values = [r[phase] for r in runs]
+        print(f"{phase:<10}{statistics.median(values):>8.1f}ms{min(values):>8.1f}ms{max(values):>8.1f}ms")
+    statuses = {r['status'] for r in runs}
+    if statuses - {200, None}:
+        print(f'警告：首个请求返回 {statuses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+校园二手交易系统 - Flask 后端
+功能模块：用户系统（注册/登录/资料管理/头像/学籍认证） + 商品发布/交易/订单全流程
+数据库：MySQL (通过 pymysql 驱动)
+
+应用工厂：create_app(config) 每次返回一个独立的应用实例。
+import ershou 只加载配置和扩展对象，模型、路由蓝图、命令行工具都在 create_app 里按需导入；
+配合 gunicorn --preload（见 gunicorn.conf.py）由 master 进程建好应用，worker fork 后写时复制共享。
+"""
+import datetime
+import os
+
+from flask import Flask
+
+from .config import Config
+from .extensions import db, init_replica
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # templates / static 所在目录
+
+
+def engine_options(config):
+    """根据 DB_POOL_* 配置生成 SQLALCHEMY_ENGINE_OPTIONS（sqlite 不使用 QueuePool）"""
+    from .monitoring import InstrumentedQueuePool
+
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    if not (config['SQLALCHEMY_DATABASE_URI'] or '').startswith('sqlite'):
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+        })
+    return options
+
+
+def create_app(config=None):
+    """
+    创建应用实例
+    :param config: 覆盖默认配置的 dict（测试、压测时传入，例如 {'SQLALCHEMY_DATABASE_URI': 'sqlite://'}）
+    """
+    app = Flask(__name__, root_path=PROJECT_ROOT)
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    if app.config['REPLICA_DATABASE_URL']:
+        app.config.setdefault('SQLALCHEMY_BINDS', {'replica': app.config['REPLICA_DATABASE_URL']})
+
+    from . import models  # noqa: F401  注册模型元数据
+    from . import monitoring, responses
+    from .cli import archive_messages_command, rebuild_user_stats_command, recommend_command, seed_command
+    from .views import register_blueprints
+
+    db.init_app(app)
+    init_replica(app)
+    monitoring.init_app(app)
+    responses.init_app(app)
+
+    app.add_template_filter(_jinja2_filter_strftime, 'strftime')
+    app.cli.add_command(seed_command)
+    app.cli.add_command(recommend_command)
+    app.cli.add_command(archive_messages_command)
+    app.cli.add_command(rebuild_user_stats_command)
+    register_blueprints(app, app.config['BLUEPRINTS'])
+    return app
+
+
+# ====================== 自定义 Jinja2 过滤器 ======================
+def _jinja2_filter_strftime(date, fmt=None):
+    """
+    自定义 strftime 过滤器
+    用法：{{ some_date | strftime('%Y-%m-%d %H:%M') }}
+    如果日期为 None，返回 '未知'
+    """
+    if date is None:
+        return '未知'
+    
+    if isinstance(date, str):
+        # 如果是字符串，先尝试解析（可选）
+        try:
+            date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+        except:
+            return date  # 解析失败原样返回
+    
+    if fmt is None:
+        fmt = '%Y-%m-%d %H:%M'
+    
+    return date.strftime(fmt)
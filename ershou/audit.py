@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+操作审计：管理员操作、订单状态变化写入 operation_log
+请求里只把记录放进内存队列，由后台线程攒批多行 INSERT，审计不增加请求的数据库往返。
+"""
+import atexit
+import datetime
+import queue
+import threading
+
+from flask import current_app, has_request_context, session
+
+from .extensions import db
+
+
+# ====================== 审计日志：内存队列 + 后台批量写入 ======================
+# 每个进程一个写入线程，首次记录时启动（gunicorn fork 出的 worker 会各自重新启动）。
+# 队列满时丢弃新记录并计数，不阻塞请求；进程正常退出时 atexit 把剩余记录同步写完。
+# 一批写入失败时逐条重写，只丢掉真正写不进去的那几条（如操作人已被删除）；丢弃的记录都会打印出来。
+AUDIT_QUEUE_MAX = 10000       # 队列最多积压的记录数
+AUDIT_BATCH_SIZE = 200        # 每次 INSERT 最多写入的行数
+AUDIT_FLUSH_INTERVAL = 1.0    # 没攒满一批时最多等待多久就写入（秒）
+AUDIT_DESC_MAX = 255
+
+AUDIT_INSERT_SQL = """
+    INSERT INTO operation_log (user_id, action, target_id, target_type, description, created_at)
+    VALUES (:user_id, :action, :target_id, :target_type, :description, :created_at)
+"""
+
+AUDIT_COUNTERS = ('written', 'dropped', 'failed', 'no_user')   # 写入成功 / 队列满丢弃 / 写入失败 / 缺少操作人
+
+_audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_MAX)
+_audit_state = {'thread': None, 'app': None, **{name: 0 for name in AUDIT_COUNTERS}}
+_audit_lock = threading.Lock()
+_flush_lock = threading.Lock()   # 后台线程与退出时的同步写入互斥
+_counter_lock = threading.Lock()  # 请求线程与写入线程都会改计数
+
+
+def _count(name, n=1):
+    with _counter_lock:
+        _audit_state[name] += n
+        return _audit_state[name]
+
+
+def _write_rows_one_by_one(rows):
+    """整批失败后逐条重写，返回写入成功的条数"""
+    written = 0
+    for row in rows:
+        try:
+            db.session.execute(db.text(AUDIT_INSERT_SQL), row)
+            db.session.commit()
+            written += 1
+        except Exception as e:
+            db.session.rollback()
+            print("【审计日志写入失败，已丢弃】", row['action'], row['target_type'], row['target_id'],
+                  f"user_id={row['user_id']}", str(e))
+    return written
+
+
+def _write(app, rows):
+    with _flush_lock, app.app_context():
+        try:
+            db.session.execute(db.text(AUDIT_INSERT_SQL), rows)
+            db.session.commit()
+            written = len(rows)
+        except Exception as e:
+            db.session.rollback()
+            print("【审计日志批量写入失败，改为逐条写入】", str(e))
+            written = _write_rows_one_by_one(rows)
+        _count('written', written)
+        if written < len(rows):
+            _count('failed', len(rows) - written)
+
+
+def _drain(first=None):
+    rows = [first] if first is not None else []
+    while len(rows) < AUDIT_BATCH_SIZE:
+        try:
+            rows.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            break
+    return rows
+
+
+def _run(app):
+    while True:
+        try:
+            first = _audit_queue.get(timeout=AUDIT_FLUSH_INTERVAL)
+        except queue.Empty:
+            continue
+        _write(app, _drain(first))
+
+
+def _ensure_writer():
+    with _audit_lock:
+        thread = _audit_state['thread']
+        if thread is None or not thread.is_alive():
+            app = current_app._get_current_object()
+            _audit_state['app'] = app
+            thread = threading.Thread(target=_run, args=(app,), name='audit-writer', daemon=True)
+            thread.start()
+            _audit_state['thread'] = thread
+
+
+def audit(action, target_type='', target_id=None, description='', user_id=None):
+    """
+    记录一条操作日志（只入队，立即返回）
+    :param action: 动作名，如 'admin_goods_delete'、'order_pay'
+    :param user_id: 操作人，默认取当前登录用户
+    """
+    if not current_app.config['AUDIT_ENABLED']:
+        return
+    if user_id is None and has_request_context():
+        user_id = session.get('user_id')
+    if user_id is None:
+        # operation_log.user_id 不能为空：没有登录用户又没传操作人的记录写不进去
+        _count('no_user')
+        print("【审计日志缺少操作人，已丢弃】", action, target_type, target_id, description)
+        return
+    _ensure_writer()
+    try:
+        _audit_queue.put_nowait({
+            'user_id': user_id,
+            'action': action[:50],
+            'target_id': target_id,
+            'target_type': target_type or '',
+            'description': (description or '')[:AUDIT_DESC_MAX],
+            'created_at': datetime.datetime.now(),
+        })
+    except queue.Full:
+        dropped = _count('dropped')
+        if dropped == 1 or dropped % 1000 == 0:  # 队列满说明写入持续失败，不逐条刷屏
+            print(f"【审计日志队列已满，已累计丢弃 {dropped} 条】", action, target_type, target_id)
+
+
+def flush_audit_log():
+    """把队列里剩余的记录同步写完（进程退出、测试或命令行里调用）"""
+    app = _audit_state['app']
+    if app is None:
+        return
+    while True:
+        rows = _drain()
+        if not rows:
+            break
+        _write(app, rows)
+
+
+def audit_stats():
+    with _counter_lock:
+        counters = {name: _audit_state[name] for name in AUDIT_COUNTERS}
+    return {'queued': _audit_queue.qsize(), **counters}
+
+
+atexit.register(flush_audit_log)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+登录 / 管理员权限装饰器与当前登录用户加载
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, redirect, session, url_for
+from sqlalchemy.orm import make_transient_to_detached
+
+from .catalog import catalog_user_changed
+from .extensions import db, get_redis
+from .models import User
+
+
+# ====================== 登录验证装饰器 ======================
+def login_required(f):
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify(code=401, msg='请先登录')
+        g.user_id = session['user_id']  # 可选
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+# ====================== 当前登录用户加载（请求内 + 跨请求缓存） ======================
+# 几乎每个页面都要 User.query.get(session['user_id'])，有的一次请求还查两遍。
+# 请求内记在 g 上；跨请求用一个带 TTL 的小型 LRU 缓存列值快照，
+# 资料修改 / 头像上传 / 学籍认证 / 封禁解封时主动失效。
+# 快照只在本进程，失效要让所有 worker 都知道（否则其他 worker 上要等 TTL 才看到变更）：
+#   - 配置了 Redis：每个用户一个版本号，失效时递增，命中快照前比对版本号（一次 GET，不查库）
+#   - 没有 Redis：本进程立即失效，其他 worker 靠更短的 TTL 兜底
+# 命中快照一律不发 SQL。
+
+USER_CACHE_TTL = 300         # 用户快照有效期（秒）
+USER_CACHE_LOCAL_TTL = 30    # 没有 Redis 版本号时的快照有效期（秒）
+USER_CACHE_MAX = 2048   # 最多缓存的用户数
+USER_VERSION_KEY_PREFIX = 'ershou:user:version:'
+USER_VERSION_KEY_TTL = 86400   # 版本号键的有效期，需远大于快照 TTL
+
+# 键：user_id → 值：(过期时间戳, 版本号, {列名: 值})
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def _user_remote_version(user_id):
+    """读取用户的共享版本号：Redis 不可用时返回 None"""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return int(r.get(f'{USER_VERSION_KEY_PREFIX}{user_id}') or 0)
+    except Exception as e:
+        print("【读取用户版本号失败】", str(e))
+        return None
+
+
+def load_user(user_id):
+    """按主键加载用户：缓存命中时直接挂回当前 session，不发 SQL"""
+    now = time.time()
+    version = _user_remote_version(user_id)   # 先取版本号再查库：期间被失效，下次请求会重新加载
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry and entry[0] > now and (version is None or entry[1] == version):
+            _user_cache.move_to_end(user_id)
+            snapshot = entry[2]
+        else:
+            snapshot = None
+
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user:
+        snapshot = {c.key: getattr(user, c.key) for c in User.__table__.columns}
+        with _user_cache_lock:
+            ttl = USER_CACHE_TTL if version is not None else USER_CACHE_LOCAL_TTL
+            _user_cache[user_id] = (now + ttl, version, snapshot)
+            _user_cache.move_to_end(user_id)
+            while len(_user_cache) > USER_CACHE_MAX:
+                _user_cache.popitem(last=False)
+    return user
+
+
+def get_current_user():
+    """当前登录用户（未登录返回 None），同一请求内只加载一次"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+    if 'current_user' not in g:
+        g.current_user = load_user(user_id)
+    return g.current_user
+
+
+def invalidate_user_cache(user_id):
+    """用户资料变更后调用，丢弃跨请求快照（有 Redis 时递增版本号，其他 worker 下次请求即重新加载）"""
+    r = get_redis()
+    if r is not None:
+        try:
+            key = f'{USER_VERSION_KEY_PREFIX}{user_id}'
+            pipe = r.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, USER_VERSION_KEY_TTL)
+            pipe.execute()
+        except Exception as e:
+            print("【更新用户版本号失败】", str(e))
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+    if g.get('current_user') is not None and g.current_user.user_id == user_id:
+        g.pop('current_user')
+    catalog_user_changed(user_id)
+
+
+# ====================== 管理员相关装饰器 ======================
+def admin_required(f):
+    """管理员权限装饰器"""
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get('user_id') or not session.get('is_admin'):
+            session.clear()  # 可选：强制清除session，防止残留
+            return redirect(url_for('admin.admin_login'))
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+"""
+进程内缓存：库存锁、分类目录、评论树、列表筛选计数、学院热榜
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from .extensions import db, get_redis
+from .models import Category
+
+
+# ==================== 内存锁（替代 Redis，防止超卖）===================
+# 使用全局字典模拟分布式锁，用于在高并发下防止商品库存超卖（开发/小项目神器）
+# 键：goods_id → 值：{'quantity': 锁定的数量, 'expire': 过期时间戳}
+_goods_lock = {}
+
+def lock_stock(goods_id, quantity, seconds=600):
+    """
+    尝试锁定指定商品的指定数量库存
+    :param goods_id: 商品ID
+    :param quantity: 欲锁定的数量
+    :param seconds: 锁超时时间（默认10分钟）
+    :return: True=锁定成功，False=已被他人锁定
+    """
+    if goods_id in _goods_lock and time.time() < _goods_lock[goods_id]['expire']:
+        return False  # 已被锁定
+    _goods_lock[goods_id] = {'quantity': quantity, 'expire': time.time() + seconds}
+    return True
+
+def unlock_stock(goods_id):
+    """支付成功或超时后释放库存锁"""
+    _goods_lock.pop(goods_id, None)
+
+
+# ====================== 分类目录缓存 ======================
+# 分类只会在后台 admin_category_action 里改动，却在首页、发布页每次都查库。
+# 这里在进程内缓存一份分类目录，并用版本号判断是否过期：
+# 配置了 Redis 时版本号存在 Redis 里，后台修改后 INCR，各 worker 每隔几秒比对一次即可感知；
+# 未配置 Redis 时只能靠本进程的版本号 + TTL 兜底刷新。
+CATEGORY_VERSION_KEY = 'ershou:category:version'
+CATEGORY_VERSION_CHECK_INTERVAL = 2   # 多久去 Redis 比对一次版本号（秒）
+CATEGORY_CACHE_TTL = 60               # 没有 Redis 时的兜底刷新周期（秒）
+
+# 缓存里放只读的轻量对象，避免跨请求持有 ORM 实例（模板里用法与 Category 一致）
+CategoryItem = namedtuple('CategoryItem', 'cate_id name sort enabled')
+
+_category_catalog = {
+    'version': None,     # 当前缓存对应的版本号
+    'loaded_at': 0,      # 上次从数据库加载的时间
+    'checked_at': 0,     # 上次比对版本号的时间
+    'all': [],           # 全部分类（按 sort 排序）
+    'enabled': [],       # 启用的分类（按 sort 排序）
+    'by_id': {},         # cate_id → CategoryItem
+}
+_category_local_version = 0
+_category_catalog_lock = threading.Lock()
+
+
+def _category_remote_version():
+    """读取共享版本号：Redis 不可用时返回 None"""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return int(r.get(CATEGORY_VERSION_KEY) or 0)
+    except Exception as e:
+        print("【读取分类版本号失败】", str(e))
+        return None
+
+
+def get_category_catalog():
+    """返回最新的分类目录（dict），版本号变化或过期时重新加载"""
+    now = time.time()
+    catalog = _category_catalog
+    if catalog['loaded_at'] and now - catalog['checked_at'] < CATEGORY_VERSION_CHECK_INTERVAL:
+        return catalog
+
+    remote = _category_remote_version()
+    version = remote if remote is not None else _category_local_version
+    fresh = remote is not None or now - catalog['loaded_at'] < CATEGORY_CACHE_TTL
+    if catalog['loaded_at'] and catalog['version'] == version and fresh:
+        catalog['checked_at'] = now
+        return catalog
+
+    rows = Category.query.order_by(Category.sort, Category.cate_id).all()
+    items = [CategoryItem(c.cate_id, c.name, c.sort, bool(c.enabled)) for c in rows]
+    with _category_catalog_lock:
+        catalog['all'] = items
+        catalog['enabled'] = [c for c in items if c.enabled]
+        catalog['by_id'] = {c.cate_id: c for c in items}
+        catalog['version'] = version
+        catalog['loaded_at'] = catalog['checked_at'] = now
+    return catalog
+
+
+def bump_category_version():
+    """分类被修改后调用：递增版本号，本进程立即失效，其他 worker 在下次比对时刷新"""
+    global _category_local_version
+    r = get_redis()
+    if r is not None:
+        try:
+            r.incr(CATEGORY_VERSION_KEY)
+        except Exception as e:
+            print("【更新分类版本号失败】", str(e))
+    with _category_catalog_lock:
+        _category_local_version += 1
+        _category_catalog['loaded_at'] = 0
+
+
+# ====================== 评论系统：评论树缓存 ======================
+# 热门商品的评论区被大量访客反复打开，每次都全量 JOIN + 重建回复树代价很高。
+# 这里按商品缓存“与访客无关”的评论树（不含 is_liked），访客各自的点赞状态
+# 通过一条轻量查询单独叠加。发表评论时按商品失效；点赞只改缓存节点里的 like_count，不丢整棵树。
+# 多 worker：与学院热榜一样，配置了 Redis 时每个商品的版本号放在一个 Hash 里，评论 / 点赞后 HINCRBY，
+# 其他 worker 每隔几秒比对一次即可重建；没有 Redis 时靠 TTL 兜底。
+# 进程内另有每个商品的代数：构建前记下，构建期间发生了失效就不把这棵旧树存进缓存。
+COMMENT_PAGE_SIZE = 20        # 每页顶级评论数
+COMMENT_REPLY_PAGE_SIZE = 3   # 每条评论默认展开的直接回复数，其余按需加载
+COMMENT_CACHE_TTL = 60        # 评论树缓存有效期（秒）
+COMMENT_CACHE_MAX = 500       # 最多缓存多少个商品的评论树（LRU 淘汰）
+COMMENT_CHECK_INTERVAL = 2    # 多久去 Redis 比对一次版本号（秒）
+COMMENT_VERSION_KEY = 'ershou:comment_tree:versions'
+
+# 键：goods_id → 值：{'expire', 'version', 'generation', 'checked_at', 'roots': [...], 'nodes': {comment_id: 节点}}
+_comment_tree_cache = OrderedDict()
+# 键：comment_id → goods_id（只记录已缓存的评论，用于点赞时定位要失效的商品）
+_comment_goods_index = {}
+# 键：goods_id → 本进程的失效代数
+_comment_generations = {}
+_comment_cache_lock = threading.Lock()
+
+
+def _comment_remote_version(goods_id):
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return int(r.hget(COMMENT_VERSION_KEY, goods_id) or 0)
+    except Exception as e:
+        print("【读取评论树版本号失败】", str(e))
+        return None
+
+
+def _bump_comment_remote_version(goods_id):
+    """递增共享版本号，返回新版本号；没有 Redis 或失败时返回 None"""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return r.hincrby(COMMENT_VERSION_KEY, goods_id, 1)
+    except Exception as e:
+        print("【更新评论树版本号失败】", str(e))
+        return None
+
+
+def _build_comment_tree(goods_id):
+    """从数据库加载某商品全部评论并构建回复树（不含访客相关字段）"""
+    rows = db.session.execute(db.text("""
+        SELECT
+            c.comment_id,
+            c.parent_id,
+            c.content,
+            c.created_at,
+            c.like_count,
+            u.user_id,
+            u.nickname,
+            u.avatar
+        FROM comment c
+        JOIN user u ON c.user_id = u.user_id
+        WHERE c.goods_id = :gid
+        ORDER BY c.created_at ASC, c.comment_id ASC
+    """), {'gid': goods_id}).fetchall()
+
+    nodes = {}
+    for row in rows:
+        nodes[row.comment_id] = {
+            'comment_id': row.comment_id,
+            'parent_id': row.parent_id or 0,
+            'content': row.content,
+            'created_at': row.created_at.strftime('%Y-%m-%d %H:%M'),
+            'like_count': row.like_count or 0,
+            'nickname': row.nickname,
+            'avatar': row.avatar or '/static/avatars/userspictures/default.jpg',
+            'user_id': row.user_id,
+            'children': []
+        }
+
+    roots = []
+    for node in nodes.values():
+        if node['parent_id'] == 0:
+            roots.append(node)
+        elif node['parent_id'] in nodes:
+            nodes[node['parent_id']]['children'].append(node)
+
+    return {'roots': roots, 'nodes': nodes}
+
+
+def get_comment_tree(goods_id):
+    """取某商品的共享评论树，未命中、过期或其他 worker 有变更时重建"""
+    now = time.time()
+    with _comment_cache_lock:
+        entry = _comment_tree_cache.get(goods_id)
+        if entry and entry['expire'] > now and now - entry['checked_at'] < COMMENT_CHECK_INTERVAL:
+            _comment_tree_cache.move_to_end(goods_id)
+            return entry
+        generation = _comment_generations.get(goods_id, 0)
+
+    version = _comment_remote_version(goods_id)
+    if entry and entry['expire'] > now and entry['version'] == version and entry['generation'] == generation:
+        entry['checked_at'] = now
+        return entry
+
+    tree = _build_comment_tree(goods_id)
+    tree.update(expire=now + COMMENT_CACHE_TTL, version=version, generation=generation, checked_at=now)
+
+    with _comment_cache_lock:
+        if _comment_generations.get(goods_id, 0) != generation:
+            return tree  # 构建期间本进程有人评论 / 失效，这棵树可能是旧的，只给本次请求用
+        _drop_comment_tree(goods_id)
+        _comment_tree_cache[goods_id] = tree
+        for cid in tree['nodes']:
+            _comment_goods_index[cid] = goods_id
+        while len(_comment_tree_cache) > COMMENT_CACHE_MAX:
+            old_gid = next(iter(_comment_tree_cache))
+            _drop_comment_tree(old_gid)
+    return tree
+
+
+def _drop_comment_tree(goods_id):
+    """移除缓存条目及其反向索引（调用方需持有锁）"""
+    entry = _comment_tree_cache.pop(goods_id, None)
+    if entry:
+        for cid in entry['nodes']:
+            _comment_goods_index.pop(cid, None)
+
+
+def patch_comment_like_count(comment_id, like_count, goods_id=None):
+    """
+    点赞变化后原地更新本进程缓存节点的点赞数，并递增共享版本号让其他 worker 重建
+    :param goods_id: 评论所属商品（不传时只能从本进程已缓存的树里查）
+    """
+    comment_id = int(comment_id)
+    with _comment_cache_lock:
+        if goods_id is None:
+            goods_id = _comment_goods_index.get(comment_id)
+    if goods_id is None:
+        return
+    goods_id = int(goods_id)
+    version = _bump_comment_remote_version(goods_id)
+    with _comment_cache_lock:
+        entry = _comment_tree_cache.get(goods_id)
+        node = entry['nodes'].get(comment_id) if entry else None
+        if node is None:
+            return
+        node['like_count'] = like_count
+        # 本进程已经原地改过，版本号只比缓存时新一个说明中间没有别人的变更，跟上即可，不必重建
+        if version is not None and entry['version'] == version - 1:
+            entry['version'] = version
+
+
+def invalidate_comment_tree(goods_id=None, comment_id=None):
+    """评论变化后失效对应商品的评论树（本进程立即失效，其他 worker 在下次比对版本号时重建）"""
+    with _comment_cache_lock:
+        if goods_id is None and comment_id is not None:
+            goods_id = _comment_goods_index.get(int(comment_id))
+        if goods_id is None:
+            return
+        goods_id = int(goods_id)
+        _comment_generations[goods_id] = _comment_generations.get(goods_id, 0) + 1
+        _drop_comment_tree(goods_id)
+    _bump_comment_remote_version(goods_id)
+
+
+def get_liked_comment_ids(goods_id, uid):
+    """当前访客在该商品下点赞过的评论ID集合（每位访客的轻量叠加层）"""
+    if not uid:
+        return set()
+    rows = db.session.execute(db.text("""
+        SELECT cl.comment_id
+        FROM comment_like cl
+        JOIN comment c ON c.comment_id = cl.comment_id
+        WHERE c.goods_id = :gid AND cl.user_id = :uid AND cl.liked = 1
+    """), {'gid': goods_id, 'uid': uid}).fetchall()
+    return {row.comment_id for row in rows}
+
+
+def _page_after(items, cursor, size):
+    """按 comment_id 游标切出下一页，返回 (本页, 下一页游标)"""
+    if cursor:
+        items = [c for c in items if c['comment_id'] > cursor]
+    page = items[:size]
+    next_cursor = page[-1]['comment_id'] if len(items) > size else None
+    return page, next_cursor
+
+
+def _render_comment(node, liked_ids, expand_replies=True):
+    """把缓存节点拷贝成接口输出（叠加 is_liked，回复只展开第一页）"""
+    comment = {k: v for k, v in node.items() if k != 'children'}
+    comment['is_liked'] = node['comment_id'] in liked_ids
+    comment['reply_total'] = len(node['children'])
+    if expand_replies:
+        replies, reply_cursor = _page_after(node['children'], 0, COMMENT_REPLY_PAGE_SIZE)
+        comment['replies'] = [_render_comment(r, liked_ids) for r in replies]
+        comment['reply_cursor'] = reply_cursor
+    else:
+        comment['replies'] = []
+        comment['reply_cursor'] = None
+    return comment
+
+
+# ====================== 商品列表：筛选项计数（分面） ======================
+# 列表页想在每个筛选项旁显示“选了它会有多少件”，逐个筛选项查一遍要 N 条 COUNT。
+# 这里一条 GROUP BY 按 分类 × 价格段 × 成色 × 清仓标记（以及当前价格 / 成色条件是否满足）分组，
+# 分组行数很少，在 Python 里对每个维度套用“除自身以外的其他条件”即可得到全部计数。
+# 结果与分页、排序无关，按筛选条件缓存一小会儿，翻页不会重复计算。
+FACET_PRICE_BUCKETS = (20, 50, 100, 300, 1000)     # 价格段上界（含），最后一段为 1000 以上
+FACET_DEGREE_BANDS = ((10, '全新'), (9, '九成新及以上'), (8, '八成新及以上'), (0, '不限'))
+FACET_CACHE_TTL = 30        # 计数缓存有效期（秒）
+FACET_CACHE_MAX = 256       # 最多缓存多少组筛选条件
+
+# 键：筛选条件元组 → 值：(过期时间戳, 计数结果)
+_facet_cache = OrderedDict()
+_facet_cache_lock = threading.Lock()
+
+
+def _facet_price_options():
+    options, lower = [], None
+    for upper in FACET_PRICE_BUCKETS:
+        options.append({
+            'label': f'{lower:g}-{upper:g}元' if lower is not None else f'{upper:g}元以下',
+            'price_min': round(lower + 0.01, 2) if lower is not None else None,
+            'price_max': upper,
+        })
+        lower = upper
+    options.append({'label': f'{lower:g}元以上', 'price_min': round(lower + 0.01, 2), 'price_max': None})
+    return options
+
+
+def _query_facet_groups(keyword, price_min, price_max, degree_min, college):
+    price_case = ' '.join(f'WHEN g.price <= {upper} THEN {i}' for i, upper in enumerate(FACET_PRICE_BUCKETS))
+    params = {}
+    price_ok = ['1=1']
+    if price_min is not None:
+        price_ok.append('g.price >= :price_min')
+        params['price_min'] = price_min
+    if price_max is not None:
+        price_ok.append('g.price <= :price_max')
+        params['price_max'] = price_max
+    degree_ok = '1=1'
+    if degree_min is not None:
+        degree_ok = 'g.degree >= :degree_min'
+        params['degree_min'] = degree_min
+
+    where = ['g.status = 1']
+    if keyword:
+        where.append('(g.title LIKE :keyword OR g.description LIKE :keyword)')
+        params['keyword'] = f'%{keyword}%'
+    if college:
+        where.append('u.college = :college')
+        params['college'] = college
+
+    sql = f"""
+        SELECT g.cate_id,
+               CASE {price_case} ELSE {len(FACET_PRICE_BUCKETS)} END AS price_bucket,
+               g.degree,
+               CASE WHEN u.is_graduating = 1 AND g.is_batch = 1 THEN 1 ELSE 0 END AS graduating,
+               CASE WHEN {' AND '.join(price_ok)} THEN 1 ELSE 0 END AS price_ok,
+               CASE WHEN {degree_ok} THEN 1 ELSE 0 END AS degree_ok,
+               COUNT(*) AS n
+        FROM goods g
+        LEFT JOIN user u ON g.user_id = u.user_id
+        WHERE {' AND '.join(where)}
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """
+    return db.session.execute(db.text(sql), params).fetchall()
+
+
+def get_goods_facets(keyword=None, cate_id=None, price_min=None, price_max=None,
+                     degree_min=None, only_graduating=False, college=None):
+    """
+    列表筛选项计数：每个维度的计数都应用了其余维度的条件（选中某个分类时，其他分类的数字不会变成 0）
+    :return: {'category': [...], 'price': [...], 'degree': [...], 'graduating': 数量}
+    """
+    key = (keyword or '', cate_id, price_min, price_max, degree_min, bool(only_graduating), college or '')
+    now = time.time()
+    with _facet_cache_lock:
+        entry = _facet_cache.get(key)
+        if entry and entry[0] > now:
+            _facet_cache.move_to_end(key)
+            return entry[1]
+
+    rows = _query_facet_groups(keyword, price_min, price_max, degree_min, college)
+
+    by_cate, by_price, by_degree, graduating = {}, [0] * (len(FACET_PRICE_BUCKETS) + 1), {}, 0
+    for row_cate, price_bucket, degree, is_grad, price_ok, degree_ok, n in rows:
+        cate_ok = not cate_id or row_cate == cate_id
+        grad_ok = not only_graduating or is_grad
+        if price_ok and degree_ok and grad_ok:
+            by_cate[row_cate] = by_cate.get(row_cate, 0) + n
+        if cate_ok and degree_ok and grad_ok:
+            by_price[price_bucket] += n
+        if cate_ok and price_ok and grad_ok:
+            by_degree[degree or 0] = by_degree.get(degree or 0, 0) + n
+        if cate_ok and price_ok and degree_ok and is_grad:
+            graduating += n
+
+    catalog = get_category_catalog()
+    price_options = _facet_price_options()
+    for option, count in zip(price_options, by_price):
+        option['count'] = count
+    result = {
+        'category': [{'cate_id': c.cate_id, 'name': c.name, 'count': by_cate.get(c.cate_id, 0)}
+                     for c in catalog['enabled']],
+        'price': price_options,
+        'degree': [{'label': label, 'degree_min': floor,
+                    'count': sum(n for d, n in by_degree.items() if d >= floor)}
+                   for floor, label in FACET_DEGREE_BANDS],
+        'graduating': graduating,
+    }
+
+    with _facet_cache_lock:
+        _facet_cache[key] = (now + FACET_CACHE_TTL, result)
+        _facet_cache.move_to_end(key)
+        while len(_facet_cache) > FACET_CACHE_MAX:
+            _facet_cache.popitem(last=False)
+    return result
+
+
+# ====================== 本院热销：按学院预计算的热榜 ======================
+# 首页“本院热销”和 /api/goods/list?same_college=1&sort=hot 原来每次都按 u.college 关联 user 表、
+# 再对该学院全部在售商品算热度排序。这里每个学院缓存一份前 N 名（连同总数），页面直接切片。
+# 该学院卖家的商品发布 / 编辑 / 上下架 / 售出时递增该学院的版本号，只重算这一个学院；
+# 浏览、想买、收藏带来的热度漂移靠 TTL 兜底。配置了 Redis 时版本号放在一个 Hash 里，各 worker 共享。
+COLLEGE_HOT_SIZE = 60                    # 每个学院保留的前 N 名
+COLLEGE_HOT_TTL = 60                     # 热度漂移的兜底刷新周期（秒）
+COLLEGE_HOT_CHECK_INTERVAL = 2           # 多久去 Redis 比对一次版本号（秒）
+COLLEGE_HOT_MAX = 200                    # 最多缓存多少个学院（LRU 淘汰）
+COLLEGE_HOT_VERSION_KEY = 'ershou:college_hot:versions'
+COLLEGE_HOT_FIELDS = ('goods_id', 'title', 'price', 'cover_img', 'degree', 'view_num', 'wish_num',
+                      'favor_num', 'sold_num', 'is_batch', 'user_nickname', 'user_college')
+
+# 键：学院 → 值：{'rows': 前 N 名, 'total': 在售总数, 'version', 'loaded_at', 'checked_at'}
+_college_hot = OrderedDict()
+_college_hot_local_versions = {}
+_college_hot_lock = threading.Lock()
+
+
+def _college_hot_remote_version(college):
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return int(r.hget(COLLEGE_HOT_VERSION_KEY, college) or 0)
+    except Exception as e:
+        print("【读取学院热榜版本号失败】", str(e))
+        return None
+
+
+def _load_college_hot(college):
+    rows = db.session.execute(db.text("""
+        SELECT g.goods_id, g.title, g.price, g.degree, g.cate_id, g.view_num, g.wish_num, g.favor_num,
+               g.sold_num, g.is_batch, u.nickname AS user_nickname, gi.url AS cover_img
+        FROM user u
+        JOIN goods g ON g.user_id = u.user_id
+        LEFT JOIN goods_image gi ON gi.goods_id = g.goods_id AND gi.sort = 0
+        WHERE u.college = :college AND g.status = 1
+        ORDER BY (g.favor_num * 5 + g.wish_num * 3 + g.view_num + g.sold_num * 10) DESC, g.goods_id DESC
+        LIMIT :n
+    """), {'college': college, 'n': COLLEGE_HOT_SIZE}).fetchall()
+    items = []
+    for row in rows:
+        item = dict(row._mapping)
+        item['price'] = float(item['price'])
+        item['cover_img'] = item['cover_img'] or '/static/avatars/goodspictures/default.jpg'
+        item['user_nickname'] = item['user_nickname'] or '未知用户'
+        item['user_college'] = college
+        items.append(item)
+
+    total = len(items)
+    if total >= COLLEGE_HOT_SIZE:
+        total = db.session.execute(db.text("""
+            SELECT COUNT(*) FROM user u JOIN goods g ON g.user_id = u.user_id
+            WHERE u.college = :college AND g.status = 1
+        """), {'college': college}).scalar() or 0
+    return items, total
+
+
+def get_college_hot(college):
+    """
+    返回某学院的热榜缓存（按热度倒序的前 N 名 + 在售总数），版本号变化或过期时重算
+    :return: {'rows': [dict], 'total': int, ...}
+    """
+    now = time.time()
+    entry = _college_hot.get(college)
+    if entry and now - entry['checked_at'] < COLLEGE_HOT_CHECK_INTERVAL and now - entry['loaded_at'] < COLLEGE_HOT_TTL:
+        return entry
+
+    remote = _college_hot_remote_version(college)
+    version = remote if remote is not None else _college_hot_local_versions.get(college, 0)
+    if entry and entry['version'] == version and now - entry['loaded_at'] < COLLEGE_HOT_TTL:
+        entry['checked_at'] = now
+        return entry
+
+    rows, total = _load_college_hot(college)
+    entry = {'rows': rows, 'total': total, 'version': version, 'loaded_at': now, 'checked_at': now}
+    with _college_hot_lock:
+        _college_hot[college] = entry
+        _college_hot.move_to_end(college)
+        while len(_college_hot) > COLLEGE_HOT_MAX:
+            _college_hot.popitem(last=False)
+    return entry
+
+
+def college_hot_top(college, limit, cate_id=None):
+    """首页本院热销：按分类过滤后取前 limit 件；缓存的前 N 名不够用时返回 None（调用方回退 SQL）"""
+    entry = get_college_hot(college)
+    rows = entry['rows']
+    if cate_id:
+        rows = [r for r in rows if r['cate_id'] == cate_id]
+    if len(rows) < limit and entry['total'] > len(entry['rows']):
+        return None
+    return rows[:limit]
+
+
+def college_hot_page(college, page, page_size):
+    """列表接口按热度翻页：页码落在缓存的前 N 名之内时返回 (data, total)，否则返回 None"""
+    entry = get_college_hot(college)
+    end = page * page_size
+    if end > len(entry['rows']) and entry['total'] > len(entry['rows']):
+        return None
+    data = [{k: r[k] for k in COLLEGE_HOT_FIELDS} for r in entry['rows'][end - page_size:end]]
+    return data, entry['total']
+
+
+def college_hot_changed(seller_id=None, college=None):
+    """卖家所在学院的商品发布 / 编辑 / 上下架 / 售出后调用（只知道卖家 ID 时按 ID 查学院）"""
+    if college is None and seller_id:
+        college = db.session.execute(db.text(
+            "SELECT college FROM user WHERE user_id = :uid"
+        ), {'uid': seller_id}).scalar()
+    if not college:
+        return
+    r = get_redis()
+    if r is not None:
+        try:
+            r.hincrby(COLLEGE_HOT_VERSION_KEY, college, 1)
+        except Exception as e:
+            print("【更新学院热榜版本号失败】", str(e))
+    with _college_hot_lock:
+        _college_hot_local_versions[college] = _college_hot_local_versions.get(college, 0) + 1
+        _college_hot.pop(college, None)
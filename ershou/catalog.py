@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+商品列表的列式内存快照（可选，依赖 NumPy）
+CATALOG_ENGINE=numpy 时，/api/goods/list 的筛选、排序、分页直接在 NumPy 数组上完成，不查库；
+带关键词的搜索仍走 SQL（描述全文不进快照）。
+"""
+import datetime
+import os
+import threading
+import time
+
+from flask import current_app
+
+from .extensions import db, get_redis
+
+try:
+    import numpy as np  # 可选依赖：pip install numpy
+except ImportError:
+    np = None
+
+
+# ====================== 列式快照 ======================
+# 每件在售商品占一行，数值列存成 NumPy 数组，筛选用布尔掩码、排序用 argpartition 取前 k 条再精排。
+# 写操作（发布 / 编辑 / 上下架 / 浏览 / 想买收藏 / 支付）就地更新对应行；下架只打删除标记，
+# 后台定期全量重建时压缩。多 worker 部署时每个进程各有一份快照：配置了 Redis 则把写事件
+# 发到一个 Stream，其他 worker 每隔几秒回放；没有 Redis 时其他 worker 要等下一次全量重建才能看到。
+# 重建期间本进程的写事件照常作用在旧快照上，同时记下（带序号）；新快照换上后按数据库当前状态重放一遍，
+# 这样加载过程中发生的变更不会被新快照覆盖掉（与 search.py 的 seq / pending 做法相同）。
+CATALOG_REBUILD_INTERVAL = 300     # 全量重建周期（秒）
+CATALOG_SYNC_INTERVAL = 2          # 多久回放一次其他 worker 的写事件（秒）
+CATALOG_EVENTS_KEY = 'ershou:catalog:events'
+CATALOG_EVENTS_MAXLEN = 10000      # 事件 Stream 保留的条数
+CATALOG_INITIAL_CAPACITY = 1024
+
+CATALOG_COUNTERS = ('view_num', 'wish_num', 'favor_num', 'sold_num')
+CATALOG_COLUMNS = {
+    'goods_id': 'int64', 'price': 'float64', 'degree': 'int16', 'cate_id': 'int32',
+    'user_id': 'int64', 'college': 'int32', 'is_batch': 'int8', 'grad_batch': 'bool',
+    'view_num': 'int64', 'wish_num': 'int64', 'favor_num': 'int64', 'sold_num': 'int64',
+    'on_shelf': 'int64', 'alive': 'bool',
+}
+DEFAULT_COVER = '/static/avatars/goodspictures/default.jpg'
+
+CATALOG_SQL = """
+    SELECT g.goods_id, g.title, g.price, g.degree, g.cate_id, g.user_id, g.is_batch,
+           g.view_num, g.wish_num, g.favor_num, g.sold_num, g.on_shelf_time,
+           u.nickname, u.college, u.is_graduating, gi.url AS cover_img
+    FROM goods g
+    LEFT JOIN user u ON g.user_id = u.user_id
+    LEFT JOIN goods_image gi ON gi.goods_id = g.goods_id AND gi.sort = 0
+    WHERE g.status = 1
+"""
+
+
+def _epoch(value):
+    return int(value.timestamp()) if isinstance(value, datetime.datetime) else 0
+
+
+class _Snapshot:
+    """一份列式快照：数值列 + 标题 / 封面列表 + 卖家信息字典"""
+
+    def __init__(self, capacity=CATALOG_INITIAL_CAPACITY):
+        self.size = 0
+        self.cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in CATALOG_COLUMNS.items()}
+        self.titles = [None] * capacity
+        self.covers = [None] * capacity
+        self.row_of = {}           # goods_id → 行号
+        self.users = {}            # user_id → (昵称, 学院, 是否应届毕业生)
+        self.college_codes = {}    # 学院名 → 整数编码
+        self.built_at = time.time()
+        self.stream_id = '$'       # 已回放到的事件 ID
+
+    def _grow(self):
+        capacity = len(self.titles) * 2
+        for name, arr in self.cols.items():
+            grown = np.zeros(capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.cols[name] = grown
+        self.titles.extend([None] * (capacity - len(self.titles)))
+        self.covers.extend([None] * (capacity - len(self.covers)))
+
+    def college_code(self, college):
+        if not college:
+            return 0
+        return self.college_codes.setdefault(college, len(self.college_codes) + 1)
+
+    def put(self, r):
+        """写入（或覆盖）一行，r 为 CATALOG_SQL 的结果行"""
+        self.users[r.user_id] = (r.nickname, r.college or '', r.is_graduating)
+        row = self.row_of.get(r.goods_id)
+        if row is None:
+            if self.size == len(self.titles):
+                self._grow()
+            row = self.row_of[r.goods_id] = self.size
+            self.size += 1
+        c = self.cols
+        c['goods_id'][row] = r.goods_id
+        c['price'][row] = float(r.price)
+        c['degree'][row] = r.degree or 0
+        c['cate_id'][row] = r.cate_id
+        c['user_id'][row] = r.user_id
+        c['college'][row] = self.college_code(r.college)
+        c['is_batch'][row] = r.is_batch or 0
+        c['grad_batch'][row] = r.is_graduating == 1 and r.is_batch == 1
+        for name in CATALOG_COUNTERS:
+            c[name][row] = getattr(r, name) or 0
+        c['on_shelf'][row] = _epoch(r.on_shelf_time)
+        c['alive'][row] = True
+        self.titles[row] = r.title
+        self.covers[row] = r.cover_img or DEFAULT_COVER
+
+    def remove(self, goods_id):
+        row = self.row_of.pop(goods_id, None)
+        if row is not None:
+            self.cols['alive'][row] = False
+
+    def bump(self, goods_id, field, delta):
+        row = self.row_of.get(goods_id)
+        if row is not None:
+            self.cols[field][row] = max(0, self.cols[field][row] + delta)
+
+    def update_user(self, r):
+        """卖家资料变化：刷新昵称 / 学院 / 毕业生标记（向量化更新该卖家的所有行）"""
+        self.users[r.user_id] = (r.nickname, r.college or '', r.is_graduating)
+        c, n = self.cols, self.size
+        rows = c['user_id'][:n] == r.user_id
+        c['college'][:n][rows] = self.college_code(r.college)
+        c['grad_batch'][:n][rows] = (r.is_graduating == 1) & (c['is_batch'][:n][rows] == 1)
+
+
+_catalog = {
+    'snapshot': None,
+    'building': False,
+    'synced_at': 0,
+    'seq': 0,           # 写事件序号
+    'pending': {},      # 重建期间的写事件：('goods' | 'user', ID) → 序号
+}
+_catalog_lock = threading.Lock()
+
+
+def catalog_enabled():
+    return np is not None and current_app.config.get('CATALOG_ENGINE') == 'numpy'
+
+
+def _typed(sql):
+    return db.text(sql).columns(on_shelf_time=db.DateTime)
+
+
+def _load_snapshot():
+    r = get_redis()
+    stream_id = '$'
+    if r is not None:
+        try:
+            last = r.xrevrange(CATALOG_EVENTS_KEY, count=1)
+            stream_id = last[0][0] if last else '0'
+        except Exception as e:
+            print("【读取商品事件流失败】", str(e))
+    snap = _Snapshot()
+    for row in db.session.execute(_typed(CATALOG_SQL)):
+        snap.put(row)
+    snap.stream_id = stream_id
+    return snap
+
+
+def rebuild_catalog():
+    """全量重建快照（压缩掉已下架的行），换上后重放加载期间的写事件"""
+    with _catalog_lock:
+        _catalog['building'] = True
+        start_seq = _catalog['seq']
+    try:
+        snap = _load_snapshot()
+    except Exception:
+        _catalog['building'] = False
+        raise
+    with _catalog_lock:
+        _catalog['snapshot'] = snap
+        replay = [key for key, seq in _catalog['pending'].items() if seq > start_seq]
+        _catalog['pending'] = {}
+        _catalog['building'] = False
+    # 计数增减也按整行重读：加载时可能已经读到了这次增减，重读不会重复累加
+    for op, target_id in replay:
+        _apply(snap, op, target_id)
+
+
+def _rebuild_in_background(app):
+    with app.app_context():
+        try:
+            rebuild_catalog()
+        except Exception as e:
+            _catalog['building'] = False
+            print("【商品快照重建失败】", str(e))
+
+
+def get_snapshot():
+    """首次使用时同步构建；过期后后台重建，期间继续用旧快照"""
+    snap = _catalog['snapshot']
+    if snap is None:
+        rebuild_catalog()
+        return _catalog['snapshot']
+    if time.time() - snap.built_at >= CATALOG_REBUILD_INTERVAL:
+        with _catalog_lock:
+            start = not _catalog['building']
+            _catalog['building'] = True
+        if start:
+            app = current_app._get_current_object()
+            threading.Thread(target=_rebuild_in_background, args=(app,), daemon=True).start()
+    _sync_events(snap)
+    return snap
+
+
+# ====================== 写事件：本地就地更新 + 通过 Redis 广播 ======================
+def _publish(op, target_id, field='', delta=0):
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.xadd(CATALOG_EVENTS_KEY, {'op': op, 'id': target_id, 'field': field, 'delta': delta, 'pid': os.getpid()},
+               maxlen=CATALOG_EVENTS_MAXLEN, approximate=True)
+    except Exception as e:
+        print("【发布商品事件失败】", str(e))
+
+
+def _apply(snap, op, target_id, field='', delta=0):
+    if op == 'goods':
+        row = db.session.execute(_typed(CATALOG_SQL + " AND g.goods_id = :gid"), {'gid': target_id}).first()
+        with _catalog_lock:
+            if row:
+                snap.put(row)
+            else:
+                snap.remove(target_id)
+    elif op == 'remove':
+        with _catalog_lock:
+            snap.remove(target_id)
+    elif op == 'bump':
+        with _catalog_lock:
+            snap.bump(target_id, field, delta)
+    elif op == 'user':
+        row = db.session.execute(db.text(
+            "SELECT user_id, nickname, college, is_graduating FROM user WHERE user_id = :uid"
+        ), {'uid': target_id}).first()
+        if row:
+            with _catalog_lock:
+                snap.update_user(row)
+
+
+def _sync_events(snap):
+    """回放其他 worker 发布的写事件"""
+    r = get_redis()
+    now = time.time()
+    if r is None or now - _catalog['synced_at'] < CATALOG_SYNC_INTERVAL:
+        return
+    _catalog['synced_at'] = now
+    try:
+        streams = r.xread({CATALOG_EVENTS_KEY: snap.stream_id}, count=1000)
+    except Exception as e:
+        print("【回放商品事件失败】", str(e))
+        return
+    pid = str(os.getpid())
+    for _, events in streams:
+        for event_id, fields in events:
+            fields = {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+                      for k, v in fields.items()}
+            if fields.get('pid') != pid:
+                _apply(snap, fields['op'], int(fields['id']), fields.get('field', ''), int(fields.get('delta') or 0))
+            snap.stream_id = event_id
+
+
+def _emit(op, target_id, field='', delta=0):
+    if not catalog_enabled():
+        return
+    with _catalog_lock:
+        if _catalog['building']:
+            _catalog['seq'] += 1
+            _catalog['pending'][('user' if op == 'user' else 'goods', int(target_id))] = _catalog['seq']
+    snap = _catalog['snapshot']
+    if snap is not None:
+        _apply(snap, op, int(target_id), field, delta)
+    _publish(op, int(target_id), field, delta)
+
+
+def catalog_goods_changed(goods_id):
+    """商品发布 / 编辑 / 上下架 / 售出后调用：按数据库当前状态更新该行"""
+    _emit('goods', goods_id)
+
+
+def catalog_goods_removed(goods_id):
+    """商品下架 / 删除后调用"""
+    _emit('remove', goods_id)
+
+
+def catalog_bump(goods_id, field, delta=1):
+    """浏览量 / 想买 / 收藏计数变化，不查库"""
+    _emit('bump', goods_id, field, delta)
+
+
+def catalog_user_changed(user_id):
+    """卖家资料（昵称 / 学院 / 毕业生认证）变化后调用"""
+    _emit('user', user_id)
+
+
+# ====================== 向量化筛选与 top-k 排序 ======================
+def _top_rows(cols, idx, sort, k):
+    """取排序后的前 k 行：先按主排序键 argpartition 截出候选（保留并列），再 lexsort 精排"""
+    hot = cols['favor_num'][idx] * 5 + cols['wish_num'][idx] * 3 + cols['view_num'][idx] + cols['sold_num'][idx] * 10
+    if sort == 'newest':
+        keys = [-cols['on_shelf'][idx]]
+    elif sort == 'price_asc':
+        keys = [cols['price'][idx]]
+    elif sort == 'price_desc':
+        keys = [-cols['price'][idx]]
+    elif sort == 'hot':
+        keys = [-hot]
+    else:
+        keys = [-cols['on_shelf'][idx], -hot]
+    keys.append(-cols['goods_id'][idx])  # 同分时新发布的在前，保证翻页稳定
+
+    if k < len(idx):
+        cut = np.argpartition(keys[0], k - 1)[:k]
+        kth = keys[0][cut].max()
+        keep = keys[0] <= kth
+        idx, keys = idx[keep], [key[keep] for key in keys]
+    order = np.lexsort(keys[::-1])
+    return idx[order[:k]]
+
+
+def catalog_list(cate_id=None, price_min=None, price_max=None, degree_min=None,
+                 only_graduating=False, college=None, sort='default', page=1, page_size=20):
+    """
+    在快照上完成列表查询
+    :return: (当前页数据, 总数)
+    """
+    snap = get_snapshot()
+    with _catalog_lock:
+        n = snap.size
+        c = {name: arr[:n] for name, arr in snap.cols.items()}
+        mask = c['alive'].copy()
+        if cate_id:
+            mask &= c['cate_id'] == cate_id
+        if price_min is not None:
+            mask &= c['price'] >= price_min
+        if price_max is not None:
+            mask &= c['price'] <= price_max
+        if degree_min is not None:
+            mask &= c['degree'] >= degree_min
+        if only_graduating:
+            mask &= c['grad_batch']
+        if college:
+            mask &= c['college'] == snap.college_codes.get(college, -1)
+
+        idx = np.flatnonzero(mask)
+        total = len(idx)
+        offset = (page - 1) * page_size
+        rows = _top_rows(c, idx, sort, offset + page_size)[offset:] if offset < total else []
+
+        data = []
+        for row in rows:
+            nickname, user_college, _ = snap.users.get(int(c['user_id'][row]), ('未知用户', '', 0))
+            data.append({
+                'goods_id': int(c['goods_id'][row]),
+                'title': snap.titles[row],
+                'price': float(c['price'][row]),
+                'cover_img': snap.covers[row],
+                'degree': int(c['degree'][row]),
+                'view_num': int(c['view_num'][row]),
+                'wish_num': int(c['wish_num'][row]),
+                'favor_num': int(c['favor_num'][row]),
+                'sold_num': int(c['sold_num'][row]),
+                'is_batch': int(c['is_batch'][row]),
+                'user_nickname': nickname or '未知用户',
+                'user_college': user_college,
+            })
+    return data, total
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+后台文件清理：商品删除后把图片文件交给后台线程删除，请求不必等磁盘 IO
+"""
+import os
+import queue
+import threading
+
+from flask import current_app
+
+from .extensions import db
+
+
+# ====================== 商品图片文件清理 ======================
+# 每个进程一个守护线程，首次使用时启动（gunicorn fork 出的 worker 里线程不会被继承，会重新启动）。
+# 进程退出时队列里尚未处理的文件会留在磁盘上，只是成为孤儿文件，不影响数据。
+GOODS_IMAGE_URL_PREFIX = '/static/avatars/goodspictures/'
+DEFAULT_GOODS_COVER = '/static/avatars/goodspictures/default.jpg'
+
+_cleanup_queue = queue.Queue()
+_cleanup_worker = {'thread': None}
+_cleanup_lock = threading.Lock()
+
+
+def _image_path(root, url):
+    """图片 URL → 磁盘路径；默认封面和商品图片目录以外的地址一律不删"""
+    if not url or url == DEFAULT_GOODS_COVER or not url.startswith(GOODS_IMAGE_URL_PREFIX):
+        return None
+    name = url[len(GOODS_IMAGE_URL_PREFIX):]
+    if not name or '/' in name or '\\' in name or name.startswith('.'):
+        return None
+    return os.path.join(root, GOODS_IMAGE_URL_PREFIX.strip('/'), name)
+
+
+def _run():
+    while True:
+        paths = _cleanup_queue.get()
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print("【图片文件清理失败】", path, str(e))
+        _cleanup_queue.task_done()
+
+
+def _ensure_worker():
+    with _cleanup_lock:
+        thread = _cleanup_worker['thread']
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_run, name='image-cleanup', daemon=True)
+            thread.start()
+            _cleanup_worker['thread'] = thread
+
+
+def schedule_image_cleanup(urls):
+    """
+    商品及其图片记录删除并提交后调用：仍被其他图片记录引用的文件会保留
+    :return: 交给后台删除的文件数
+    """
+    urls = list({u for u in urls if u})
+    if not urls:
+        return 0
+    still_used = set(db.session.execute(db.text(
+        "SELECT DISTINCT url FROM goods_image WHERE url IN :urls"
+    ).bindparams(db.bindparam('urls', expanding=True)), {'urls': urls}).scalars().all())
+    root = current_app.root_path
+    paths = [p for p in (_image_path(root, u) for u in urls if u not in still_used) if p]
+    if paths:
+        _ensure_worker()
+        _cleanup_queue.put(paths)
+    return len(paths)
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+命令行工具
+"""
+import csv
+import datetime
+from datetime import timedelta
+import os
+import random
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.security import generate_password_hash
+
+from .caches import bump_category_version
+from .extensions import db
+
+
+# ====================== 命令行工具：批量生成压测数据 ======================
+# 用法：flask --app app seed --scale 1000000 --seed 42
+#       flask --app app seed --scale 1000000 --infile-dir /tmp/seed   # 生成 TSV + load.sql，用 LOAD DATA 导入
+# 数据分布尽量贴近线上：商品热度服从 Zipf 分布、学院人数不均、毕业生卖家多发清仓商品；
+# 固定 --seed 可复现同一份数据。默认分块多行 INSERT，每块提交一次。
+SEED_COLLEGES = [
+    ('计算机学院', 14), ('电气与电子工程学院', 12), ('机械工程学院', 11), ('经济与管理学院', 10),
+    ('土木建筑与环境学院', 9), ('生物工程与食品学院', 7), ('艺术设计学院', 7), ('外国语学院', 6),
+    ('理学院', 6), ('材料与化学工程学院', 6), ('马克思主义学院', 3), ('工业设计学院', 3),
+]
+SEED_CATEGORIES = {
+    '教材书籍': ['高等数学 同济第七版', '线性代数', '大学物理', '考研英语真题', 'C语言程序设计', '四六级词汇'],
+    '数码电子': ['二手 iPad', '机械键盘', '蓝牙耳机', '显示器 24寸', '移动硬盘 1T', '计算器 fx-991'],
+    '生活用品': ['台灯', '小风扇', '收纳箱', '电热水壶', '床上桌', '晾衣架'],
+    '服饰鞋包': ['双肩包', '运动鞋 42码', '学士服', '羽绒服', '帆布包', '卫衣'],
+    '运动户外': ['羽毛球拍', '篮球', '自行车', '瑜伽垫', '滑板', '哑铃一对'],
+    '美妆个护': ['吹风机', '电动牙刷', '卷发棒', '护肤套装', '剃须刀', '化妆镜'],
+    '乐器文娱': ['吉他', '尤克里里', '桌游', '电子琴', '小说合集', '画板'],
+}
+SEED_COMMENTS = ['还在吗？', '能便宜点吗', '几成新呀', '可以自提吗', '同学在哪个校区', '已私聊', '有发票吗', '成色怎么样']
+SEED_CHATS = ['你好，还在吗', '在的', '能小刀吗', '最低多少', '明天下午食堂门口见', '好的', '已付款', '收到了谢谢']
+
+SEED_COLUMNS = {
+    'user': ('user_id', 'account', 'password', 'nickname', 'stu_id', 'college', 'gender', 'is_graduating', 'status', 'reg_time'),
+    'goods': ('goods_id', 'title', 'cate_id', 'user_id', 'price', 'description', 'degree', 'stock', 'on_shelf_time',
+              'sold_num', 'wish_num', 'favor_num', 'view_num', 'is_batch', 'status'),
+    'goods_image': ('goods_id', 'url', 'sort'),
+    'order': ('order_id', 'order_no', 'buyer_id', 'seller_id', 'goods_id', 'quantity', 'buy_price', 'total_amount',
+              'pay_status', 'pay_time', 'confirm_time', 'created_at'),
+    'message': ('from_user_id', 'from_nickname', 'to_user_id', 'goods_id', 'type', 'content', 'is_read', 'created_at'),
+    'comment': ('comment_id', 'goods_id', 'user_id', 'parent_id', 'content', 'like_count', 'created_at'),
+    'user_interaction': ('user_id', 'goods_id', 'type', 'created_at'),
+}
+
+# 刷入子表前必须先刷入的父表（外键依赖）
+SEED_FLUSH_FIRST = {'goods_image': 'goods'}
+
+
+class _SeedWriter:
+    """按表缓冲行数据：满一块就多行 INSERT 并提交，或写入 LOAD DATA 用的 TSV 文件"""
+
+    def __init__(self, chunk_size, infile_dir=None):
+        self.chunk_size = chunk_size
+        self.infile_dir = infile_dir
+        self.buffers = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.files = {}
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+        if len(self.buffers[table]) >= self.chunk_size:
+            self.flush(table)
+
+    def flush(self, table):
+        if table in SEED_FLUSH_FIRST:
+            self.flush(SEED_FLUSH_FIRST[table])
+        rows = self.buffers.pop(table, [])
+        if not rows:
+            return
+        cols = SEED_COLUMNS[table]
+        if self.infile_dir:
+            if table not in self.files:
+                f = open(os.path.join(self.infile_dir, f'{table}.tsv'), 'w', encoding='utf-8', newline='')
+                self.files[table] = (f, csv.writer(f, delimiter='\t', lineterminator='\n',
+                                                   quoting=csv.QUOTE_NONE, escapechar='\\'))
+            writer = self.files[table][1]
+            for row in rows:
+                writer.writerow(['\\N' if v is None else v for v in row])
+        else:
+            sql = f"INSERT INTO `{table}` ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})"
+            db.session.execute(db.text(sql), [dict(zip(cols, row)) for row in rows])
+            db.session.commit()
+        self.counts[table] += len(rows)
+
+    def close(self):
+        for table in list(self.buffers):
+            self.flush(table)
+        for f, _ in self.files.values():
+            f.close()
+        if self.infile_dir:
+            with open(os.path.join(self.infile_dir, 'load.sql'), 'w', encoding='utf-8') as f:
+                f.write('SET FOREIGN_KEY_CHECKS = 0;\n')
+                for table in SEED_COLUMNS:
+                    if table in self.files:
+                        path = os.path.abspath(os.path.join(self.infile_dir, f'{table}.tsv'))
+                        f.write(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' ({', '.join(SEED_COLUMNS[table])});\n")
+                f.write('SET FOREIGN_KEY_CHECKS = 1;\n')
+
+
+def _zipf_cum_weights(n, s):
+    """Zipf 累积权重：排名第 k 的权重为 1/k^s，配合 random.choices(cum_weights=...) 抽样"""
+    total, cum = 0.0, []
+    for k in range(1, n + 1):
+        total += 1.0 / (k ** s)
+        cum.append(total)
+    return cum
+
+
+@click.command('seed')
+@click.option('--scale', default=10000, show_default=True, help='生成的商品数，其余表按比例放大')
+@click.option('--users', default=None, type=int, help='生成的用户数（默认 scale/5，至少 100）')
+@click.option('--seed', 'rand_seed', default=42, show_default=True, help='随机种子，相同种子生成相同数据')
+@click.option('--zipf', default=1.1, show_default=True, help='商品热度 Zipf 指数，越大越集中')
+@click.option('--chunk-size', default=5000, show_default=True, help='每个多行 INSERT 的行数')
+@click.option('--days', default=180, show_default=True, help='数据覆盖最近多少天')
+@click.option('--infile-dir', default=None, help='不直接写库，改为生成 TSV 和 LOAD DATA LOCAL INFILE 脚本')
+@with_appcontext
+def seed_command(scale, users, rand_seed, zipf, chunk_size, days, infile_dir):
+    """按 sqlwords.sql 的表结构批量生成用户、商品、图片、订单、消息、评论与互动数据"""
+    rng = random.Random(rand_seed)
+    n_users = users or max(100, scale // 5)
+    now = datetime.datetime.now().replace(microsecond=0)
+    start_time = now - timedelta(days=days)
+    span = days * 86400
+
+    def rand_time(after=None):
+        base = after or start_time
+        return base + timedelta(seconds=rng.randint(0, max(1, int((now - base).total_seconds()))))
+
+    if infile_dir:
+        os.makedirs(infile_dir, exist_ok=True)
+    writer = _SeedWriter(chunk_size, infile_dir)
+
+    # ---------- 分类 ----------
+    cate_ids = {}
+    for i, name in enumerate(SEED_CATEGORIES):
+        cate_id = db.session.execute(db.text("SELECT cate_id FROM category WHERE name = :n"), {'n': name}).scalar()
+        if cate_id is None:
+            db.session.execute(db.text("INSERT INTO category (name, sort, enabled) VALUES (:n, :s, 1)"),
+                               {'n': name, 's': i})
+            cate_id = db.session.execute(db.text("SELECT cate_id FROM category WHERE name = :n"), {'n': name}).scalar()
+        cate_ids[name] = cate_id
+    db.session.commit()
+    bump_category_version()
+
+    def next_id(table, pk):
+        return (db.session.execute(db.text(f"SELECT COALESCE(MAX({pk}), 0) FROM `{table}`")).scalar() or 0) + 1
+
+    # ---------- 用户：学院人数按权重倾斜，约 15% 应届毕业生 ----------
+    first_uid = next_id('user', 'user_id')
+    password = generate_password_hash('seed123456')
+    colleges = [c for c, _ in SEED_COLLEGES]
+    college_weights = [w for _, w in SEED_COLLEGES]
+    user_ids, graduating = [], []
+    for i in range(n_users):
+        uid = first_uid + i
+        is_grad = 1 if rng.random() < 0.15 else 0
+        user_ids.append(uid)
+        graduating.append(is_grad)
+        writer.add('user', (uid, f'seed{uid}', password, f'同学{uid}', str(2000000000 + uid),
+                            rng.choices(colleges, college_weights)[0], rng.randint(0, 2), is_grad, 1,
+                            start_time + timedelta(seconds=rng.randint(0, span))))
+    writer.flush('user')
+    click.echo(f'用户 {n_users} 条')
+
+    # ---------- 商品：卖家活跃度和商品热度都服从 Zipf ----------
+    seller_cum = _zipf_cum_weights(n_users, 1.0)
+    seller_order = user_ids[:]
+    rng.shuffle(seller_order)
+    first_gid = next_id('goods', 'goods_id')
+    popularity = list(range(1, scale + 1))
+    rng.shuffle(popularity)  # popularity[i] = 第 i 件商品的热度排名
+    goods_ids, goods_seller, goods_price, goods_time = [], [], [], []
+    for i in range(scale):
+        gid = first_gid + i
+        seller_idx = rng.choices(range(n_users), cum_weights=seller_cum)[0]
+        seller = seller_order[seller_idx]
+        is_grad = graduating[seller - first_uid]
+        cate = rng.choice(list(SEED_CATEGORIES))
+        price = round(rng.lognormvariate(3.5, 1.0), 2) + 1
+        heat = 1.0 / (popularity[i] ** zipf)
+        view_num = int(heat * scale * 5) + rng.randint(0, 30)
+        favor_num = int(view_num * rng.uniform(0.02, 0.1))
+        wish_num = int(view_num * rng.uniform(0.01, 0.08))
+        shelf_time = rand_time()
+        status = rng.choices((1, 0, 2), (85, 5, 10))[0]
+        sold_num = 1 if status == 2 else 0
+        is_batch = 1 if is_grad and rng.random() < 0.6 else 0
+
+        goods_ids.append(gid)
+        goods_seller.append(seller)
+        goods_price.append(price)
+        goods_time.append(shelf_time)
+        writer.add('goods', (gid, f'{rng.choice(SEED_CATEGORIES[cate])} {rng.randint(6, 10)}成新', cate_ids[cate],
+                             seller, price, '自用闲置，当面交易', rng.randint(5, 10), 0 if status == 2 else 1,
+                             shelf_time, sold_num, wish_num, favor_num, view_num, is_batch, status))
+        for sort in range(rng.choices((1, 2, 3), (50, 30, 20))[0]):
+            writer.add('goods_image', (gid, f'/static/avatars/goodspictures/{gid}_{sort}.jpg', sort))
+    writer.flush('goods')
+    writer.flush('goods_image')
+    click.echo(f'商品 {scale} 条')
+
+    # 按热度排名抽样商品的累积权重
+    goods_by_rank = [0] * scale
+    for i, rank in enumerate(popularity):
+        goods_by_rank[rank - 1] = i
+    goods_cum = _zipf_cum_weights(scale, zipf)
+
+    def pick_goods(k):
+        return [goods_by_rank[r] for r in rng.choices(range(scale), cum_weights=goods_cum, k=k)]
+
+    # ---------- 收藏 / 想要：热门商品互动更多，(用户, 商品, 类型) 去重 ----------
+    seen = set()
+    for idx in pick_goods(scale * 3):
+        uid = rng.choice(user_ids)
+        t = rng.choice((1, 2))
+        if (uid, idx, t) in seen or uid == goods_seller[idx]:
+            continue
+        seen.add((uid, idx, t))
+        writer.add('user_interaction', (uid, goods_ids[idx], t, rand_time(goods_time[idx])))
+    seen = None
+    writer.flush('user_interaction')
+
+    # ---------- 订单 + 配套的系统通知和聊天 ----------
+    # 订单号由订单 ID 补零生成：重复执行 seed 时 ID 接着库里最大值往后排，订单号不会撞唯一键
+    order_id = next_id('order', 'order_id')
+    for idx in pick_goods(scale // 2):
+        buyer = rng.choice(user_ids)
+        seller = goods_seller[idx]
+        if buyer == seller:
+            continue
+        created = rand_time(goods_time[idx])
+        pay_status = rng.choices((0, 1, 2, 3), (10, 20, 65, 5))[0]
+        pay_time = created + timedelta(minutes=rng.randint(1, 50)) if pay_status in (1, 2) else None
+        confirm_time = pay_time + timedelta(days=rng.randint(0, 3)) if pay_status == 2 else None
+        price = goods_price[idx]
+        writer.add('order', (order_id, f'{order_id:018d}', buyer, seller, goods_ids[idx], 1,
+                             price, price, pay_status, pay_time, confirm_time, created))
+        order_id += 1
+        for j in range(rng.randint(1, 6)):
+            a, b = (buyer, seller) if j % 2 == 0 else (seller, buyer)
+            writer.add('message', (a, f'同学{a}', b, goods_ids[idx], 'chat', rng.choice(SEED_CHATS),
+                                   1 if rng.random() < 0.8 else 0, created + timedelta(minutes=j * 3)))
+        if pay_time:
+            writer.add('message', (buyer, '系统', seller, goods_ids[idx], 'system', '买家已成功支付订单，请及时与买家联系！',
+                                   1 if rng.random() < 0.7 else 0, pay_time))
+    writer.flush('order')
+    writer.flush('message')
+
+    # ---------- 评论：约 30% 是对同一商品已有评论的回复（回复时间晚于被回复的评论） ----------
+    comment_id = next_id('comment', 'comment_id')
+    recent = {}
+    for idx in pick_goods(scale):
+        parents = recent.setdefault(idx, [])
+        parent, parent_time = rng.choice(parents) if parents and rng.random() < 0.3 else (0, goods_time[idx])
+        created = rand_time(parent_time)
+        writer.add('comment', (comment_id, goods_ids[idx], rng.choice(user_ids), parent, rng.choice(SEED_COMMENTS),
+                               int(rng.paretovariate(2.0)) - 1, created))
+        parents.append((comment_id, created))
+        del parents[:-5]
+        comment_id += 1
+
+    writer.close()
+    for table, count in writer.counts.items():
+        click.echo(f'{table}: {count} 条')
+    if infile_dir:
+        click.echo(f'已生成 {infile_dir}/load.sql，执行：mysql --local-infile=1 ershousystem < {infile_dir}/load.sql')
+
+
+# ====================== 命令行工具：离线计算“猜你喜欢” ======================
+# 用法：flask --app app recommend --days 180 --top-n 20
+# 建议 crontab 每天凌晨跑一次：0 4 * * * cd /srv/ershou && flask --app app recommend
+@click.command('recommend')
+@click.option('--days', default=180, show_default=True, help='只统计最近多少天的收藏 / 想要 / 订单，0 表示全部')
+@click.option('--top-n', default=20, show_default=True, type=click.IntRange(1, 255),
+              help='每件商品保留的相似商品数（rank_no 为 TINYINT UNSIGNED，最多 255）')
+@with_appcontext
+def recommend_command(days, top_n):
+    from .recommend import build_recommendations, recommend_available
+
+    if not recommend_available():
+        raise click.ClickException('需要安装 NumPy 和 SciPy：pip install numpy scipy')
+    started = datetime.datetime.now()
+    behaviors, rows = build_recommendations(days=days or None, top_n=top_n)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    click.echo(f'行为 {behaviors} 条，写入相似商品 {rows} 条，耗时 {elapsed:.1f} 秒')
+
+
+# ====================== 命令行工具：归档历史消息 ======================
+# 用法：flask --app app archive-messages --system-days 30 --chat-days 180
+# 建议 crontab 每天凌晨跑一次：30 3 * * * cd /srv/ershou && flask --app app archive-messages
+@click.command('archive-messages')
+@click.option('--system-days', default=30, show_default=True, help='已读系统通知保留天数')
+@click.option('--chat-days', default=180, show_default=True, help='已读聊天记录保留天数')
+@click.option('--batch-size', default=1000, show_default=True, help='每批移动的条数')
+@click.option('--pause', default=0.2, show_default=True, help='每批之间停顿的秒数')
+@click.option('--max-batches', default=0, show_default=True, help='每类最多处理多少批，0 表示不限')
+@click.option('--dry-run', is_flag=True, help='只统计待归档条数，不移动数据')
+@with_appcontext
+def archive_messages_command(system_days, chat_days, batch_size, pause, max_batches, dry_run):
+    from .messaging import archive_messages
+
+    started = datetime.datetime.now()
+    moved = archive_messages(system_days=system_days, chat_days=chat_days, batch_size=batch_size,
+                             pause=pause, max_batches=max_batches or None, dry_run=dry_run)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    verb = '待归档' if dry_run else '已归档'
+    click.echo(f"{verb}：系统通知 {moved['system']} 条，聊天记录 {moved['chat']} 条，耗时 {elapsed:.1f} 秒")
+
+
+# ====================== 命令行工具：重算个人中心统计 ======================
+# 用法：flask --app app rebuild-user-stats [--user-id 123]
+# 建议 crontab 每天凌晨跑一次，校正并发或手工改库造成的偏差：0 5 * * * cd /srv/ershou && flask --app app rebuild-user-stats
+@click.command('rebuild-user-stats')
+@click.option('--user-id', default=0, help='只重算指定用户，默认全部')
+@with_appcontext
+def rebuild_user_stats_command(user_id):
+    from .user_stats import rebuild_user_stats
+
+    started = datetime.datetime.now()
+    rows = rebuild_user_stats(user_id or None)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    click.echo(f'已重算用户统计，影响 {rows} 行，耗时 {elapsed:.1f} 秒')
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+扩展实例：SQLAlchemy（带读写分离路由）与 Redis 客户端，均在 create_app 中绑定到应用
+"""
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+
+# ====================== 读写分离：只读路由走从库 ======================
+# 配置 REPLICA_DATABASE_URL 后注册名为 replica 的第二个引擎。用 @read_only 标记的路由在请求内
+# 把查询路由到从库；写语句和 flush 永远走主库。刚写过数据的会话在 REPLICA_STICKY_SECONDS 内
+# 继续读主库（读己之写）；只改计数的写接口（@counter_write，如浏览量上报）不触发粘滞。
+# 从库连不上时标记为不可用，期间自动回退主库；撞上故障的那次请求在主库上重试一次。
+# 本地验证：起两个 MySQL 实例（或主从），分别配 DATABASE_URL / REPLICA_DATABASE_URL，
+# 打开 SQL_STATS_HEADERS=1 后响应头 X-DB-Route 会标明本次请求读的是 primary 还是 replica。
+_replica_state = {'down_until': 0}
+_READ_PREFIXES = ('select', 'with', 'show', '(')
+
+
+def _is_write_clause(clause):
+    """INSERT / UPDATE / DELETE 及非查询类原生 SQL 都视为写"""
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().lower().startswith(_READ_PREFIXES)
+    return False
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """请求标记为只读且从库可用时，把查询发往 replica 引擎"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None
+                and has_request_context()
+                and g.get('use_replica')
+                and not self._flushing
+                and not _is_write_clause(clause)):
+            return db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(f):
+    """标记只读路由：请求内的查询可以走从库；从库在本次请求中断开时回滚并在主库上重试一次"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except Exception:
+            if not (g.get('use_replica') and g.get('replica_failed')):
+                raise
+            db.session.rollback()
+            g.use_replica = False
+            return f(*args, **kwargs)
+    decorated_function._read_only = True
+    return decorated_function
+
+
+def counter_write(f):
+    """标记只更新计数的写接口（如浏览量）：不需要读己之写，成功后不把会话粘到主库"""
+    f._counter_write = True
+    return f
+
+
+# SQLAlchemy 数据库实例（create_app 中 init_app）
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def replica_available():
+    return bool(current_app.config['REPLICA_DATABASE_URL']) and time.time() >= _replica_state['down_until']
+
+
+def mark_replica_down(reason, app=None):
+    """从库断开：在 REPLICA_RETRY_SECONDS 内不再路由到从库，并让当前请求知道可以改走主库重试"""
+    app = app or current_app
+    _replica_state['down_until'] = time.time() + app.config['REPLICA_RETRY_SECONDS']
+    if has_request_context():
+        g.replica_failed = True
+    print("【从库不可用，回退主库】", reason)
+
+
+def init_replica(app):
+    """注册从库故障监听和请求级路由钩子"""
+    if app.config['REPLICA_DATABASE_URL']:
+        with app.app_context():
+            @event.listens_for(db.engines['replica'], 'handle_error')
+            def _on_replica_error(context):
+                # 连接中途断开，或根本连不上（connection 为空表示出错时还没拿到连接）
+                if (context.is_disconnect or context.connection is None
+                        or isinstance(context.original_exception, OSError)):
+                    mark_replica_down(context.original_exception, app)
+
+    @app.before_request
+    def choose_read_route():
+        """决定本次请求是否读从库（只读路由 + 从库可用 + 不在写后粘滞期内）"""
+        view = app.view_functions.get(request.endpoint)
+        g.replica_failed = False
+        g.use_replica = (
+            getattr(view, '_read_only', False)
+            and replica_available()
+            and session.get('primary_until', 0) < time.time()
+        )
+
+    @app.after_request
+    def stick_to_primary_after_write(response):
+        """写请求成功后，该会话在粘滞期内读主库，保证能读到自己刚写的数据"""
+        view = app.view_functions.get(request.endpoint)
+        if (app.config['REPLICA_DATABASE_URL']
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and not getattr(view, '_counter_write', False)
+                and response.status_code < 400):
+            session['primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        if app.config.get('SQL_STATS_HEADERS'):
+            response.headers['X-DB-Route'] = 'replica' if g.get('use_replica') else 'primary'
+        return response
+
+
+# ====================== Redis（可选） ======================
+# 配置 REDIS_URL 后用于多个 worker 之间同步缓存版本号等，不配置则退化为单进程内存模式
+_redis_client = None
+
+
+def get_redis():
+    """返回共享的 Redis 客户端，未配置 REDIS_URL 时返回 None"""
+    global _redis_client
+    if _redis_client is None and current_app.config.get('REDIS_URL'):
+        import redis
+        _redis_client = redis.Redis.from_url(current_app.config['REDIS_URL'], socket_timeout=0.5)
+    return _redis_client
+
+
+def reset_after_fork():
+    """gunicorn --preload 时在子进程里调用：丢弃从父进程继承的连接"""
+    global _redis_client
+    _redis_client = None
+    for engine in db.engines.values():
+        engine.dispose(close=False)
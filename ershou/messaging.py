@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+消息中心：发送工具函数，同步 / 异步接口共用的 SQL 与格式化，以及历史消息归档
+"""
+import datetime
+import heapq
+import itertools
+import time
+
+from .extensions import db
+from .models import Message
+
+
+# ====================== 消息中心工具函数 ======================
+SYSTEM_USER_ID = 0  # 定义系统发送者ID为0
+
+def send_message(to_user_id, content, from_user_id=SYSTEM_USER_ID, order_id=None):
+    """统一发送消息（系统消息 from_user_id=0，聊天消息填真实ID）"""
+    try:
+        msg = Message(
+            to_user_id=to_user_id,
+            from_user_id=from_user_id,
+            order_id=order_id,
+            content=content
+        )
+        db.session.add(msg)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print("【发送消息失败】", str(e))
+        return False
+    
+
+# ====================== 消息中心：同步 / 异步接口共用的 SQL 与格式化 ======================
+# 同步接口（本文件）和异步接口（async_messages.py）使用同一套 SQL 与返回格式，业务规则只维护一份。
+MESSAGE_LIST_SQL = """
+        SELECT 
+            latest.*,
+            u.user_id AS opponent_id,
+            u.nickname AS opponent_nick,
+            u.avatar AS opponent_avatar,
+            COUNT(unread.msg_id) AS unread_count
+        FROM (
+            SELECT m.*,
+                   ROW_NUMBER() OVER (PARTITION BY 
+                     CASE WHEN from_user_id = 0 THEN m.msg_id ELSE  -- 系统消息单独分组
+                       CASE WHEN from_user_id = :uid THEN to_user_id ELSE from_user_id END
+                     END
+                     ORDER BY created_at DESC) as rn
+            FROM message m
+            WHERE (m.to_user_id = :uid)  -- 只看发给我的消息（包括系统消息）
+        ) latest
+        LEFT JOIN user u ON u.user_id = CASE WHEN latest.from_user_id = :uid THEN latest.to_user_id ELSE latest.from_user_id END
+            AND latest.from_user_id != 0  -- 系统消息不join用户
+        LEFT JOIN message unread ON unread.to_user_id = :uid 
+               AND ((unread.from_user_id = u.user_id AND u.user_id IS NOT NULL) OR unread.from_user_id = 0)
+               AND unread.is_read = 0
+        WHERE latest.rn = 1
+        GROUP BY latest.msg_id, u.user_id, u.nickname, u.avatar
+        ORDER BY latest.created_at DESC
+"""
+
+UNREAD_COUNT_SQL = """
+    SELECT COUNT(*) FROM message 
+    WHERE to_user_id = :uid AND is_read = 0
+"""
+
+# 聊天记录按 (created_at, msg_id) 倒序翻页；{table} 为 message 或归档表，{cursor} 为空或 CHAT_CURSOR_SQL
+CHAT_PAGE_SIZE = 50
+CHAT_HISTORY_PAGE_SQL = """
+    SELECT m.*, u.nickname AS from_nickname_temp, u.avatar AS from_avatar
+    FROM {table} m
+    LEFT JOIN user u ON m.from_user_id = u.user_id
+    WHERE m.type = 'chat'
+      AND (
+        (m.from_user_id = :me AND m.to_user_id = :you)
+        OR
+        (m.from_user_id = :you AND m.to_user_id = :me)
+      )
+      {cursor}
+    ORDER BY m.created_at DESC, m.msg_id DESC
+    LIMIT :limit
+"""
+CHAT_CURSOR_SQL = "AND (m.created_at < :before_time OR (m.created_at = :before_time AND m.msg_id < :before_id))"
+
+# 标记为已读（只标记对方发给我的消息）
+CHAT_MARK_READ_SQL = """
+    UPDATE message 
+    SET is_read = 1 
+    WHERE to_user_id = :me AND from_user_id = :you AND is_read = 0 AND type = 'chat'
+"""
+
+DEFAULT_AVATAR = '/static/avatars/userspictures/default.jpg'
+
+
+def format_conversation(r):
+    """会话列表中的一行 → 接口输出（系统消息特殊处理）"""
+    if r.from_user_id == 0:
+        return {
+            'opponent_id': 0,
+            'opponent_nick': '系统通知',
+            'opponent_avatar': '/static/avatars/userspictures/system.png',  # 可放一个系统图标
+            'last_message': r.content,
+            'last_time': r.created_at.strftime('%m-%d %H:%M'),
+            'unread_count': r.unread_count or 0
+        }
+    return {
+        'opponent_id': r.opponent_id,
+        'opponent_nick': r.opponent_nick or '未知用户',
+        'opponent_avatar': r.opponent_avatar or DEFAULT_AVATAR,
+        'last_message': r.content,
+        'last_time': r.created_at.strftime('%m-%d %H:%M'),
+        'unread_count': r.unread_count or 0
+    }
+
+
+def format_chat_messages(rows, me):
+    """聊天记录（查询结果为倒序）→ 正序的接口输出"""
+    messages = []
+    for row in reversed(rows):  # 倒序变正序（最早的在前面）
+        msg = dict(row._mapping)
+        msg['created_at'] = row.created_at.strftime('%Y-%m-%d %H:%M')
+        msg['from_nickname'] = row.from_nickname_temp or row.from_nickname or '未知用户'
+        msg['from_avatar'] = row.from_avatar or DEFAULT_AVATAR
+        msg['is_me'] = (row.from_user_id == me)
+        messages.append(msg)
+    return messages
+
+
+def chat_history_sql(table='message', with_cursor=False):
+    return CHAT_HISTORY_PAGE_SQL.format(table=table, cursor=CHAT_CURSOR_SQL if with_cursor else '')
+
+
+def chat_cursor(row):
+    """一条聊天记录 → 翻页游标（'YYYYmmddHHMMSS-msg_id'）"""
+    return f"{row.created_at:%Y%m%d%H%M%S}-{row.msg_id}"
+
+
+def parse_chat_cursor(value):
+    """游标 → {'before_time', 'before_id'}；为空返回 None，格式错误抛 ValueError"""
+    if not value:
+        return None
+    ts, _, msg_id = value.partition('-')
+    return {'before_time': datetime.datetime.strptime(ts, '%Y%m%d%H%M%S'), 'before_id': int(msg_id)}
+
+
+# 发送限流（同步装饰器和异步接口共用同一条规则、同一个计数键，配置了 Redis 时两边合并计数）
+MESSAGE_SEND_LIMIT = 30
+MESSAGE_SEND_WINDOW = 60
+MESSAGE_SEND_LIMIT_MSG = '发送太频繁，请稍后再试'
+
+
+def check_message_send(data, me):
+    """校验发送参数，返回 (错误提示或 None, 清洗后的参数)"""
+    to_user_id = data.get('to_user_id')
+    content = (data.get('content') or '').strip()
+    if not to_user_id or not content:
+        return '参数不完整', None
+    try:
+        to_user_id = int(to_user_id)
+    except (TypeError, ValueError):
+        return '参数不完整', None
+    if to_user_id == me:
+        return '不能给自己发消息', None
+    return None, {
+        'to_user_id': to_user_id,
+        'content': content,
+        'order_id': data.get('order_id'),  # 可选
+        'goods_id': data.get('goods_id'),  # 可选
+    }
+
+
+def format_sent_message(msg_id, me, nickname, avatar, content, created_at):
+    """发送成功后返回给前端的消息结构"""
+    return {
+        'msg_id': msg_id,
+        'from_user_id': me,
+        'from_nickname': nickname,
+        'from_avatar': avatar or DEFAULT_AVATAR,
+        'content': content,
+        'created_at': created_at.strftime('%Y-%m-%d %H:%M'),
+        'is_me': True
+    }
+
+
+# ====================== 历史消息归档 ======================
+# message 表只增不减，收件箱、聊天、未读数都查它。归档任务把超过保留期的消息挪到 message_archive：
+#   - 已读的系统通知：保留 30 天
+#   - 已读的聊天记录：保留 180 天
+# 未读消息一律留在热表：未读数、收件箱的未读角标和“标记已读”都只查 message，不会漏掉。
+# 每批先查出一批 msg_id，同一事务里 INSERT ... SELECT 到归档表再 DELETE，批与批之间停顿，避免长事务和主从延迟。
+# 因为未读的旧聊天不归档，同一会话里热表和归档表的时间会交错：聊天记录接口两张表用同一个游标各查一页，
+# 按 (created_at, msg_id) 倒序合并后取一页。收件箱只列热表里还有消息的会话，180 天没有新消息且已读完的会话
+# 不再出现在列表里，但打开聊天仍能读到归档的历史。
+MESSAGE_ARCHIVE_TABLE = 'message_archive'
+MESSAGE_ARCHIVE_COLUMNS = ('msg_id, from_user_id, from_nickname, to_user_id, order_id, goods_id, '
+                           'type, content, is_read, digest_key, created_at')
+MESSAGE_ARCHIVE_RULES = {
+    'system': "type = 'system' AND is_read = 1 AND created_at < :cutoff",
+    'chat': "type = 'chat' AND is_read = 1 AND created_at < :cutoff",
+}
+
+
+def archive_messages(system_days=30, chat_days=180, batch_size=1000, pause=0.2, max_batches=None, dry_run=False):
+    """
+    分批归档历史消息
+    :param pause: 每批之间停顿的秒数
+    :param max_batches: 每类最多处理多少批（None 表示直到处理完）
+    :param dry_run: 只统计待归档条数，不移动数据
+    :return: {'system': 条数, 'chat': 条数}
+    """
+    now = datetime.datetime.now()
+    cutoffs = {'system': now - datetime.timedelta(days=system_days),
+               'chat': now - datetime.timedelta(days=chat_days)}
+    ids_param = db.bindparam('ids', expanding=True)
+    moved = {}
+    for kind, where in MESSAGE_ARCHIVE_RULES.items():
+        params = {'cutoff': cutoffs[kind]}
+        if dry_run:
+            moved[kind] = db.session.execute(db.text(f"SELECT COUNT(*) FROM message WHERE {where}"), params).scalar() or 0
+            continue
+
+        moved[kind] = batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = db.session.execute(db.text(
+                f"SELECT msg_id FROM message WHERE {where} ORDER BY msg_id LIMIT :n"
+            ), {**params, 'n': batch_size}).scalars().all()
+            if not ids:
+                break
+            try:
+                db.session.execute(db.text(f"""
+                    INSERT INTO {MESSAGE_ARCHIVE_TABLE} ({MESSAGE_ARCHIVE_COLUMNS})
+                    SELECT {MESSAGE_ARCHIVE_COLUMNS} FROM message WHERE msg_id IN :ids
+                """).bindparams(ids_param), {'ids': ids})
+                db.session.execute(db.text("DELETE FROM message WHERE msg_id IN :ids").bindparams(ids_param),
+                                   {'ids': ids})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            moved[kind] += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            time.sleep(pause)
+    return moved
+
+
+def chat_page_params(me, you, before=None, limit=CHAT_PAGE_SIZE):
+    """聊天记录一页的查询参数（同步 / 异步接口共用）"""
+    return {'me': me, 'you': you, 'limit': limit, **(before or {})}
+
+
+def merge_chat_pages(hot_rows, archive_rows, limit=CHAT_PAGE_SIZE):
+    """热表、归档表各自按同一游标查出的一页（均已倒序）合并成一页（同步 / 异步接口共用）"""
+    merged = heapq.merge(hot_rows, archive_rows, key=lambda r: (r.created_at, r.msg_id), reverse=True)
+    return list(itertools.islice(merged, limit))
+
+
+def chat_next_before(rows, limit=CHAT_PAGE_SIZE):
+    """满一页才返回下一页游标，否则说明已经到头"""
+    return chat_cursor(rows[-1]) if len(rows) >= limit else None
+
+
+def load_chat_page(me, you, before=None, limit=CHAT_PAGE_SIZE):
+    """
+    读取一页聊天记录（倒序）：热表和归档表各查一页后合并
+    :param before: parse_chat_cursor 的结果，None 表示最新一页
+    :return: (记录列表, 下一页游标或 None)
+    """
+    params = chat_page_params(me, you, before, limit)
+    rows = db.session.execute(db.text(chat_history_sql('message', before is not None)), params).fetchall()
+    try:
+        archived = db.session.execute(db.text(chat_history_sql(MESSAGE_ARCHIVE_TABLE, before is not None)),
+                                      params).fetchall()
+    except Exception as e:
+        print("【读取归档聊天记录失败】", str(e))
+        archived = []
+    rows = merge_chat_pages(rows, archived, limit)
+    return rows, chat_next_before(rows, limit)
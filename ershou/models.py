@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+数据模型定义（表结构见 sqlwords.sql）
+"""
+import datetime
+
+from .extensions import db
+
+
+# ====================== 数据模型定义 ======================
+
+class User(db.Model):
+    """用户表"""
+    __tablename__ = 'user'
+    user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)      # 主键自增
+    account = db.Column(db.String(30), unique=True, nullable=False)               # 登录账号（学号/手机/邮箱）
+    password = db.Column(db.String(100), nullable=False)                         # 存储哈希后的密码
+    nickname = db.Column(db.String(50), nullable=False, server_default='校园用户')   # 昵称，默认“校园用户”
+    avatar = db.Column(db.String(255), server_default='')                        # 头像路径
+    email = db.Column(db.String(100))                                            # 邮箱，可为空
+    stu_id = db.Column(db.String(20), unique=True)                               # 学号（唯一，用于实名认证）
+    college = db.Column(db.String(50), server_default='')                        # 学院
+    class_name = db.Column(db.String(50), server_default='')                     # 班级
+    gender = db.Column(db.Integer, server_default='0')                           # 0=未填，1=男，2=女
+    is_graduating = db.Column(db.Integer, server_default='0')                    # 是否应届毕业生 0=否 1=是
+    status = db.Column(db.Integer, server_default='1')                           # 账号状态 1=正常 0=禁用
+    reg_time = db.Column(db.DateTime, server_default=db.func.now())              # 注册时间
+    is_admin = db.Column(db.Integer, server_default='0')
+
+class Category(db.Model):
+    __tablename__ = 'category'
+    cate_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(30), nullable=False)
+    sort = db.Column(db.Integer, server_default='0')
+    enabled = db.Column(db.Boolean, server_default='1', default=True)  # 更稳妥
+
+    def __repr__(self):
+        return f'<Category {self.name}>'
+
+class GraduateBatch(db.Model):
+    """毕业生清仓批次表"""
+    __tablename__ = 'graduate_batch'
+    batch_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.BigInteger, nullable=False)                      # 毕业生用户ID
+    batch_name = db.Column(db.String(100), nullable=False)                  # 批次名称
+    graduate_date = db.Column(db.Date, nullable=False)                      # 毕业日期
+    created_at = db.Column(db.DateTime, default=datetime.datetime.now)
+
+class goods(db.Model):
+    """商品表（注意类名小写，实际生产不推荐，但这里保持原样）"""
+    __tablename__ = 'goods'
+    goods_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    title = db.Column(db.String(100), nullable=False)           # 商品标题
+    cate_id = db.Column(db.Integer, nullable=False)           # 分类ID
+    user_id = db.Column(db.BigInteger, db.ForeignKey('user.user_id'), nullable=False)        # 发布者ID
+    price = db.Column(db.DECIMAL(10,2), nullable=False)       # 价格，精确到分
+    description = db.Column(db.Text)                          # 商品描述
+    degree = db.Column(db.Integer, default=10)                # 新旧程度 10=全新
+    stock = db.Column(db.Integer, default=1)                  # 库存数量
+    status = db.Column(db.Integer, default=1)                 # 1=上架 0=下架
+    is_batch = db.Column(db.Integer, default=0)               # 是否支持批量购买
+    batch_id = db.Column(db.BigInteger, db.ForeignKey('graduate_batch.batch_id'))  # 所属清仓批次
+    on_shelf_time = db.Column(db.DateTime, default=datetime.datetime.now)  # 上架时间
+    view_num = db.Column(db.Integer, default=0)               # 浏览量
+    wish_num = db.Column(db.Integer, default=0)               # 想买数
+    favor_num = db.Column(db.Integer, default=0)              # 收藏数
+    sold_num = db.Column(db.Integer, default=0)               # 已售数量
+    user = db.relationship('User', backref='published_goods')
+
+class goods_image(db.Model):
+    """商品图片表"""
+    __tablename__ = 'goods_image'
+    img_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    goods_id = db.Column(db.BigInteger, nullable=False)       # 关联商品
+    url = db.Column(db.String(255), nullable=False)           # 图片访问路径
+    sort = db.Column(db.Integer, default=0)                   # 排序，第一张为封面
+
+class Message(db.Model):
+    """站内消息表"""
+    __tablename__ = 'message'
+    msg_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    from_user_id = db.Column(db.BigInteger, nullable=False)
+    from_nickname = db.Column(db.String(50), default='系统')
+    to_user_id = db.Column(db.BigInteger, nullable=False)
+    order_id = db.Column(db.BigInteger)
+    goods_id = db.Column(db.BigInteger)  # 新增
+    type = db.Column(db.Enum('system', 'chat'), nullable=False, default='chat')
+    content = db.Column(db.Text, nullable=False)
+    is_read = db.Column(db.Integer, server_default='0')
+    digest_key = db.Column(db.String(64), unique=True)  # 聚合通知键（如 comment_like:评论ID），普通消息为空
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+class Order(db.Model):
+    __tablename__ = 'order'
+    order_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    order_no = db.Column(db.String(30), unique=True, nullable=False)
+    buyer_id = db.Column(db.BigInteger, nullable=False)
+    seller_id = db.Column(db.BigInteger, nullable=False)
+    goods_id = db.Column(db.BigInteger, nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    total_amount = db.Column(db.DECIMAL(10,2), nullable=False)
+    pay_status = db.Column(db.Integer, default=0)  # 0待支付 1已支付 2已完成
+    pay_time = db.Column(db.DateTime)
+    confirm_time = db.Column(db.DateTime)          # ← 新增：确认收货时间
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    # 其他字段根据需要补充...
+
+# ====================== 举报模型 ======================
+class Report(db.Model):
+    """举报表"""
+    __tablename__ = 'report'
+    
+    report_id    = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    reporter_id  = db.Column(db.BigInteger, db.ForeignKey('user.user_id', ondelete='CASCADE'), nullable=False)
+    target_type  = db.Column(db.String(20), nullable=False)  # 'goods' 或 'user'（ENUM 在 SQLAlchemy 中用 String 模拟）
+    target_id    = db.Column(db.BigInteger, nullable=False)
+    reason       = db.Column(db.String(50), nullable=False)
+    description  = db.Column(db.String(255), server_default='')
+    evidence     = db.Column(db.String(255), server_default='')
+    status = db.Column(db.Integer, server_default='0')  # 正确！推荐
+    created_at   = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+
+    # 关系（方便查询举报人信息）
+    reporter = db.relationship('User', foreign_keys=[reporter_id], backref='reports')
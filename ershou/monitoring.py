@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+运行监控：数据库连接池统计、按路由的 SQL 统计与 N+1 检测、Prometheus 文本格式输出
+"""
+import datetime
+import re
+import threading
+import time
+from collections import Counter, deque
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from .extensions import db
+
+
+# ====================== 数据库连接池 ======================
+# MySQL 会主动断开长时间空闲的连接（wait_timeout），默认引擎配置下容易拿到失效连接。
+# 连接池参数可通过环境变量调整；InstrumentedQueuePool 记录取连接等待时间、超时和失效次数，
+# 在后台 /admin/metrics 与 Prometheus 文本接口 /metrics 中展示。
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)  # 等待时间直方图分桶（秒）
+
+_pool_metrics = {
+    'connects': 0,          # 新建物理连接次数
+    'checkouts': 0,         # 取出连接次数
+    'checkins': 0,          # 归还连接次数
+    'in_use': 0,            # 当前借出数
+    'peak_in_use': 0,       # 借出数峰值
+    'timeouts': 0,          # 等待超时（池耗尽）次数
+    'invalidations': 0,     # 连接失效次数（含 pre_ping 检测到的断线）
+    'soft_invalidations': 0,
+    'wait_count': 0,        # 等待观测次数
+    'wait_sum': 0.0,        # 等待总耗时（秒）
+    'wait_max': 0.0,        # 最长一次等待（秒）
+    'wait_buckets': [0] * len(POOL_WAIT_BUCKETS),
+    'last_error': '',       # 最近一次失效原因
+    'last_error_time': None,
+}
+_pool_metrics_lock = threading.Lock()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """带等待时间统计的 QueuePool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with _pool_metrics_lock:
+                _pool_metrics['timeouts'] += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with _pool_metrics_lock:
+                _pool_metrics['wait_count'] += 1
+                _pool_metrics['wait_sum'] += wait
+                _pool_metrics['wait_max'] = max(_pool_metrics['wait_max'], wait)
+                for i, bound in enumerate(POOL_WAIT_BUCKETS):
+                    if wait <= bound:
+                        _pool_metrics['wait_buckets'][i] += 1
+                        break
+
+
+@event.listens_for(InstrumentedQueuePool, 'connect')
+def _on_pool_connect(dbapi_connection, connection_record):
+    with _pool_metrics_lock:
+        _pool_metrics['connects'] += 1
+
+
+@event.listens_for(InstrumentedQueuePool, 'checkout')
+def _on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _pool_metrics_lock:
+        _pool_metrics['checkouts'] += 1
+        _pool_metrics['in_use'] += 1
+        _pool_metrics['peak_in_use'] = max(_pool_metrics['peak_in_use'], _pool_metrics['in_use'])
+
+
+@event.listens_for(InstrumentedQueuePool, 'checkin')
+def _on_pool_checkin(dbapi_connection, connection_record):
+    with _pool_metrics_lock:
+        _pool_metrics['checkins'] += 1
+        _pool_metrics['in_use'] = max(0, _pool_metrics['in_use'] - 1)
+
+
+def _record_pool_invalidation(kind, exception):
+    with _pool_metrics_lock:
+        _pool_metrics[kind] += 1
+        if exception is not None:
+            _pool_metrics['last_error'] = str(exception)[:200]
+            _pool_metrics['last_error_time'] = datetime.datetime.now()
+
+
+@event.listens_for(InstrumentedQueuePool, 'invalidate')
+def _on_pool_invalidate(dbapi_connection, connection_record, exception):
+    _record_pool_invalidation('invalidations', exception)
+
+
+@event.listens_for(InstrumentedQueuePool, 'soft_invalidate')
+def _on_pool_soft_invalidate(dbapi_connection, connection_record, exception):
+    _record_pool_invalidation('soft_invalidations', exception)
+
+
+# ====================== SQL 执行统计 & N+1 检测 ======================
+# 不少路由在循环里查库（商品封面、逐行查卖家等），这里挂 SQLAlchemy 游标事件，
+# 按请求统计语句数、数据库耗时和重复语句指纹；同一指纹在一次请求里重复超过阈值即记为 N+1，
+# 慢语句连同路由打印到日志，汇总结果在后台 /admin/metrics/sql 查看。
+_SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+
+# 键：endpoint → 值：累计统计
+_sql_route_stats = {}
+_sql_slow_log = deque(maxlen=100)     # 最近的慢语句
+_sql_stats_lock = threading.Lock()
+
+
+def sql_fingerprint(statement):
+    """把语句里的字面量、IN 列表、空白归一化，得到可比较的指纹"""
+    s = _SQL_LITERAL_RE.sub('?', statement)
+    s = re.sub(r'\s+', ' ', s).strip()
+    s = _SQL_IN_LIST_RE.sub('(?+)', s)
+    return s[:300]
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _sql_before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _sql_after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if not has_request_context():
+        return
+
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = {'count': 0, 'time': 0.0, 'fingerprints': Counter()}
+    fingerprint = sql_fingerprint(statement)
+    stats['count'] += 1
+    stats['time'] += elapsed
+    stats['fingerprints'][fingerprint] += 1
+
+    if elapsed * 1000 >= current_app.config['SQL_SLOW_MS']:
+        entry = {
+            'time': datetime.datetime.now(),
+            'endpoint': request.endpoint or request.path,
+            'ms': round(elapsed * 1000, 1),
+            'statement': fingerprint,
+        }
+        with _sql_stats_lock:
+            _sql_slow_log.appendleft(entry)
+        print(f"【慢SQL】{entry['endpoint']} {entry['ms']}ms {fingerprint}")
+
+
+def collect_sql_stats(response):
+    """请求结束时把本次 SQL 统计并入路由汇总"""
+    stats = g.get('sql_stats')
+    count = stats['count'] if stats else 0
+    db_time = stats['time'] if stats else 0.0
+    endpoint = request.endpoint or 'unknown'
+
+    repeated = []
+    if stats:
+        threshold = current_app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        repeated = [(fp, n) for fp, n in stats['fingerprints'].most_common() if n >= threshold]
+
+    with _sql_stats_lock:
+        route = _sql_route_stats.setdefault(endpoint, {
+            'requests': 0, 'queries': 0, 'db_time': 0.0, 'max_queries': 0,
+            'n_plus_one_requests': 0, 'n_plus_one': Counter(),
+        })
+        route['requests'] += 1
+        route['queries'] += count
+        route['db_time'] += db_time
+        route['max_queries'] = max(route['max_queries'], count)
+        if repeated:
+            route['n_plus_one_requests'] += 1
+            for fp, n in repeated:
+                route['n_plus_one'][fp] = max(route['n_plus_one'][fp], n)
+
+    if current_app.config['SQL_STATS_HEADERS']:
+        response.headers['X-DB-Queries'] = str(count)
+        response.headers['X-DB-Time-Ms'] = f'{db_time * 1000:.2f}'
+    return response
+
+
+def sql_route_report():
+    """按路由汇总的 SQL 统计（按平均语句数倒序）"""
+    with _sql_stats_lock:
+        routes = []
+        for endpoint, s in _sql_route_stats.items():
+            routes.append({
+                'endpoint': endpoint,
+                'requests': s['requests'],
+                'avg_queries': s['queries'] / s['requests'],
+                'max_queries': s['max_queries'],
+                'avg_db_ms': s['db_time'] / s['requests'] * 1000,
+                'n_plus_one_requests': s['n_plus_one_requests'],
+                'n_plus_one': s['n_plus_one'].most_common(5),
+            })
+        slow = list(_sql_slow_log)
+    routes.sort(key=lambda r: r['avg_queries'], reverse=True)
+    return routes, slow
+
+
+# ====================== 运行监控：指标快照与 Prometheus 输出 ======================
+def pool_metrics_snapshot():
+    """连接池统计快照（计数器 + 当前池状态）"""
+    with _pool_metrics_lock:
+        data = dict(_pool_metrics)
+        data['wait_buckets'] = list(_pool_metrics['wait_buckets'])
+
+    pool = db.engine.pool
+    data['pool_class'] = type(pool).__name__
+    data['pool_size'] = data['checked_out'] = data['checked_in'] = data['overflow'] = data['capacity'] = 0
+    if isinstance(pool, QueuePool):
+        data['pool_size'] = pool.size()
+        data['checked_out'] = pool.checkedout()
+        data['checked_in'] = pool.checkedin()
+        data['overflow'] = max(0, pool.overflow())
+        data['capacity'] = pool.size() + current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].get('max_overflow', 0)
+
+    capacity = data['capacity'] or 1
+    data['saturation'] = data['checked_out'] / capacity
+    data['peak_saturation'] = data['peak_in_use'] / capacity
+    data['wait_avg'] = data['wait_sum'] / data['wait_count'] if data['wait_count'] else 0.0
+    return data
+
+
+def _prometheus_metric(lines, name, kind, help_text, samples, suffix=''):
+    """
+    追加一个指标的 Prometheus 文本格式，samples 为 [(标签字符串, 值)]
+    HELP / TYPE 用基础名；suffix 只加在样本行上（如直方图的 '_bucket'）
+    """
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for labels, value in samples:
+        lines.append(f'{name}{suffix}{labels} {value}')
+
+
+def pool_metrics_prometheus(data):
+    lines = []
+    _prometheus_metric(lines, 'ershou_db_pool_size', 'gauge', '连接池常驻连接数', [('', data['pool_size'])])
+    _prometheus_metric(lines, 'ershou_db_pool_capacity', 'gauge', '连接池容量（含 overflow）', [('', data['capacity'])])
+    _prometheus_metric(lines, 'ershou_db_pool_checked_out', 'gauge', '当前借出连接数', [('', data['checked_out'])])
+    _prometheus_metric(lines, 'ershou_db_pool_overflow', 'gauge', '当前 overflow 连接数', [('', data['overflow'])])
+    _prometheus_metric(lines, 'ershou_db_pool_saturation', 'gauge', '借出数 / 容量', [('', round(data['saturation'], 4))])
+    _prometheus_metric(lines, 'ershou_db_pool_connects_total', 'counter', '新建物理连接次数', [('', data['connects'])])
+    _prometheus_metric(lines, 'ershou_db_pool_checkouts_total', 'counter', '取出连接次数', [('', data['checkouts'])])
+    _prometheus_metric(lines, 'ershou_db_pool_timeouts_total', 'counter', '取连接超时次数', [('', data['timeouts'])])
+    _prometheus_metric(lines, 'ershou_db_pool_invalidations_total', 'counter', '连接失效次数',
+                       [('{kind="hard"}', data['invalidations']), ('{kind="soft"}', data['soft_invalidations'])])
+
+    buckets, cumulative = [], 0
+    for bound, count in zip(POOL_WAIT_BUCKETS, data['wait_buckets']):
+        cumulative += count
+        buckets.append((f'{{le="{bound}"}}', cumulative))
+    buckets.append(('{le="+Inf"}', data['wait_count']))
+    _prometheus_metric(lines, 'ershou_db_pool_wait_seconds', 'histogram', '取连接等待时间', buckets, suffix='_bucket')
+    lines.append(f"ershou_db_pool_wait_seconds_sum {data['wait_sum']:.6f}")
+    lines.append(f"ershou_db_pool_wait_seconds_count {data['wait_count']}")
+    return lines
+
+
+def init_app(app):
+    app.after_request(collect_sql_stats)
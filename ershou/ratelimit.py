@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+写接口限流：滑动窗口计数，按用户或按 IP 限制，超出直接返回 429，不再碰数据库
+默认进程内计数（每个 worker 各自一份）；配置了 REDIS_URL 时用 Redis 有序集合在所有 worker 间共享，
+Redis 出错时自动退回进程内计数。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+
+from .extensions import get_redis
+
+
+# ====================== 滑动窗口计数 ======================
+RATELIMIT_KEY_PREFIX = 'ershou:rl:'
+RATELIMIT_MAX_KEYS = 100000   # 进程内最多跟踪的键数（LRU 淘汰最久未访问的）
+
+# 键：'名称:维度:标识' → 值：窗口内每次请求的时间戳
+_windows = OrderedDict()
+_windows_lock = threading.Lock()
+
+
+def _hit_memory(key, limit, window, now):
+    with _windows_lock:
+        hits = _windows.get(key)
+        if hits is None:
+            hits = _windows[key] = deque()
+        _windows.move_to_end(key)
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if len(hits) >= limit:
+            return False, hits[0] + window - now
+        hits.append(now)
+        while len(_windows) > RATELIMIT_MAX_KEYS:
+            _windows.popitem(last=False)
+    return True, 0
+
+
+def _hit_redis(r, key, limit, window, now):
+    """先记一笔再数：超限则撤回这一笔，多个 worker 并发时也不会多放行"""
+    key = RATELIMIT_KEY_PREFIX + key
+    member = f'{now}:{uuid.uuid4().hex[:8]}'
+    pipe = r.pipeline()
+    pipe.zremrangebyscore(key, 0, now - window)
+    pipe.zadd(key, {member: now})
+    pipe.zcard(key)
+    pipe.zrange(key, 0, 0, withscores=True)
+    pipe.expire(key, int(window) + 1)
+    _, _, count, oldest, _ = pipe.execute()
+    if count > limit:
+        r.zrem(key, member)
+        return False, max(oldest[0][1] + window - now, 0) if oldest else window
+    return True, 0
+
+
+def hit(key, limit, window):
+    """
+    记录一次访问
+    :param key: 计数键，如 'comment:user:123'
+    :param limit: 窗口内允许的次数
+    :param window: 窗口长度（秒）
+    :return: (是否放行, 还需等待的秒数)
+    """
+    now = time.time()
+    r = get_redis() if current_app.config['RATELIMIT_BACKEND'] != 'memory' else None
+    if r is not None:
+        try:
+            return _hit_redis(r, key, limit, window, now)
+        except Exception as e:
+            print("【限流 Redis 失败，改用进程内计数】", str(e))
+    return _hit_memory(key, limit, window, now)
+
+
+def reset(key=None):
+    """清空计数（key 为空时清空全部进程内计数）"""
+    with _windows_lock:
+        if key is None:
+            _windows.clear()
+        else:
+            _windows.pop(key, None)
+
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def too_many_requests(retry_after, msg='操作太频繁，请稍后再试'):
+    resp = jsonify(code=429, msg=msg)
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return resp
+
+
+# ====================== 限流装饰器 ======================
+def rate_limit(name, limit, window, per='user', methods=('POST',), msg='操作太频繁，请稍后再试'):
+    """
+    路由限流装饰器，放在 @bp.route 之后、@login_required 之前：
+    先按 session 里的 user_id 限流再鉴权，超出的请求不会走到任何查库的逻辑
+    :param name: 限流规则名，不同接口各自计数
+    :param per: 'user' 按登录用户（未登录时按 IP），'ip' 按客户端 IP
+    :param methods: 只对这些请求方法计数（登录页 GET 不限）
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if current_app.config['RATELIMIT_ENABLED'] and request.method in methods:
+                uid = session.get('user_id') if per == 'user' else None
+                key = f'{name}:user:{uid}' if uid else f'{name}:ip:{client_ip()}'
+                allowed, retry_after = hit(key, limit, window)
+                if not allowed:
+                    return too_many_requests(retry_after, msg)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
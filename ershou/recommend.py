@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+“猜你喜欢”：离线计算商品之间的相似度（物品协同过滤），在线只查预计算好的邻居表
+离线任务：flask --app app recommend（建议 crontab 每天凌晨跑一次，依赖 NumPy + SciPy）
+"""
+import datetime
+
+from .extensions import db
+
+try:
+    import numpy as np  # 可选依赖：pip install numpy scipy
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+# ====================== 离线计算：物品共现相似度 ======================
+# 用户 × 商品的行为矩阵 R（收藏 / 想要 / 已支付订单按权重计分），R.T @ R 得到商品两两的共现强度，
+# 再按余弦归一化（除以各自行为量的平方根），避免热门商品和谁都“相似”。
+# 每件商品只保留分数最高的前 N 个邻居写入 goods_recommend，页面展示时按名次直接取。
+REC_WEIGHTS = {1: 1.0, 2: 2.0}   # user_interaction.type → 权重（1收藏 2想要）
+REC_ORDER_WEIGHT = 3.0           # 已支付订单的权重
+REC_MAX_WEIGHT = 5.0             # 同一用户对同一商品的多种行为累加后的上限
+REC_TOP_N = 20                   # 每件商品保留的邻居数
+REC_MIN_SCORE = 0.01             # 低于此分数的邻居不保存
+REC_INSERT_CHUNK = 2000          # 写入时每条多行 INSERT 的行数
+
+REC_DETAIL_LIMIT = 8             # 详情页展示条数
+REC_HOME_LIMIT = 12              # 首页展示条数
+REC_HOME_SEEDS = 20              # 首页按用户最近多少次行为来推荐
+
+REC_GOODS_SQL = """
+    SELECT g.goods_id, g.title, g.price, g.degree, g.favor_num, g.view_num, g.is_batch,
+           u.nickname AS user_nickname,
+           gi.url AS cover_img
+    FROM {source}
+    JOIN goods g ON g.goods_id = r.rec_goods_id
+    LEFT JOIN user u ON g.user_id = u.user_id
+    LEFT JOIN goods_image gi ON gi.goods_id = g.goods_id AND gi.sort = 0
+    WHERE g.status = 1 {where}
+    ORDER BY {order}
+    LIMIT :limit
+"""
+DEFAULT_COVER = '/static/avatars/goodspictures/default.jpg'
+
+
+def recommend_available():
+    return np is not None
+
+
+def _load_behaviors(since):
+    """读取行为数据 → (用户 ID 数组, 商品 ID 数组, 权重数组)"""
+    params = {'since': since}
+    users, items, weights = [], [], []
+    rows = db.session.execute(db.text("""
+        SELECT user_id, goods_id, type FROM user_interaction
+        WHERE type IN :types AND (:since IS NULL OR created_at >= :since)
+    """).bindparams(db.bindparam('types', expanding=True)),
+        {**params, 'types': list(REC_WEIGHTS)}).fetchall()
+    for uid, gid, t in rows:
+        users.append(uid)
+        items.append(gid)
+        weights.append(REC_WEIGHTS[t])
+
+    rows = db.session.execute(db.text("""
+        SELECT buyer_id, goods_id FROM `order`
+        WHERE pay_status IN (1, 2) AND (:since IS NULL OR created_at >= :since)
+    """), params).fetchall()
+    for uid, gid in rows:
+        users.append(uid)
+        items.append(gid)
+        weights.append(REC_ORDER_WEIGHT)
+
+    return (np.asarray(users, dtype=np.int64), np.asarray(items, dtype=np.int64),
+            np.asarray(weights, dtype=np.float64))
+
+
+def compute_neighbors(users, items, weights, top_n=REC_TOP_N, min_score=REC_MIN_SCORE):
+    """
+    稀疏矩阵计算商品相似度
+    :return: [(goods_id, 名次, 邻居 goods_id, 分数)]
+    """
+    if len(users) == 0:
+        return []
+    user_ids, u_idx = np.unique(users, return_inverse=True)
+    goods_ids, g_idx = np.unique(items, return_inverse=True)
+
+    # 重复的 (用户, 商品) 会在转 CSR 时自动相加
+    R = sparse.coo_matrix((weights, (u_idx, g_idx)), shape=(len(user_ids), len(goods_ids))).tocsr()
+    R.data = np.minimum(R.data, REC_MAX_WEIGHT)
+
+    C = (R.T @ R).tocsr()
+    norms = np.sqrt(C.diagonal())
+    norms[norms == 0] = 1
+    inv = sparse.diags(1.0 / norms)
+    S = (inv @ C @ inv).tocsr()
+    S.setdiag(0)
+    S.eliminate_zeros()
+
+    result = []
+    indptr, indices, data = S.indptr, S.indices, S.data
+    for i in range(S.shape[0]):
+        start, end = indptr[i], indptr[i + 1]
+        if start == end:
+            continue
+        scores = data[start:end]
+        cols = indices[start:end]
+        if len(scores) > top_n:
+            part = np.argpartition(-scores, top_n - 1)[:top_n]
+            scores, cols = scores[part], cols[part]
+        order = np.lexsort((goods_ids[cols], -scores))  # 分数倒序，同分按商品 ID
+        rank = 0
+        for j in order:
+            if scores[j] < min_score:
+                break
+            rank += 1
+            result.append((int(goods_ids[i]), rank, int(goods_ids[cols[j]]), round(float(scores[j]), 6)))
+    return result
+
+
+def build_recommendations(days=None, top_n=REC_TOP_N):
+    """
+    全量重算并替换 goods_recommend（同一事务内先删后插，读者看到的要么是旧表要么是新表）
+    :param days: 只统计最近多少天的行为，None 表示全部
+    :return: (参与计算的行为数, 写入的邻居行数)
+    """
+    since = datetime.datetime.now() - datetime.timedelta(days=days) if days else None
+    users, items, weights = _load_behaviors(since)
+    rows = compute_neighbors(users, items, weights, top_n=top_n)
+
+    try:
+        db.session.execute(db.text("DELETE FROM goods_recommend"))
+        for i in range(0, len(rows), REC_INSERT_CHUNK):
+            chunk = rows[i:i + REC_INSERT_CHUNK]
+            db.session.execute(db.text("""
+                INSERT INTO goods_recommend (goods_id, rank_no, rec_goods_id, score)
+                VALUES (:goods_id, :rank_no, :rec_goods_id, :score)
+            """), [{'goods_id': g, 'rank_no': r, 'rec_goods_id': rg, 'score': s} for g, r, rg, s in chunk])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(users), len(rows)
+
+
+# ====================== 在线读取 ======================
+def _process(rows):
+    result = [dict(row._mapping) for row in rows]
+    for item in result:
+        item['cover_img'] = item['cover_img'] or DEFAULT_COVER
+        item['user_nickname'] = item['user_nickname'] or '未知用户'
+    return result
+
+
+def get_similar_goods(goods_id, limit=REC_DETAIL_LIMIT):
+    """详情页“猜你喜欢”：该商品预计算的邻居里仍在售的前几件"""
+    try:
+        rows = db.session.execute(db.text(REC_GOODS_SQL.format(
+            source="goods_recommend r",
+            where="AND r.goods_id = :gid",
+            order="r.rank_no",
+        )), {'gid': goods_id, 'limit': limit}).fetchall()
+    except Exception as e:
+        print("【读取相似商品失败】", str(e))
+        return []
+    return _process(rows)
+
+
+def get_guess_goods(user_id, limit=REC_HOME_LIMIT):
+    """
+    首页“猜你喜欢”：取用户最近收藏 / 想要 / 买过的商品作为种子，
+    把各种子的邻居分数相加排序，排除种子本身和自己发布的商品
+    """
+    try:
+        seeds = db.session.execute(db.text("""
+            SELECT goods_id FROM (
+                SELECT goods_id, created_at FROM user_interaction
+                WHERE user_id = :uid AND type IN (1, 2)
+                UNION ALL
+                SELECT goods_id, created_at FROM `order`
+                WHERE buyer_id = :uid AND pay_status IN (1, 2)
+            ) t
+            ORDER BY created_at DESC
+            LIMIT :n
+        """), {'uid': user_id, 'n': REC_HOME_SEEDS}).scalars().all()
+        if not seeds:
+            return []
+        seeds = list(dict.fromkeys(seeds))
+        rows = db.session.execute(db.text(REC_GOODS_SQL.format(
+            source="""(
+                SELECT rec_goods_id, SUM(score) AS rec_score FROM goods_recommend
+                WHERE goods_id IN :seeds
+                GROUP BY rec_goods_id
+            ) r""",
+            where="AND g.user_id != :uid AND g.goods_id NOT IN :seeds",
+            order="r.rec_score DESC, g.goods_id DESC",
+        )).bindparams(db.bindparam('seeds', expanding=True)),
+            {'uid': user_id, 'seeds': seeds, 'limit': limit}).fetchall()
+    except Exception as e:
+        print("【读取猜你喜欢失败】", str(e))
+        return []
+    return _process(rows)
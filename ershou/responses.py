@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+接口响应：JSON 序列化与按 Accept-Encoding 协商压缩
+"""
+import gzip
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # 可选依赖：pip install orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # 可选依赖：pip install brotli
+except ImportError:
+    brotli = None
+
+
+# ====================== JSON 序列化 & 响应压缩 ======================
+# 装了 orjson 就用它替换标准库做序列化（JSON_BACKEND=std 可关闭），并在 after_request 里
+# 按 Accept-Encoding 协商 br / gzip，对超过阈值的响应压缩。
+# 输出格式与 Flask 默认保持一致：Decimal → 字符串，datetime / date → RFC 822（http_date），
+# 需要数字或其他时间格式的接口照旧自己转换。唯二的差别都不改变解析后的值：
+#   - 中文不再转义成 \uXXXX（响应体更小，orjson 本身也不支持转义）
+#   - 键按插入顺序输出，不再排序（orjson 不排序，两种后端输出一致）
+COMPACT_SEPARATORS = (',', ':')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """接口统一 JSON 序列化：格式同 Flask 默认，有 orjson 时用 orjson 加速"""
+    ensure_ascii = False
+    sort_keys = False
+
+    def use_orjson(self):
+        return orjson is not None and self._app.config.get('JSON_BACKEND') != 'std'
+
+    def dumps(self, obj, **kwargs):
+        # response() 在非调试模式下只传 separators=(',', ':')，与 orjson 的紧凑输出一致；
+        # 带缩进等其他参数时退回标准库
+        if self.use_orjson() and kwargs.keys() <= {'separators'} \
+                and kwargs.get('separators', COMPACT_SEPARATORS) == COMPACT_SEPARATORS:
+            return orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson() and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+
+def _negotiate_encoding():
+    """根据 Accept-Encoding 选择压缩算法，优先 br"""
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality('br') > 0:
+        return 'br'
+    if accept.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """对体积超过阈值的 JSON 响应做协商压缩"""
+    if (response.direct_passthrough
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in current_app.config['COMPRESS_MIMETYPES']):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = _negotiate_encoding()
+    if encoding == 'br':
+        data = brotli.compress(data, quality=current_app.config['COMPRESS_BR_LEVEL'])
+    elif encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL'])
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
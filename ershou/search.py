@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+搜索联想：在售商品标题的前缀索引（有序数组 + 二分查找），按热度排序返回候选
+"""
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from flask import current_app
+
+from .caches import get_category_catalog
+from .extensions import db, get_redis
+
+
+# ====================== 搜索联想：前缀索引 ======================
+# 首页搜索框只能整词提交再 LIKE 全表扫描。这里在进程内维护一个有序数组 [(索引键, goods_id)]，
+# 输入前缀二分定位后顺序扫描即可拿到候选，再按热度取前几条，整个过程不查库。
+# 索引键只有整个标题和标题里的每个词（英文/数字词、连续的中文片段），不为中文逐字建后缀，
+# 每个商品只占几项，内存随商品数线性增长。
+# 有序数组只在后台线程全量构建时生成，请求线程从不同步查全表、也不在数组中间插删：
+# 发布 / 编辑 / 上下架 / 售罄记在 pending 里（查询时一并扫描），攒多了或到期再全量重建。
+# 多 worker：配置了 Redis 时每次变更把共享版本号加一，其他 worker 几秒内发现版本变化即后台重建；
+# 没有 Redis 时各 worker 只能靠缩短重建周期追上其他 worker 的变更。
+SUGGEST_KEY_LEN = 16                  # 索引键最长字符数（更长的输入只按前 16 个字匹配）
+SUGGEST_SCAN_LIMIT = 3000             # 每次查询最多扫描的索引项
+SUGGEST_REBUILD_INTERVAL = 600        # 全量重建周期（秒），热度随浏览收藏变化，靠重建校正
+SUGGEST_LOCAL_REBUILD_INTERVAL = 60   # 没有 Redis 共享版本号时的重建周期（秒）
+SUGGEST_VERSION_CHECK_INTERVAL = 5    # 检查共享版本号的间隔（秒）
+SUGGEST_PENDING_MAX = 500             # pending 超过这个数就提前重建
+SUGGEST_LIMIT = 8                     # 默认返回的商品候选数
+SUGGEST_VERSION_KEY = 'ershou:suggest:version'
+
+HOT_SCORE_SQL = "(favor_num * 5 + wish_num * 3 + view_num + sold_num * 10)"  # 与首页 / 列表的热度公式一致
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+|[\u4e00-\u9fff]+')
+
+_suggest_index = {
+    'entries': [],      # 有序的 (索引键, goods_id)，只在全量构建时整体替换
+    'docs': {},         # goods_id → (标题, 热度, 索引键集合)，与 entries 同一次构建
+    'pending': {},      # 构建之后的变更：goods_id → (序号, (标题, 热度, 索引键集合) 或 None 表示已下架)
+    'seq': 0,           # pending 序号，构建期间发生的变更在构建完成后保留
+    'version': 0,       # 上次构建时读到的共享版本号
+    'built_at': 0,      # 上次全量构建时间
+    'checked_at': 0,    # 上次检查共享版本号的时间
+    'building': False,  # 后台构建进行中
+}
+_suggest_lock = threading.Lock()
+
+
+def normalize_query(text):
+    return re.sub(r'\s+', ' ', (text or '').strip().lower())
+
+
+def _index_keys(title):
+    text = normalize_query(title)
+    keys = {text[:SUGGEST_KEY_LEN]}
+    keys.update(m.group()[:SUGGEST_KEY_LEN] for m in _TOKEN_RE.finditer(text))
+    keys.discard('')
+    return keys
+
+
+def _load_docs():
+    rows = db.session.execute(db.text(
+        f"SELECT goods_id, title, {HOT_SCORE_SQL} AS hot FROM goods WHERE status = 1"
+    )).fetchall()
+    docs = {}
+    for gid, title, hot in rows:
+        docs[gid] = (title, hot or 0, _index_keys(title))
+    entries = sorted((key, gid) for gid, doc in docs.items() for key in doc[2])
+    return docs, entries
+
+
+# ====================== 共享版本号（Redis） ======================
+def _shared_version():
+    """读取共享版本号；没有 Redis 或读取失败返回 None"""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return int(r.get(SUGGEST_VERSION_KEY) or 0)
+    except Exception as e:
+        print("【读取搜索联想版本号失败】", str(e))
+        return None
+
+
+def _publish_change():
+    """本 worker 改了索引后通知其他 worker；自己已经记在 pending 里，不必因此重建"""
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        version = r.incr(SUGGEST_VERSION_KEY)
+    except Exception as e:
+        print("【更新搜索联想版本号失败】", str(e))
+        return
+    with _suggest_lock:
+        if _suggest_index['version'] == version - 1:
+            _suggest_index['version'] = version
+
+
+def _shared_changed(now):
+    if now - _suggest_index['checked_at'] < SUGGEST_VERSION_CHECK_INTERVAL:
+        return False
+    _suggest_index['checked_at'] = now
+    version = _shared_version()
+    return version is not None and version != _suggest_index['version']
+
+
+# ====================== 构建 ======================
+def rebuild_suggest_index():
+    """从数据库全量重建索引（在请求外或后台线程里调用）"""
+    with _suggest_lock:
+        start_seq = _suggest_index['seq']
+    version = _shared_version()  # 先读版本号再查库：查库之后的变更会让下一次检查再重建
+    docs, entries = _load_docs()
+    with _suggest_lock:
+        _suggest_index['docs'] = docs
+        _suggest_index['entries'] = entries
+        _suggest_index['pending'] = {gid: p for gid, p in _suggest_index['pending'].items() if p[0] > start_seq}
+        _suggest_index['version'] = version or 0
+        _suggest_index['built_at'] = _suggest_index['checked_at'] = time.time()
+        _suggest_index['building'] = False
+
+
+def _rebuild_in_background(app):
+    with app.app_context():
+        try:
+            rebuild_suggest_index()
+        except Exception as e:
+            _suggest_index['building'] = False
+            print("【搜索联想索引重建失败】", str(e))
+
+
+def _start_rebuild():
+    """在后台线程重建；已有重建在进行时直接返回"""
+    with _suggest_lock:
+        if _suggest_index['building']:
+            return
+        _suggest_index['building'] = True
+    app = current_app._get_current_object()
+    threading.Thread(target=_rebuild_in_background, args=(app,), daemon=True).start()
+
+
+def ensure_suggest_index():
+    """未构建、过期或其他 worker 有变更时在后台重建，期间继续使用旧索引（首次构建完成前没有商品候选）"""
+    now = time.time()
+    built_at = _suggest_index['built_at']
+    interval = SUGGEST_REBUILD_INTERVAL if get_redis() is not None else SUGGEST_LOCAL_REBUILD_INTERVAL
+    if built_at and now - built_at < interval and not _shared_changed(now):
+        return
+    _start_rebuild()
+
+
+# ====================== 增量变更 ======================
+def _current_doc(gid):
+    if gid in _suggest_index['pending']:
+        return _suggest_index['pending'][gid][1]
+    return _suggest_index['docs'].get(gid)
+
+
+def _set_pending(goods_id, doc):
+    """记一笔变更；索引还没开始构建时忽略（构建时会全量加载）"""
+    overflow = False
+    with _suggest_lock:
+        tracking = bool(_suggest_index['built_at'] or _suggest_index['building'])
+        if tracking:
+            if doc is not None and doc[1] is None:
+                old = _current_doc(goods_id)
+                doc = (doc[0], old[1] if old else 0, doc[2])
+            _suggest_index['seq'] += 1
+            _suggest_index['pending'][goods_id] = (_suggest_index['seq'], doc)
+            overflow = len(_suggest_index['pending']) > SUGGEST_PENDING_MAX
+    _publish_change()
+    if overflow:
+        _start_rebuild()
+
+
+def suggest_upsert(goods_id, title, hot=None):
+    """商品上架 / 改标题后调用（hot 为空时沿用原热度）"""
+    _set_pending(goods_id, (title, hot, _index_keys(title)))
+
+
+def suggest_remove(goods_id):
+    """商品下架 / 售罄 / 删除后调用"""
+    _set_pending(goods_id, None)
+
+
+def suggest_refresh(goods_id):
+    """只知道商品 ID 时（如按 ID 改状态、支付后售罄），按数据库当前状态更新索引"""
+    if not (_suggest_index['built_at'] or _suggest_index['building']):
+        _publish_change()
+        return
+    row = db.session.execute(db.text(
+        f"SELECT title, status, {HOT_SCORE_SQL} AS hot FROM goods WHERE goods_id = :gid"
+    ), {'gid': goods_id}).first()
+    if row and row.status == 1:
+        suggest_upsert(goods_id, row.title, row.hot or 0)
+    else:
+        suggest_remove(goods_id)
+
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    """
+    返回联想候选
+    :return: (分类列表 [CategoryItem], 商品列表 [(goods_id, 标题)])，商品按热度倒序、标题去重
+    """
+    q = normalize_query(query)[:SUGGEST_KEY_LEN]
+    if not q:
+        return [], []
+    ensure_suggest_index()
+
+    with _suggest_lock:
+        entries = _suggest_index['entries']
+        docs = _suggest_index['docs']
+        pending = _suggest_index['pending']
+        i = bisect.bisect_left(entries, (q,))
+        end = min(len(entries), i + SUGGEST_SCAN_LIMIT)
+        candidates = {}
+        while i < end and entries[i][0].startswith(q):
+            gid = entries[i][1]
+            if gid not in pending:
+                candidates[gid] = docs[gid]
+            i += 1
+        for gid, (_, doc) in pending.items():
+            if doc is not None and any(key.startswith(q) for key in doc[2]):
+                candidates[gid] = doc
+        ranked = heapq.nlargest(limit * 3, ((doc[1], gid, doc[0]) for gid, doc in candidates.items()))
+
+    items, seen = [], set()
+    for _, gid, title in ranked:
+        if title not in seen:
+            seen.add(title)
+            items.append((gid, title))
+            if len(items) >= limit:
+                break
+
+    categories = [c for c in get_category_catalog()['enabled'] if q in c.name.lower()]
+    return categories, items
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+个人中心统计：每个用户一行计数（发布商品数 / 购买订单数 / 收藏数 / 想要数），
+由发布、下单、收藏想要等写操作在同一事务里增减，个人中心直接读这一行，不再每次 COUNT 四张表。
+校正：flask --app app rebuild-user-stats（从源表整体重算，建议 crontab 每天跑一次）
+"""
+from .extensions import db
+
+
+# ====================== 计数维护 ======================
+# 只 UPDATE 已有行，不在写路径上建行：还没有计数行的用户第一次打开个人中心时从源表算一次再插入，
+# 这样写路径不会和首次初始化互相覆盖。计数只会因为并发的首次初始化偶尔差一两个，由重算命令校正。
+USER_STATS_FIELDS = ('goods_num', 'order_num', 'favor_num', 'wish_num')
+INTERACTION_STATS_FIELDS = {1: 'favor_num', 2: 'wish_num'}   # user_interaction.type → 计数列
+
+USER_STATS_REBUILD_SQL = """
+    INSERT INTO user_stats (user_id, goods_num, order_num, favor_num, wish_num)
+    SELECT u.user_id, COALESCE(g.n, 0), COALESCE(o.n, 0), COALESCE(i.favor, 0), COALESCE(i.wish, 0)
+    FROM user u
+    LEFT JOIN (SELECT user_id, COUNT(*) AS n FROM goods {where} GROUP BY user_id) g
+           ON g.user_id = u.user_id
+    LEFT JOIN (SELECT buyer_id, COUNT(*) AS n FROM `order` {where_buyer} GROUP BY buyer_id) o
+           ON o.buyer_id = u.user_id
+    LEFT JOIN (SELECT user_id, SUM(type = 1) AS favor, SUM(type = 2) AS wish
+               FROM user_interaction {where} GROUP BY user_id) i
+           ON i.user_id = u.user_id
+    {where_user}
+    ON DUPLICATE KEY UPDATE
+        goods_num = VALUES(goods_num),
+        order_num = VALUES(order_num),
+        favor_num = VALUES(favor_num),
+        wish_num = VALUES(wish_num)
+"""
+
+
+def bump_user_stats(user_id, **deltas):
+    """
+    在调用方的事务里增减计数，由调用方提交
+    用法：bump_user_stats(uid, goods_num=1)、bump_user_stats(uid, favor_num=-1)
+    """
+    fields = [f for f in USER_STATS_FIELDS if deltas.get(f)]
+    if not fields:
+        return
+    sets = ', '.join(f"{f} = GREATEST(0, {f} + :{f})" for f in fields)
+    db.session.execute(db.text(f"UPDATE user_stats SET {sets} WHERE user_id = :uid"),
+                       {'uid': user_id, **{f: deltas[f] for f in fields}})
+
+
+def bump_interaction_stats(goods_ids):
+    """删除商品前调用：级联删除的收藏 / 想要记录对应的用户计数一并扣掉（同一事务）"""
+    db.session.execute(db.text("""
+        UPDATE user_stats s
+        JOIN (
+            SELECT user_id, SUM(type = 1) AS favor, SUM(type = 2) AS wish
+            FROM user_interaction
+            WHERE goods_id IN :ids
+            GROUP BY user_id
+        ) t ON t.user_id = s.user_id
+        SET s.favor_num = GREATEST(0, s.favor_num - t.favor),
+            s.wish_num = GREATEST(0, s.wish_num - t.wish)
+    """).bindparams(db.bindparam('ids', expanding=True)), {'ids': list(goods_ids)})
+
+
+def rebuild_user_stats(user_id=None):
+    """
+    从源表重算计数（INSERT ... SELECT 一条语句整体写入，已有行覆盖）
+    :param user_id: 只重算一个用户，None 表示全部
+    :return: 受影响的行数
+    """
+    if user_id is None:
+        sql = USER_STATS_REBUILD_SQL.format(where='', where_buyer='', where_user='')
+        params = {}
+    else:
+        sql = USER_STATS_REBUILD_SQL.format(where='WHERE user_id = :uid', where_buyer='WHERE buyer_id = :uid',
+                                            where_user='WHERE u.user_id = :uid')
+        params = {'uid': user_id}
+    try:
+        result = db.session.execute(db.text(sql), params)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result.rowcount
+
+
+# ====================== 读取 ======================
+def _count_from_source(user_id):
+    """计数表不可用时的兜底：直接 COUNT 源表"""
+    return db.session.execute(db.text("""
+        SELECT
+            (SELECT COUNT(*) FROM goods WHERE user_id = :uid) AS goods_num,
+            (SELECT COUNT(*) FROM `order` WHERE buyer_id = :uid) AS order_num,
+            (SELECT COUNT(*) FROM user_interaction WHERE user_id = :uid AND type = 1) AS favor_num,
+            (SELECT COUNT(*) FROM user_interaction WHERE user_id = :uid AND type = 2) AS wish_num
+    """), {'uid': user_id}).first()
+
+
+def get_user_stats(user_id):
+    """个人中心统计 → {'goods', 'orders', 'favors', 'wishes'}"""
+    sql = db.text(f"SELECT {', '.join(USER_STATS_FIELDS)} FROM user_stats WHERE user_id = :uid")
+    try:
+        row = db.session.execute(sql, {'uid': user_id}).first()
+        if row is None:
+            rebuild_user_stats(user_id)
+            row = db.session.execute(sql, {'uid': user_id}).first()
+    except Exception as e:
+        db.session.rollback()
+        print("【读取用户统计失败】", str(e))
+        row = None
+    if row is None:
+        row = _count_from_source(user_id)
+    return {
+        'goods': row.goods_num or 0,
+        'orders': row.order_num or 0,
+        'favors': row.favor_num or 0,
+        'wishes': row.wish_num or 0,
+    }
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+业务蓝图：visitor（首页 / 用户）、goods（商品 / 评论 / 举报）、order（订单）、message（消息）、admin（后台）
+各模块在 register_blueprints 里按需导入，import ershou 时不加载任何路由代码
+"""
+import importlib
+
+
+def register_blueprints(app, names):
+    for name in names:
+        module = importlib.import_module(f'{__name__}.{name}')
+        app.register_blueprint(module.bp)
@@ -0,0 +1,936 @@
+# -*- coding: utf-8 -*-
+"""
+管理后台：登录、数据看板、商品 / 用户 / 分类 / 举报 / 订单管理、运行监控
+"""
+import datetime
+from collections import Counter
+
+from flask import Blueprint, current_app, jsonify, redirect, render_template, request, session
+from sqlalchemy import or_
+from werkzeug.security import check_password_hash
+
+from ..audit import AUDIT_COUNTERS, audit, audit_stats
+from ..auth import admin_required, invalidate_user_cache
+from ..caches import bump_category_version, college_hot_changed
+from ..extensions import db, read_only
+from ..models import Category, Order, Report, User, goods, goods_image
+from ..catalog import catalog_goods_removed
+from ..cleanup import schedule_image_cleanup
+from ..search import suggest_remove
+from ..user_stats import bump_interaction_stats, bump_user_stats
+from ..monitoring import (
+    POOL_WAIT_BUCKETS, _prometheus_metric, pool_metrics_prometheus, pool_metrics_snapshot,
+    sql_route_report
+)
+
+bp = Blueprint('admin', __name__)
+
+
+# ====================== 管理员登录 ======================
+@bp.route('/admin')
+def admin_login():
+    return render_template('admin/admin_login.html')
+
+@bp.route('/admin/login', methods=['POST'])
+def admin_login_post():
+    data = request.get_json()
+    account = data.get('account')
+    password = data.get('password')
+
+    user = User.query.filter_by(account=account, is_admin=1).first()
+    if user and check_password_hash(user.password, password):
+        session.clear()  # ← 关键：完全清除旧 session（包括残留的 is_admin）
+        session['user_id'] = user.user_id
+        session['is_admin'] = True
+        session['nickname'] = user.nickname
+
+        # 可选：清除可能残留的普通用户字段（防万一）
+        session.pop('some_other_key', None)
+        return jsonify(code=200, msg='登录成功')
+    return jsonify(code=400, msg='账号或密码错误，或非管理员身份')
+
+@bp.route('/admin/logout')
+def admin_logout():
+    session.clear()
+    return redirect('/admin')
+
+# ====================== 后台首页 - 数据统计看板 ======================
+@bp.route('/admin/dashboard')
+@admin_required
+@read_only
+def admin_dashboard():
+    # 统计数据
+    stats = {}
+
+    # 总GMV（已支付订单金额总和）
+    total_gmv = db.session.execute(db.text("""
+        SELECT COALESCE(SUM(total_amount), 0) FROM `order` WHERE pay_status = 1
+    """)).scalar()
+
+    # 今日交易额
+    today_gmv = db.session.execute(db.text("""
+        SELECT COALESCE(SUM(total_amount), 0) FROM `order` 
+        WHERE pay_status = 1 AND DATE(pay_time) = CURDATE()
+    """)).scalar()
+
+    # 总订单数 / 今日订单数
+    total_orders = db.session.execute(db.text("SELECT COUNT(*) FROM `order`")).scalar()
+    today_orders = db.session.execute(db.text("""
+        SELECT COUNT(*) FROM `order` WHERE DATE(created_at) = CURDATE()
+    """)).scalar()
+
+    # 总用户数 / 今日注册
+    total_users = User.query.count()
+    today_reg = User.query.filter(db.func.DATE(User.reg_time) == datetime.date.today()).count()
+
+    # 毕业生清仓商品数
+    batch_goods = goods.query.filter(goods.is_batch == 1, goods.status == 1).count()
+
+    # 待处理举报数
+    pending_reports = db.session.execute(db.text("""
+        SELECT COUNT(*) FROM report WHERE status = 0
+    """)).scalar()
+
+    stats = {
+        'total_gmv': float(total_gmv),
+        'today_gmv': float(today_gmv),
+        'total_orders': total_orders,
+        'today_orders': today_orders,
+        'total_users': total_users,
+        'today_reg': today_reg,
+        'batch_goods': batch_goods,
+        'pending_reports': pending_reports,
+    }
+
+    return render_template('admin/admin_dashboard.html', stats=stats)
+
+# ====================== 商品管理 ======================
+@bp.route('/admin/goods')
+@admin_required
+def admin_goods():
+    page = request.args.get('page', 1, type=int)
+    per_page = 20
+    keyword = request.args.get('keyword', '').strip()
+
+    # 基础查询：只取 goods 表字段 + 卖家昵称
+    base_query = db.session.query(
+        goods.goods_id,
+        goods.title,
+        goods.price,
+        goods.status,
+        goods.on_shelf_time,
+        User.nickname.label('seller_nick')
+    ).outerjoin(User, goods.user_id == User.user_id)
+
+    if keyword:
+        base_query = base_query.filter(goods.title.ilike(f'%{keyword}%'))
+
+    # 分页
+    pagination = base_query.order_by(goods.goods_id.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False)
+
+    # 手动构造列表，每项是一个字典（模板更易用）
+    goods_list = []
+    for row in pagination.items:
+        goods_list.append({
+            'goods_id': row.goods_id,
+            'title': row.title,
+            'price': float(row.price),
+            'status': row.status,
+            'on_shelf_time': row.on_shelf_time,
+            'seller_nick': row.seller_nick or '未知用户'
+        })
+
+    return render_template(
+        'admin/admin_goods.html',
+        goods=goods_list,          # ← 明确传 goods 列表
+        pagination=pagination,
+        keyword=keyword
+    )
+
+# 批量操作：一条集合式 UPDATE / DELETE 处理所有选中的 ID，缓存与索引在提交后统一更新
+ADMIN_BULK_MAX = 500   # 单次批量操作最多处理的 ID 数
+
+
+def _parse_ids(values):
+    """请求体里的 ID 列表 → 去重后的整数列表；格式不对返回 None"""
+    if not isinstance(values, list) or not values or len(values) > ADMIN_BULK_MAX:
+        return None
+    try:
+        return list(dict.fromkeys(int(v) for v in values))
+    except (TypeError, ValueError):
+        return None
+
+
+def _bulk_goods_action(goods_ids, action):
+    """
+    批量下架 / 删除商品
+    已有订单的商品被 `order` 外键引用，删除会让整批回滚，这类商品跳过不删（可改为下架）
+    :return: (实际处理的商品数, 因有订单跳过删除的商品 ID 列表)
+    """
+    ids_param = db.bindparam('ids', expanding=True)
+    status_filter = " AND status = 1" if action == 'offshelf' else ""
+    targets = db.session.execute(db.text(
+        "SELECT goods_id, user_id FROM goods WHERE goods_id IN :ids" + status_filter
+    ).bindparams(ids_param), {'ids': goods_ids}).fetchall()
+    skipped = []
+    if targets and action == 'delete':
+        ordered = set(db.session.execute(db.text(
+            "SELECT DISTINCT goods_id FROM `order` WHERE goods_id IN :ids"
+        ).bindparams(ids_param), {'ids': [t.goods_id for t in targets]}).scalars().all())
+        skipped = [t.goods_id for t in targets if t.goods_id in ordered]
+        targets = [t for t in targets if t.goods_id not in ordered]
+    if not targets:
+        return 0, skipped
+    target_ids = [t.goods_id for t in targets]
+
+    image_urls = []
+    if action == 'offshelf':
+        db.session.execute(db.text(
+            "UPDATE goods SET status = 0 WHERE goods_id IN :ids AND status = 1"
+        ).bindparams(ids_param), {'ids': target_ids})
+    else:
+        image_urls = db.session.execute(db.text(
+            "SELECT url FROM goods_image WHERE goods_id IN :ids"
+        ).bindparams(ids_param), {'ids': target_ids}).scalars().all()
+        db.session.execute(db.text("DELETE FROM goods_image WHERE goods_id IN :ids").bindparams(ids_param),
+                           {'ids': target_ids})
+        # 商品删除会级联删掉收藏 / 想要记录，先把相关用户的计数扣掉
+        bump_interaction_stats(target_ids)
+        for seller_id, n in Counter(t.user_id for t in targets).items():
+            bump_user_stats(seller_id, goods_num=-n)
+        db.session.execute(db.text("DELETE FROM goods WHERE goods_id IN :ids").bindparams(ids_param),
+                           {'ids': target_ids})
+    db.session.commit()
+
+    sellers = {t.goods_id: t.user_id for t in targets}
+    for gid in target_ids:
+        suggest_remove(gid)
+        catalog_goods_removed(gid)
+        audit(f'admin_goods_{action}', 'goods', gid, f'卖家 {sellers[gid]}')
+    for seller_id in {t.user_id for t in targets}:
+        college_hot_changed(seller_id)
+    if image_urls:
+        schedule_image_cleanup(image_urls)  # 删文件交给后台线程
+    return len(target_ids), skipped
+
+
+@bp.route('/admin/goods/action', methods=['POST'])
+@admin_required
+def admin_goods_action():
+    data = request.get_json()
+    goods_id = data.get('goods_id')
+    action = data.get('action')  # 'offshelf' 或 'delete'
+
+    if not goods_id or action not in ['offshelf', 'delete']:
+        return jsonify(code=400, msg='参数错误')
+
+    goods.query.get_or_404(goods_id)
+
+    try:
+        affected, skipped = _bulk_goods_action([int(goods_id)], action)
+    except Exception as e:
+        db.session.rollback()
+        print("【管理员操作商品失败】", str(e))
+        return jsonify(code=500, msg='操作失败，请重试')
+
+    if skipped:
+        return jsonify(code=400, msg='该商品已有订单，不能删除，可改为下架')
+    return jsonify(code=200, msg='商品已下架' if action == 'offshelf' else '商品已删除')
+
+
+@bp.route('/admin/goods/bulk', methods=['POST'])
+@admin_required
+def admin_goods_bulk():
+    """批量下架 / 删除：{goods_ids: [...], action: 'offshelf' | 'delete'}"""
+    data = request.get_json() or {}
+    goods_ids = _parse_ids(data.get('goods_ids'))
+    action = data.get('action')
+    if goods_ids is None or action not in ('offshelf', 'delete'):
+        return jsonify(code=400, msg=f'参数错误（一次最多 {ADMIN_BULK_MAX} 件）')
+
+    try:
+        affected, skipped = _bulk_goods_action(goods_ids, action)
+    except Exception as e:
+        db.session.rollback()
+        print("【管理员批量操作商品失败】", str(e))
+        return jsonify(code=500, msg='操作失败，请重试')
+
+    verb = '下架' if action == 'offshelf' else '删除'
+    msg = f'已{verb} {affected} 件商品'
+    if skipped:
+        msg += f'，{len(skipped)} 件已有订单未删除（可改为下架）'
+    return jsonify(code=200, msg=msg, affected=affected, skipped=skipped)
+
+# ====================== 用户管理 ======================
+@bp.route('/admin/users')
+@admin_required
+def admin_users():
+    page = request.args.get('page', 1, type=int)
+    keyword = request.args.get('keyword', '').strip()
+
+    query = User.query
+    if keyword:
+        query = query.filter(
+            db.or_(User.account.ilike(f'%{keyword}%'), User.nickname.ilike(f'%{keyword}%'))
+        )
+
+    pagination = query.order_by(User.user_id.desc())\
+        .paginate(page=request.args.get('page', 1, type=int), per_page=20, error_out=False)
+
+    return render_template('admin/admin_users.html', users=pagination.items, pagination=pagination, keyword=keyword)
+
+def _bulk_set_user_status(user_ids, ban):
+    """批量封禁 / 解封（管理员账号不受影响），返回实际变更的用户数"""
+    ids_param = db.bindparam('ids', expanding=True)
+    params = {'ids': user_ids, 'status': 0 if ban else 1}
+    changed = db.session.execute(db.text(
+        "SELECT user_id FROM user WHERE user_id IN :ids AND is_admin = 0 AND status != :status"
+    ).bindparams(ids_param), params).scalars().all()
+    if not changed:
+        return 0
+    db.session.execute(db.text(
+        "UPDATE user SET status = :status WHERE user_id IN :ids AND is_admin = 0"
+    ).bindparams(ids_param), {**params, 'ids': changed})
+    db.session.commit()
+    for uid in changed:
+        invalidate_user_cache(uid)
+        audit('admin_user_ban' if ban else 'admin_user_unban', 'user', uid)
+    return len(changed)
+
+
+@bp.route('/admin/user/ban', methods=['POST'])
+@admin_required
+def admin_user_ban():
+    data = request.get_json()
+    user_id = data['user_id']
+    ban = data['ban']  # True=封禁 False=解封
+
+    user = User.query.get_or_404(user_id)
+    if user.is_admin:
+        return jsonify(code=403, msg='不能封禁或解封管理员账号')
+
+    try:
+        affected = _bulk_set_user_status([user.user_id], bool(ban))
+    except Exception as e:
+        db.session.rollback()
+        print("【管理员封禁用户失败】", str(e))
+        return jsonify(code=500, msg='操作失败，请重试')
+    if not affected:
+        return jsonify(code=400, msg='用户已被封禁' if ban else '用户未被封禁', affected=0)
+    return jsonify(code=200, msg='操作成功', affected=affected)
+
+
+@bp.route('/admin/users/bulk_ban', methods=['POST'])
+@admin_required
+def admin_users_bulk_ban():
+    """批量封禁 / 解封：{user_ids: [...], ban: true | false}"""
+    data = request.get_json() or {}
+    user_ids = _parse_ids(data.get('user_ids'))
+    if user_ids is None:
+        return jsonify(code=400, msg=f'参数错误（一次最多 {ADMIN_BULK_MAX} 人）')
+    ban = bool(data.get('ban'))
+
+    try:
+        affected = _bulk_set_user_status(user_ids, ban)
+    except Exception as e:
+        db.session.rollback()
+        print("【管理员批量封禁失败】", str(e))
+        return jsonify(code=500, msg='操作失败，请重试')
+    return jsonify(code=200, msg=f"已{'封禁' if ban else '解封'} {affected} 个用户", affected=affected)
+
+# ====================== 分类管理 ======================
+@bp.route('/admin/categories')
+@admin_required
+def admin_categories():
+    categories = Category.query.order_by(Category.sort).all()
+    return render_template('admin/admin_categories.html', categories=categories)
+
+@bp.route('/admin/category', methods=['POST'])
+@admin_required
+def admin_category_action():
+    data = request.get_json()
+    action = data['action']
+    if action == 'add':
+        cat = Category(name=data['name'], sort=data.get('sort', 0), enabled=1)
+        db.session.add(cat)
+    elif action == 'edit':
+        cat = Category.query.get(data['cate_id'])
+        cat.name = data['name']
+        cat.sort = data['sort']
+        cat.enabled = data['enabled']
+    elif action == 'delete':
+        cat = Category.query.get(data['cate_id'])
+        db.session.delete(cat)
+    db.session.flush()  # 新增分类在提交前拿到 ID，提交后不必再查库
+    cate_id = data['cate_id'] if action == 'delete' else cat.cate_id
+    db.session.commit()
+    bump_category_version()
+    audit(f'admin_category_{action}', 'category', cate_id, data.get('name', ''))
+    return jsonify(code=200, msg='操作成功')
+
+# ====================== 举报管理 ======================
+@bp.route('/admin/reports')
+@admin_required
+def admin_reports():
+    page = request.args.get('page', 1, type=int)
+    pagination = db.session.query(Report).order_by(Report.created_at.desc())\
+        .paginate(page=page, per_page=15, error_out=False)
+    return render_template('admin/admin_reports.html', reports=pagination.items, pagination=pagination)
+
+# 举报处理结果通知的发送者（系统通知账号）
+REPORT_NOTICE_SENDER_ID = 45
+REPORT_GROUP_PAGE_SIZE = 15
+
+
+def _report_notice(target_type, target_id, status, goods_offed):
+    target_desc = '商品' if target_type == 'goods' else '用户'
+    if status == 1:
+        content = f"您举报的{target_desc}（ID: {target_id}）已处理，感谢您的反馈！"
+        if goods_offed:
+            content += " 该商品已被下架。"
+        return content
+    return f"您举报的{target_desc}（ID: {target_id}）经审核未发现问题，已忽略。感谢您的关注！"
+
+
+def _off_reported_goods(goods_id):
+    """举报成立时下架商品（不提交），返回卖家 ID；商品不存在或本来就不在售（未改动）时返回 None"""
+    result = db.session.execute(db.text(
+        "UPDATE goods SET status = 0 WHERE goods_id = :gid AND status = 1"
+    ), {'gid': goods_id})
+    if result.rowcount != 1:
+        return None
+    return db.session.execute(db.text(
+        "SELECT user_id FROM goods WHERE goods_id = :gid"
+    ), {'gid': goods_id}).scalar()
+
+
+def _after_goods_offed(goods_id, seller_id):
+    suggest_remove(goods_id)
+    catalog_goods_removed(goods_id)
+    college_hot_changed(seller_id)
+    print(f"【商品下架成功】goods_id={goods_id}")
+
+
+def _insert_report_notices(reporter_ids, content):
+    """给所有举报人各插一条系统通知（一条多行 INSERT，不提交）"""
+    if not reporter_ids:
+        return
+    db.session.execute(db.text("""
+        INSERT INTO message (from_user_id, from_nickname, to_user_id, type, content, is_read)
+        VALUES (:from_id, '系统通知', :to_id, 'system', :content, 0)
+    """), [{'from_id': REPORT_NOTICE_SENDER_ID, 'to_id': uid, 'content': content} for uid in reporter_ids])
+
+
+@bp.route('/admin/report/handle', methods=['POST'])
+@admin_required
+def admin_report_handle():
+    data = request.get_json()
+    report_id = data.get('report_id')
+    status = data.get('status')  # 1=已处理 2=已忽略
+    auto_off_goods = data.get('auto_off_goods', False)
+
+    if not report_id or status not in [1, 2]:
+        return jsonify(code=400, msg='参数错误')
+
+    report = Report.query.get_or_404(report_id)
+
+    # 更新举报状态、下架商品、通知举报人放在同一个事务里
+    try:
+        report.status = status
+        seller_id = None
+        if status == 1 and auto_off_goods and report.target_type == 'goods':
+            seller_id = _off_reported_goods(report.target_id)
+        content = _report_notice(report.target_type, report.target_id, status, seller_id is not None)
+        _insert_report_notices([report.reporter_id], content)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("【举报处理失败】", str(e))
+        return jsonify(code=500, msg='处理失败，请重试')
+
+    if seller_id is not None:
+        _after_goods_offed(report.target_id, seller_id)
+    audit('admin_report_resolve' if status == 1 else 'admin_report_ignore', 'report', report.report_id,
+          f'{report.target_type} {report.target_id}' + ('，已下架' if seller_id is not None else ''))
+    print(f"【举报通知发送成功】发送给用户 {report.reporter_id}: {content}")
+    return jsonify(code=200, msg='处理完成，已通知举报人')
+
+
+# ====================== 举报管理：按目标分组的审核队列 ======================
+# 同一件商品被几百人举报时，逐条处理既慢又重复。分组队列按 (target_type, target_id) 聚合待处理举报，
+# 按举报人数排序；整组处理时一个事务内更新全部举报、下架商品并给每位举报人发通知。
+@bp.route('/admin/reports/grouped')
+@admin_required
+@read_only
+def admin_reports_grouped():
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = REPORT_GROUP_PAGE_SIZE
+
+    total = db.session.execute(db.text("""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM report WHERE status = 0 GROUP BY target_type, target_id
+        ) t
+    """)).scalar() or 0
+    rows = db.session.execute(db.text("""
+        SELECT target_type, target_id,
+               COUNT(*) AS report_count,
+               COUNT(DISTINCT reporter_id) AS reporter_count,
+               GROUP_CONCAT(DISTINCT reason) AS reasons,
+               MIN(created_at) AS first_at,
+               MAX(created_at) AS last_at
+        FROM report
+        WHERE status = 0
+        GROUP BY target_type, target_id
+        ORDER BY reporter_count DESC, last_at DESC
+        LIMIT :limit OFFSET :offset
+    """), {'limit': per_page, 'offset': (page - 1) * per_page}).fetchall()
+    groups = [dict(r._mapping) for r in rows]
+
+    # 目标名称：商品、用户各一次 IN 查询
+    goods_ids = [g['target_id'] for g in groups if g['target_type'] == 'goods']
+    user_ids = [g['target_id'] for g in groups if g['target_type'] == 'user']
+    goods_info, user_info = {}, {}
+    if goods_ids:
+        goods_info = {r.goods_id: r for r in db.session.execute(db.text(
+            "SELECT goods_id, title, status FROM goods WHERE goods_id IN :ids"
+        ).bindparams(db.bindparam('ids', expanding=True)), {'ids': goods_ids})}
+    if user_ids:
+        user_info = {r.user_id: r for r in db.session.execute(db.text(
+            "SELECT user_id, nickname, status FROM user WHERE user_id IN :ids"
+        ).bindparams(db.bindparam('ids', expanding=True)), {'ids': user_ids})}
+    for g in groups:
+        if g['target_type'] == 'goods':
+            target = goods_info.get(g['target_id'])
+            g['target_name'] = target.title if target else '（商品已删除）'
+            g['target_on_shelf'] = bool(target and target.status == 1)
+        else:
+            target = user_info.get(g['target_id'])
+            g['target_name'] = target.nickname if target else '（用户已删除）'
+            g['target_on_shelf'] = False
+
+    pages = (total + per_page - 1) // per_page
+    return render_template('admin/admin_reports_grouped.html', groups=groups, total=total, page=page, pages=pages)
+
+
+@bp.route('/admin/report/group_resolve', methods=['POST'])
+@admin_required
+def admin_report_group_resolve():
+    """整组处理：{target_type, target_id, status: 1 已处理 | 2 已忽略, auto_off_goods}"""
+    data = request.get_json() or {}
+    target_type = data.get('target_type')
+    status = data.get('status')
+    auto_off_goods = bool(data.get('auto_off_goods'))
+    try:
+        target_id = int(data.get('target_id'))
+    except (TypeError, ValueError):
+        target_id = None
+    if target_type not in ('goods', 'user') or not target_id or status not in (1, 2):
+        return jsonify(code=400, msg='参数错误')
+
+    params = {'type': target_type, 'tid': target_id, 'status': status}
+    try:
+        reporter_ids = db.session.execute(db.text("""
+            SELECT DISTINCT reporter_id FROM report
+            WHERE target_type = :type AND target_id = :tid AND status = 0
+        """), params).scalars().all()
+        if not reporter_ids:
+            return jsonify(code=200, msg='该目标没有待处理的举报', affected=0)
+        affected = db.session.execute(db.text("""
+            UPDATE report SET status = :status
+            WHERE target_type = :type AND target_id = :tid AND status = 0
+        """), params).rowcount
+
+        seller_id = None
+        if status == 1 and auto_off_goods and target_type == 'goods':
+            seller_id = _off_reported_goods(target_id)
+        _insert_report_notices(reporter_ids, _report_notice(target_type, target_id, status, seller_id is not None))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("【举报整组处理失败】", str(e))
+        return jsonify(code=500, msg='处理失败，请重试')
+
+    if seller_id is not None:
+        _after_goods_offed(target_id, seller_id)
+    audit('admin_report_group_resolve' if status == 1 else 'admin_report_group_ignore', target_type, target_id,
+          f'{affected} 条举报' + ('，已下架' if seller_id is not None else ''))
+    return jsonify(code=200, msg=f'已处理 {affected} 条举报，已通知 {len(reporter_ids)} 位举报人', affected=affected)
+
+@bp.route('/admin/stats/gmv')
+@admin_required
+@read_only
+def admin_stats_gmv():
+    # 分类销售额
+    cate_sales = db.session.execute(db.text("""
+        SELECT c.name, COALESCE(SUM(o.total_amount), 0) as sales
+        FROM category c
+        LEFT JOIN goods g ON g.cate_id = c.cate_id
+        LEFT JOIN `order` o ON o.goods_id = g.goods_id AND o.pay_status = 1
+        GROUP BY c.cate_id
+        ORDER BY sales DESC
+    """)).fetchall()
+
+    # 每日交易额（最近30天）
+    daily_sales = db.session.execute(db.text("""
+        SELECT DATE(pay_time) as date, COALESCE(SUM(total_amount), 0) as amount
+        FROM `order`
+        WHERE pay_status = 1 AND pay_time >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
+        GROUP BY date
+        ORDER BY date
+    """)).fetchall()
+
+    return render_template('admin/admin_stats_gmv.html', cate_sales=cate_sales, daily_sales=daily_sales)
+
+
+@bp.route('/admin/stats/today_gmv')
+@admin_required
+@read_only
+def admin_stats_today_gmv():
+    hourly_sales = db.session.execute(db.text("""
+        SELECT 
+            HOUR(pay_time) AS hour,
+            COALESCE(SUM(total_amount), 0) AS amount
+        FROM `order`
+        WHERE pay_status = 1 
+          AND DATE(pay_time) = CURDATE()
+        GROUP BY hour
+        ORDER BY hour
+    """)).fetchall()
+
+    hours = [f"{i:02d}:00" for i in range(24)]
+    amounts = [0.0] * 24
+    for row in hourly_sales:
+        amounts[row.hour] = float(row.amount)
+
+    total_today = sum(amounts)
+    current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    return render_template('admin/admin_stats_today_gmv.html', 
+                           hours=hours, 
+                           amounts=amounts, 
+                           total_today=total_today,
+                           current_time=current_time)
+@bp.route('/admin/stats/orders')
+@admin_required
+@read_only
+def admin_stats_orders():
+    # 订单状态分布
+    status_data = db.session.execute(db.text("""
+        SELECT 
+            pay_status,
+            COUNT(*) AS count,
+            COALESCE(SUM(total_amount), 0) AS amount
+        FROM `order`
+        GROUP BY pay_status
+        ORDER BY pay_status
+    """)).fetchall()
+
+    # 状态映射
+    status_map = {0: '待支付', 1: '已支付', 2: '已完成'}
+    labels = []
+    counts = []
+    amounts = []
+    colors = ['#e74c3c', '#f39c12', '#27ae60']  # 红橙绿
+
+    total_orders = 0
+    for row in status_data:
+        status_name = status_map.get(row.pay_status, '未知')
+        labels.append(status_name)
+        counts.append(row.count)
+        amounts.append(float(row.amount))
+        total_orders += row.count
+
+    return render_template('admin/admin_stats_orders.html',
+                           labels=labels,
+                           counts=counts,
+                           amounts=amounts,
+                           colors=colors,
+                           total_orders=total_orders)
+
+# ====================== 订单管理 ======================
+@bp.route('/admin/orders')
+@admin_required
+def admin_orders():
+    page = request.args.get('page', 1, type=int)
+    keyword = request.args.get('keyword', '').strip()
+    per_page = 20
+
+    # 正确定义卖家别名
+    seller = db.aliased(User, name='seller')
+
+    # 查询订单列表，联表获取商品标题、买家信息、卖家信息
+    base_query = db.session.query(
+        Order.order_no,
+        Order.goods_id,
+        Order.total_amount,
+        Order.quantity,
+        Order.pay_status,
+        Order.created_at,
+        goods.title,
+        User.nickname.label('buyer_nick'),
+        User.avatar.label('buyer_avatar'),
+        seller.nickname.label('seller_nick'),
+        seller.avatar.label('seller_avatar')
+    ).join(goods, goods.goods_id == Order.goods_id) \
+     .join(User, User.user_id == Order.buyer_id) \
+     .join(seller, seller.user_id == Order.seller_id)  # 这里用 join 而不是 outerjoin，因为卖家一定存在
+
+    if keyword:
+        base_query = base_query.filter(
+            or_(
+                Order.order_no.ilike(f'%{keyword}%'),
+                goods.title.ilike(f'%{keyword}%')
+            )
+        )
+
+    pagination = base_query.order_by(Order.created_at.desc()) \
+        .paginate(page=page, per_page=per_page, error_out=False)
+
+    # 转换为字典列表，方便模板使用 {{ o.order_no }} 语法
+    orders = [row._asdict() for row in pagination.items]
+
+    return render_template('admin/admin_orders.html',
+                           orders=orders,
+                           pagination=pagination,
+                           keyword=keyword)
+
+# ====================== 今日订单管理 ======================
+@bp.route('/admin/orders/today')
+@admin_required
+def admin_orders_today():
+    page = request.args.get('page', 1, type=int)
+    keyword = request.args.get('keyword', '').strip()
+    per_page = 20
+
+    # 正确定义卖家别名
+    seller = db.aliased(User, name='seller')
+
+    # 今天的时间范围：从今天00:00:00 到现在
+    today_start = datetime.datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = datetime.datetime.now()
+
+    # 查询今日订单
+    base_query = db.session.query(
+        Order.order_no,
+        Order.goods_id,
+        Order.total_amount,
+        Order.quantity,
+        Order.pay_status,
+        Order.created_at,
+        goods.title,
+        User.nickname.label('buyer_nick'),
+        User.avatar.label('buyer_avatar'),
+        seller.nickname.label('seller_nick'),
+        seller.avatar.label('seller_avatar')
+    ).join(goods, goods.goods_id == Order.goods_id) \
+     .join(User, User.user_id == Order.buyer_id) \
+     .join(seller, seller.user_id == Order.seller_id) \
+     .filter(Order.created_at >= today_start) \
+     .filter(Order.created_at <= today_end)
+
+    if keyword:
+        base_query = base_query.filter(
+            or_(
+                Order.order_no.ilike(f'%{keyword}%'),
+                goods.title.ilike(f'%{keyword}%')
+            )
+        )
+
+    pagination = base_query.order_by(Order.created_at.desc()) \
+        .paginate(page=page, per_page=per_page, error_out=False)
+
+    orders = [row._asdict() for row in pagination.items]
+
+    return render_template('admin/admin_orders_today.html',
+                           orders=orders,
+                           pagination=pagination,
+                           keyword=keyword,
+                           today_date=today_start.strftime('%Y年%m月%d日'))  # 传递今天日期用于标题显示
+
+# ====================== 今日注册用户 ======================
+@bp.route('/admin/users/today')
+@admin_required
+def admin_users_today():
+    page = request.args.get('page', 1, type=int)
+    keyword = request.args.get('keyword', '').strip()  # ← 这里修复了
+    per_page = 20
+
+    # 今天的时间范围：从今天00:00:00 开始
+    today_start = datetime.datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # 查询今日注册用户
+    query = User.query.filter(User.reg_time >= today_start) \
+                      .order_by(User.reg_time.desc())
+
+    if keyword:
+        query = query.filter(
+            db.or_(
+                User.nickname.ilike(f'%{keyword}%'),
+                User.account.ilike(f'%{keyword}%'),
+                User.stu_id.ilike(f'%{keyword}%'),
+                User.email.ilike(f'%{keyword}%')
+            )
+        )
+
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    users = pagination.items
+
+    return render_template('admin/admin_users_today.html',
+                           users=users,
+                           pagination=pagination,
+                           keyword=keyword,
+                           today_date=today_start.strftime('%Y年%m月%d日'))
+
+# ====================== 毕业生清仓商品管理 ======================
+@bp.route('/admin/batch_goods')
+@admin_required
+def admin_batch_goods():
+    page = request.args.get('page', 1, type=int)
+    keyword = request.args.get('keyword', '').strip()
+    per_page = 20
+
+    # 查询毕业生清仓商品（is_batch=1）
+    default_avatar = '/static/avatars/userspictures/default.jpg'
+    query = db.session.query(
+        goods.goods_id, goods.title, goods.price, goods.stock, goods.degree, goods.status, goods.on_shelf_time,
+        User.nickname.label('seller_nickname'), User.avatar.label('seller_avatar')
+    ).outerjoin(User, goods.user_id == User.user_id) \
+     .filter(goods.is_batch == 1) \
+     .order_by(goods.on_shelf_time.desc())
+
+    if keyword:
+        query = query.filter(
+            db.or_(
+                goods.title.ilike(f'%{keyword}%'),
+                goods.description.ilike(f'%{keyword}%')
+            )
+        )
+
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    items = pagination.items
+
+    # 卖家信息已在同一条查询里联表取出
+    batch_goods = []
+    for row in items:
+        item = dict(row._mapping)
+        item['seller_nickname'] = item['seller_nickname'] or '未知用户'
+        item['seller_avatar'] = item['seller_avatar'] or default_avatar
+        batch_goods.append(item)
+
+    return render_template('admin/admin_batch_goods.html',
+                           goods=batch_goods,
+                           pagination=pagination,
+                           keyword=keyword)
+
+
+# ====================== 运行监控 ======================
+def metrics_authorized():
+    """管理员登录态，或携带正确的 Bearer Token"""
+    if session.get('user_id') and session.get('is_admin'):
+        return True
+    token = current_app.config.get('METRICS_TOKEN')
+    return bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 文本格式指标"""
+    if not metrics_authorized():
+        return 'forbidden', 403
+    lines = pool_metrics_prometheus(pool_metrics_snapshot())
+    routes, _ = sql_route_report()
+    _prometheus_metric(lines, 'ershou_route_requests_total', 'counter', '各路由请求数',
+                       [(f'{{endpoint="{r["endpoint"]}"}}', r['requests']) for r in routes])
+    _prometheus_metric(lines, 'ershou_route_db_queries_avg', 'gauge', '各路由平均 SQL 语句数',
+                       [(f'{{endpoint="{r["endpoint"]}"}}', round(r['avg_queries'], 2)) for r in routes])
+    _prometheus_metric(lines, 'ershou_route_n_plus_one_requests_total', 'counter', '各路由疑似 N+1 的请求数',
+                       [(f'{{endpoint="{r["endpoint"]}"}}', r['n_plus_one_requests']) for r in routes])
+    audit_data = audit_stats()
+    _prometheus_metric(lines, 'ershou_audit_log_queued', 'gauge', '审计日志队列积压条数', [('', audit_data['queued'])])
+    _prometheus_metric(lines, 'ershou_audit_log_rows_total', 'counter', '审计日志条数（按结果）',
+                       [(f'{{result="{k}"}}', audit_data[k]) for k in AUDIT_COUNTERS])
+    return '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@bp.route('/admin/metrics')
+@admin_required
+def admin_metrics():
+    """后台运行监控页"""
+    pool = pool_metrics_snapshot()
+    wait_rows = []
+    lower = 0
+    for bound, count in zip(POOL_WAIT_BUCKETS, pool['wait_buckets']):
+        wait_rows.append({'range': f'{lower * 1000:g} ~ {bound * 1000:g} ms', 'count': count})
+        lower = bound
+    wait_rows.append({'range': f'> {lower * 1000:g} ms', 'count': pool['wait_count'] - sum(pool['wait_buckets'])})
+
+    return render_template('admin/admin_metrics.html',
+                           pool=pool,
+                           wait_rows=wait_rows,
+                           engine_options={k: v for k, v in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items() if k != 'poolclass'})
+
+@bp.route('/admin/metrics/sql')
+@admin_required
+def admin_metrics_sql():
+    """后台 SQL 统计：每个路由的平均语句数、数据库耗时、疑似 N+1 与最近慢语句"""
+    routes, slow = sql_route_report()
+    return render_template('admin/admin_metrics_sql.html',
+                           routes=routes,
+                           slow=slow,
+                           slow_ms=current_app.config['SQL_SLOW_MS'],
+                           threshold=current_app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+
+
+# ====================== 管理员专用查看（绕过权限限制） ======================
+
+@bp.route('/admin/goods/view/<int:goods_id>')
+@admin_required
+def admin_goods_view(goods_id):
+    g = goods.query.get_or_404(goods_id)
+    images = goods_image.query.filter_by(goods_id=goods_id).order_by(goods_image.sort).all()
+    seller = User.query.get(g.user_id)
+    
+    # 直接复用前端 goods_detail.html 模板
+    return render_template('visiter/goods_detail.html', 
+                           goods=g, 
+                           images=images, 
+                           user=session.get('user') or {},  # 防止未登录报错
+                           seller=seller)  # 如果模板需要 seller，可加
+
+@bp.route('/admin/order/view/<order_no>')
+@admin_required
+def admin_order_view(order_no):
+    order = Order.query.filter_by(order_no=order_no).first_or_404()
+    
+    # 获取商品封面（从 goods_image 取第一张，或用默认）
+    cover = goods_image.query.filter_by(goods_id=order.goods_id).first()
+    cover_img = cover.url if cover else '/static/avatars/goodspictures/default.jpg'
+    
+    # 买家/卖家昵称（模板中用到）
+    buyer = User.query.get(order.buyer_id)
+    seller = User.query.get(order.seller_id)
+    
+    # 构造模板需要的字段（模拟前端传参）
+    order_data = {
+        'order_no': order.order_no,
+        'pay_status': order.pay_status,
+        'created_at': order.created_at,
+        'pay_time': order.pay_time,
+        'confirm_time': order.confirm_time,
+        'total_amount': order.total_amount,
+        'quantity': order.quantity,
+        'title': goods.query.get(order.goods_id).title,  # 商品标题
+        'cover_img': cover_img,
+        'buyer_nick': buyer.nickname if buyer else '未知',
+        'seller_nick': seller.nickname if seller else '未知',
+        'buyer_id': order.buyer_id,
+        'seller_id': order.seller_id,
+    }
+    
+    # 管理员查看时，伪装成“本人”以避免模板逻辑报错（可选）
+    fake_user = {'user_id': None}  # 或 seller_id，随便选一个让按钮显示正常
+    
+    return render_template('visiter/order_detail.html', 
+                           order=order_data, 
+                           user=fake_user)  # 关键：传入 user 避免模板报错
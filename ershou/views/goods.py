@@ -0,0 +1,826 @@
+# -*- coding: utf-8 -*-
+"""
+商品相关路由：详情、互动、发布 / 修改 / 上下架、列表、毕业清仓批次、评论与举报
+"""
+import datetime
+import json
+import os
+
+from flask import Blueprint, jsonify, render_template, request, session
+from sqlalchemy.orm import joinedload
+
+from ..auth import get_current_user, login_required
+from ..catalog import (
+    catalog_bump, catalog_enabled, catalog_goods_changed, catalog_list
+)
+from ..caches import (
+    COMMENT_PAGE_SIZE, college_hot_changed, college_hot_page, get_category_catalog, get_comment_tree, get_goods_facets, get_liked_comment_ids,
+    invalidate_comment_tree, patch_comment_like_count, _page_after, _render_comment
+)
+from ..extensions import counter_write, db, read_only
+from ..models import GraduateBatch, User, goods, goods_image
+from ..ratelimit import rate_limit
+from ..recommend import get_similar_goods
+from ..search import suggest, suggest_refresh, suggest_upsert
+from ..user_stats import INTERACTION_STATS_FIELDS, bump_user_stats
+
+bp = Blueprint('goods', __name__)
+
+
+# ====================== 商品相关路由 ======================
+
+@bp.route('/goods/<int:goods_id>')
+@read_only
+def goods_detail(goods_id):
+    """商品详情页"""
+    goods = db.session.execute(db.text("""
+        SELECT g.*, c.name as cate_name,
+               (SELECT url FROM goods_image WHERE goods_id=g.goods_id ORDER BY sort LIMIT 1) as cover_img
+        FROM goods g 
+        LEFT JOIN category c ON g.cate_id = c.cate_id
+        WHERE g.goods_id = :gid AND g.status = 1
+    """), {'gid': goods_id}).fetchone()
+
+    if not goods:
+        return "商品不存在或已下架", 404
+
+    # 商品所有图片
+    images = db.session.execute(db.text("""
+        SELECT url FROM goods_image WHERE goods_id = :gid ORDER BY sort
+    """), {'gid': goods_id}).fetchall()
+
+    # 卖家信息
+    seller = User.query.get(goods.user_id)
+
+    # 当前登录用户是否已想买/收藏该商品
+    user = None
+    is_wish = is_favor = False
+    if 'user_id' in session:
+        user = get_current_user()
+        interact = db.session.execute(db.text("""
+            SELECT type FROM user_interaction 
+            WHERE user_id = :uid AND goods_id = :gid
+        """), {'uid': session['user_id'], 'gid': goods_id}).fetchall()
+        for row in interact:
+            if row.type == 2: is_wish = True
+            if row.type == 1: is_favor = True
+
+    # 猜你喜欢：离线任务预计算的相似商品
+    similar_goods = get_similar_goods(goods_id)
+
+    return render_template('visiter/goods_detail.html',
+                           goods=goods,
+                           images=images,
+                           seller=seller,
+                           user=user,
+                           is_wish=is_wish,
+                           is_favor=is_favor,
+                           similar_goods=similar_goods)
+
+
+@bp.route('/api/goods/<int:goods_id>/view', methods=['POST'])
+@counter_write
+def add_view(goods_id):
+    """增加商品浏览量"""
+    db.session.execute(db.text("""
+        UPDATE goods SET view_num = view_num + 1 WHERE goods_id = :gid
+    """), {'gid': goods_id})
+    db.session.commit()
+    catalog_bump(goods_id, 'view_num')
+    return jsonify(code=200)
+
+
+@bp.route('/api/interact/<action>', methods=['POST'])
+@rate_limit('interact', limit=60, window=60)
+@login_required
+def interact(action):
+    """想买 / 收藏 统一接口（action = wish 或 favor）"""
+    data = request.get_json()
+    gid = data.get('goods_id')
+    if not gid:
+        return jsonify(code=400, msg='参数错误')
+
+    type_map = {'wish': 2, 'favor': 1}
+    if action not in type_map:
+        return jsonify(code=404, msg='操作不存在')
+
+    t = type_map[action]
+    existed = db.session.execute(db.text("""
+        SELECT id FROM user_interaction 
+        WHERE user_id = :uid AND goods_id = :gid AND type = :t
+    """), {'uid': session['user_id'], 'gid': gid, 't': t}).fetchone()
+
+    if existed:
+        # 已存在 → 取消操作
+        db.session.execute(db.text("""
+            DELETE FROM user_interaction 
+            WHERE user_id = :uid AND goods_id = :gid AND type = :t
+        """), {'uid': session['user_id'], 'gid': gid, 't': t})
+        db.session.execute(db.text(f"""
+            UPDATE goods SET {'wish_num' if t==2 else 'favor_num'} = 
+            GREATEST(0, {'wish_num' if t==2 else 'favor_num'} - 1)
+            WHERE goods_id = :gid
+        """), {'gid': gid})
+        is_current = False
+    else:
+        # 不存在 → 添加
+        db.session.execute(db.text("""
+            INSERT INTO user_interaction (user_id, goods_id, type) 
+            VALUES (:uid, :gid, :t)
+        """), {'uid': session['user_id'], 'gid': gid, 't': t})
+        db.session.execute(db.text(f"""
+            UPDATE goods SET {'wish_num' if t==2 else 'favor_num'} = 
+            {'wish_num' if t==2 else 'favor_num'} + 1
+            WHERE goods_id = :gid
+        """), {'gid': gid})
+        is_current = True
+    bump_user_stats(session['user_id'], **{INTERACTION_STATS_FIELDS[t]: 1 if is_current else -1})
+
+    db.session.commit()
+    catalog_bump(gid, 'wish_num' if t==2 else 'favor_num', 1 if is_current else -1)
+    return jsonify(code=200, data={'is_wish' if t==2 else 'is_favor': is_current})
+
+
+@bp.route('/publish')
+@login_required
+def publish_page():
+    """发布/编辑商品页面（复用同一个页面）"""
+    edit_id = request.args.get('edit', type=int)  # 获取 ?edit=xxx 参数
+    categories = get_category_catalog()['enabled']
+    user = get_current_user()
+    
+    goods_data = None
+    existing_images = []
+    if edit_id:
+        g = goods.query.filter_by(goods_id=edit_id, user_id=session['user_id']).first_or_404()
+        goods_data = {
+            'goods_id': g.goods_id,
+            'title': g.title,
+            'price': float(g.price),
+            'cate_id': g.cate_id,
+            'degree': g.degree,
+            'description': g.description or '',
+            'is_batch': g.is_batch
+        }
+        # 获取已有图片，按 sort 排序
+        existing_images = goods_image.query.filter_by(goods_id=edit_id).order_by(goods_image.sort).all()
+        existing_images = [{'url': img.url, 'sort': img.sort} for img in existing_images]
+    
+    return render_template('visiter/goods_publish.html', 
+                           user=user, 
+                           categories=categories,
+                           goods=goods_data,          # 编辑时传入商品数据
+                           existing_images=existing_images)  # 编辑时传入已有图片
+
+@bp.route('/api/goods/publish', methods=['POST'])
+@login_required
+def api_publish_goods():
+    """商品发布接口 - 支持无图发布（自动使用默认封面）"""
+    try:
+        # 获取并校验必填字段
+        title = request.form.get('title', '').strip()
+        price_str = request.form.get('price')
+        cate_id_str = request.form.get('cate_id')
+
+        if not title:
+            return jsonify(code=400, msg='商品标题不能为空')
+        if not price_str:
+            return jsonify(code=400, msg='价格不能为空')
+        if not cate_id_str:
+            return jsonify(code=400, msg='请选择商品分类')
+
+        try:
+            price = float(price_str)
+            if price <= 0:
+                return jsonify(code=400, msg='价格必须大于0')
+            cate_id = int(cate_id_str)
+        except ValueError:
+            return jsonify(code=400, msg='价格或分类格式错误')
+
+        degree = int(request.form.get('degree', 10))
+        description = request.form.get('description', '').strip()
+        is_batch = 1 if request.form.get('is_batch') == '1' else 0
+
+        # 创建商品记录
+        new_goods = goods(
+            title=title,
+            cate_id=cate_id,
+            user_id=session['user_id'],
+            price=price,
+            description=description,
+            degree=degree,
+            stock=1,
+            status=1,              # 上架状态
+            is_batch=is_batch
+        )
+        db.session.add(new_goods)
+        db.session.flush()  # 获取 goods_id，用于图片命名
+
+        # 图片上传目录
+        upload_folder = 'static/avatars/goodspictures'
+        os.makedirs(upload_folder, exist_ok=True)
+
+        # 获取上传的图片文件
+        uploaded_files = request.files.getlist('images')
+
+        # 判断是否有有效图片上传（排除空文件）
+        has_uploaded_images = any(f.filename != '' for f in uploaded_files)
+
+        default_cover_url = '/static/avatars/goodspictures/default.jpg'
+
+        if has_uploaded_images:
+            # 用户上传了图片 → 保存最多9张
+            for i, file in enumerate(uploaded_files[:9]):
+                if file and file.filename:
+                    # 安全获取扩展名
+                    ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'jpg'
+                    filename = f"{new_goods.goods_id}_{i}.{ext}"
+                    filepath = os.path.join(upload_folder, filename)
+                    file.save(filepath)
+
+                    img_url = f"/static/avatars/goodspictures/{filename}"
+                    img = goods_image(
+                        goods_id=new_goods.goods_id,
+                        url=img_url,
+                        sort=i  # 第一张为封面
+                    )
+                    db.session.add(img)
+        else:
+            # 用户没有上传任何图片 → 自动添加默认封面图
+            default_img = goods_image(
+                goods_id=new_goods.goods_id,
+                url=default_cover_url,
+                sort=0
+            )
+            db.session.add(default_img)
+
+        bump_user_stats(session['user_id'], goods_num=1)
+        db.session.commit()
+        suggest_upsert(new_goods.goods_id, title, hot=0)
+        catalog_goods_changed(new_goods.goods_id)
+        college_hot_changed(session['user_id'])
+
+        return jsonify(
+            code=200,
+            msg='发布成功！',
+            goods_id=new_goods.goods_id
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        print("【商品发布失败】", str(e))
+        return jsonify(code=500, msg='发布失败，请稍后重试')
+
+@bp.route('/api/goods/update', methods=['POST'])
+@login_required
+def api_update_goods():
+    """编辑商品保存接口"""
+    try:
+        goods_id = request.form.get('goods_id', type=int)
+        if not goods_id:
+            return jsonify(code=400, msg='缺少商品ID')
+        
+        g = goods.query.filter_by(goods_id=goods_id, user_id=session['user_id']).first_or_404()
+        
+        # 更新基本字段（同发布逻辑）
+        g.title = request.form.get('title', '').strip()
+        g.price = float(request.form.get('price'))
+        g.cate_id = int(request.form.get('cate_id'))
+        g.degree = int(request.form.get('degree', 10))
+        g.description = request.form.get('description', '').strip()
+        g.is_batch = 1 if request.form.get('is_batch') == '1' else 0
+        
+        # 处理图片：先删除旧图片记录（可选：也可以只删用户删除的）
+        db.session.execute(db.text("DELETE FROM goods_image WHERE goods_id = :gid"), {'gid': goods_id})
+        
+        upload_folder = 'static/avatars/goodspictures'
+        os.makedirs(upload_folder, exist_ok=True)
+        
+        uploaded_files = request.files.getlist('images')
+        has_uploaded = any(f.filename != '' for f in uploaded_files)
+        
+        if has_uploaded:
+            for i, file in enumerate(uploaded_files[:9]):
+                if file and file.filename:
+                    ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'jpg'
+                    filename = f"{goods_id}_{i}.{ext}"
+                    filepath = os.path.join(upload_folder, filename)
+                    file.save(filepath)
+                    
+                    img_url = f"/static/avatars/goodspictures/{filename}"
+                    img = goods_image(goods_id=goods_id, url=img_url, sort=i)
+                    db.session.add(img)
+        else:
+            # 没传新图，用默认封面
+            default_img = goods_image(goods_id=goods_id, url='/static/avatars/goodspictures/default.jpg', sort=0)
+            db.session.add(default_img)
+        
+        db.session.commit()
+        if g.status == 1:
+            suggest_upsert(goods_id, g.title)
+        catalog_goods_changed(goods_id)
+        college_hot_changed(session['user_id'])
+        return jsonify(code=200, msg='修改成功！', goods_id=goods_id)
+    
+    except Exception as e:
+        db.session.rollback()
+        print("【商品编辑失败】", str(e))
+        return jsonify(code=500, msg='修改失败')
+
+
+
+@bp.route('/api/goods/list')
+@read_only
+def api_goods_list():
+    keyword = request.args.get('keyword', '').strip()
+    cate_id = request.args.get('cate_id', type=int)
+    price_min = request.args.get('price_min', type=float)
+    price_max = request.args.get('price_max', type=float)
+    degree_min = request.args.get('degree_min', type=int)
+    only_graduating = request.args.get('only_graduating', '0') == '1'
+    same_college = request.args.get('same_college', '0') == '1'
+    sort = request.args.get('sort', 'default')
+    page = max(1, request.args.get('page', 1, type=int))
+    page_size = 20
+    with_facets = request.args.get('facets', '0') == '1'  # 附带各筛选项的计数
+
+    # 注意这里用小写的 goods
+    query = goods.query.options(joinedload(goods.user)).filter(goods.status == 1)
+
+    if keyword:
+        query = query.filter(
+            (goods.title.ilike(f'%{keyword}%')) |
+            (goods.description.ilike(f'%{keyword}%'))
+        )
+
+    if cate_id:
+        query = query.filter(goods.cate_id == cate_id)
+
+    if price_min is not None:
+        query = query.filter(goods.price >= price_min)
+    if price_max is not None:
+        query = query.filter(goods.price <= price_max)
+
+    if degree_min is not None:
+        query = query.filter(goods.degree >= degree_min)
+
+    if only_graduating:
+        query = query.join(User).filter(User.is_graduating == 1, goods.is_batch == 1)
+
+    college = None
+    if same_college and 'user_id' in session:
+        current_user = get_current_user()
+        if current_user and current_user.college:
+            college = current_user.college
+            query = query.join(User).filter(User.college == current_user.college)
+
+    cached_page = None
+    if college and sort == 'hot' and not (keyword or cate_id or only_graduating) \
+            and price_min is None and price_max is None and degree_min is None:
+        # 本院热销翻页：直接切学院热榜缓存
+        cached_page = college_hot_page(college, page, page_size)
+
+    if cached_page is not None:
+        data, total = cached_page
+    elif not keyword and catalog_enabled():
+        # 列式快照：筛选、排序、分页都在内存里完成，不查库
+        data, total = catalog_list(cate_id, price_min, price_max, degree_min, only_graduating, college,
+                                   sort, page, page_size)
+    else:
+        data, total = _query_goods_page(query, sort, page, page_size)
+
+    if with_facets:
+        facets = get_goods_facets(keyword, cate_id, price_min, price_max, degree_min, only_graduating, college)
+        return jsonify(code=200, data=data, total=total, page=page, facets=facets)
+    return jsonify(code=200, data=data, total=total, page=page)
+
+
+def _query_goods_page(query, sort, page, page_size):
+    """SQL 版列表：排序 + 分页 + 逐条组装"""
+    # 热度公式
+    hot_expr = goods.favor_num * 5 + goods.wish_num * 3 + goods.view_num + goods.sold_num * 10
+
+    if sort == 'newest':
+        query = query.order_by(goods.on_shelf_time.desc())
+    elif sort == 'price_asc':
+        query = query.order_by(goods.price.asc())
+    elif sort == 'price_desc':
+        query = query.order_by(goods.price.desc())
+    elif sort == 'hot':
+        query = query.order_by(hot_expr.desc())
+    else:
+        query = query.order_by(goods.on_shelf_time.desc(), hot_expr.desc())
+
+    total = query.count()
+    goods_list = query.offset((page-1)*page_size).limit(page_size).all()
+
+    data = []
+    for g in goods_list:
+        cover = goods_image.query.filter_by(goods_id=g.goods_id).order_by(goods_image.sort).first()
+        data.append({
+            'goods_id': g.goods_id,
+            'title': g.title,
+            'price': float(g.price),
+            'cover_img': cover.url if cover else '/static/avatars/goodspictures/default.jpg',
+            'degree': g.degree,
+            'view_num': g.view_num,
+            'wish_num': g.wish_num,
+            'favor_num': g.favor_num,
+            'sold_num': g.sold_num,
+            'is_batch': g.is_batch,
+            'user_nickname': g.user.nickname if g.user else '未知用户',
+            'user_college': g.user.college if g.user else '',
+        })
+    return data, total
+
+
+@bp.route('/api/search/suggest')
+@read_only
+def api_search_suggest():
+    """搜索框联想：?q=高数 → 匹配的分类 + 按热度排序的在售商品标题"""
+    q = request.args.get('q', '')
+    limit = min(max(1, request.args.get('limit', 8, type=int)), 20)
+    categories, items = suggest(q, limit)
+    data = [{'type': 'category', 'text': c.name, 'cate_id': c.cate_id} for c in categories]
+    data += [{'type': 'goods', 'text': title, 'goods_id': gid} for gid, title in items]
+    return jsonify(code=200, data=data)
+
+
+@bp.route('/api/goods/off', methods=['POST'])
+@login_required
+def off_goods():
+    """上架/下架自己的商品"""
+    data = request.get_json()
+    gid = data.get('goods_id')
+    status = data.get('status')
+    if not gid or status not in (0,1):
+        return jsonify(code=400, msg='参数错误')
+    db.session.execute(db.text("""
+        UPDATE goods SET status=:status 
+        WHERE goods_id=:gid AND user_id=:uid
+    """), {'status': status, 'gid': gid, 'uid': session['user_id']})
+    db.session.commit()
+    suggest_refresh(int(gid))
+    catalog_goods_changed(gid)
+    college_hot_changed(session['user_id'])
+    return jsonify(code=200, msg='操作成功')
+
+
+# ====================== 毕业清仓：批量发布与批次操作 ======================
+# 毕业生一次上架几十件，逐件走 /api/goods/publish 就是几十次上传请求、几十个事务。
+# 批量发布：一个 multipart 请求，items 字段是商品列表 JSON，第 i 件的图片放在 images_<i> 字段；
+# 批次、商品、图片在同一个事务里多行插入，任何一件校验失败整批都不发布。
+BATCH_PUBLISH_MAX = 50        # 每批最多商品数
+BATCH_IMAGES_MAX = 9          # 每件最多图片数
+BATCH_PRICE_CUT_MAX = 90      # 批次降价最多降百分之多少
+
+
+def _parse_batch_item(item, categories):
+    """校验一件批量商品，返回 (字段 dict, 错误信息)"""
+    if not isinstance(item, dict):
+        return None, '商品格式错误'
+    title = str(item.get('title') or '').strip()
+    if not title:
+        return None, '商品标题不能为空'
+    if len(title) > 100:
+        return None, '商品标题不能超过100字'
+    try:
+        price = round(float(item.get('price')), 2)
+        cate_id = int(item.get('cate_id'))
+        degree = int(item.get('degree', 10))
+    except (TypeError, ValueError):
+        return None, '价格、分类或成色格式错误'
+    if price <= 0:
+        return None, '价格必须大于0'
+    if cate_id not in categories:
+        return None, '商品分类不存在'
+    if not 1 <= degree <= 10:
+        return None, '成色应在1到10之间'
+    return {
+        'title': title,
+        'cate_id': cate_id,
+        'price': price,
+        'degree': degree,
+        'description': str(item.get('description') or '').strip(),
+    }, None
+
+
+@bp.route('/api/batch/publish', methods=['POST'])
+@rate_limit('batch_publish', limit=10, window=3600, msg='批量发布太频繁，请稍后再试')
+@login_required
+def api_batch_publish():
+    """毕业清仓批量发布：batch_name、graduate_date（YYYY-MM-DD）、items（JSON 列表）、images_<i>"""
+    user = get_current_user()
+    if not user.is_graduating:
+        return jsonify(code=403, msg='仅应届毕业生可以发布清仓批次')
+
+    batch_name = request.form.get('batch_name', '').strip() or f'{user.nickname}的毕业清仓'
+    try:
+        graduate_date = datetime.datetime.strptime(request.form.get('graduate_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify(code=400, msg='毕业日期格式应为 YYYY-MM-DD')
+    try:
+        items = json.loads(request.form.get('items') or '[]')
+    except ValueError:
+        return jsonify(code=400, msg='商品列表格式错误')
+    if not isinstance(items, list) or not items:
+        return jsonify(code=400, msg='至少要有一件商品')
+    if len(items) > BATCH_PUBLISH_MAX:
+        return jsonify(code=400, msg=f'每批最多 {BATCH_PUBLISH_MAX} 件商品')
+
+    categories = get_category_catalog()['by_id']
+    rows = []
+    for i, item in enumerate(items):
+        fields, error = _parse_batch_item(item, categories)
+        if error:
+            return jsonify(code=400, msg=f'第 {i + 1} 件：{error}')
+        rows.append(fields)
+
+    upload_folder = 'static/avatars/goodspictures'
+    default_cover_url = '/static/avatars/goodspictures/default.jpg'
+    saved_files = []
+    try:
+        batch = GraduateBatch(user_id=user.user_id, batch_name=batch_name[:100], graduate_date=graduate_date)
+        db.session.add(batch)
+        db.session.flush()  # 获取 batch_id
+
+        now = datetime.datetime.now()
+        db.session.execute(db.text("""
+            INSERT INTO goods (title, cate_id, user_id, price, description, degree, stock, status,
+                               is_batch, batch_id, on_shelf_time)
+            VALUES (:title, :cate_id, :uid, :price, :description, :degree, 1, 1, 1, :bid, :now)
+        """), [{**row, 'uid': user.user_id, 'bid': batch.batch_id, 'now': now} for row in rows])
+        # 同一条多行 INSERT 分配的自增 ID 按行序递增，按 ID 排序即与 items 一一对应
+        goods_ids = db.session.execute(db.text(
+            "SELECT goods_id FROM goods WHERE batch_id = :bid ORDER BY goods_id"
+        ), {'bid': batch.batch_id}).scalars().all()
+
+        os.makedirs(upload_folder, exist_ok=True)
+        images = []
+        for i, gid in enumerate(goods_ids):
+            files = [f for f in request.files.getlist(f'images_{i}') if f and f.filename][:BATCH_IMAGES_MAX]
+            for sort, file in enumerate(files):
+                ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'jpg'
+                filename = f"{gid}_{sort}.{ext}"
+                filepath = os.path.join(upload_folder, filename)
+                file.save(filepath)
+                saved_files.append(filepath)
+                images.append({'gid': gid, 'url': f"/static/avatars/goodspictures/{filename}", 'sort': sort})
+            if not files:
+                images.append({'gid': gid, 'url': default_cover_url, 'sort': 0})
+        db.session.execute(db.text(
+            "INSERT INTO goods_image (goods_id, url, sort) VALUES (:gid, :url, :sort)"
+        ), images)
+        bump_user_stats(user.user_id, goods_num=len(goods_ids))
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        for filepath in saved_files:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+        print("【批量发布失败】", str(e))
+        return jsonify(code=500, msg='批量发布失败，请稍后重试')
+
+    for gid, row in zip(goods_ids, rows):
+        suggest_upsert(gid, row['title'], hot=0)
+        catalog_goods_changed(gid)
+    college_hot_changed(college=user.college)
+    return jsonify(code=200, msg=f'成功发布 {len(goods_ids)} 件商品', batch_id=batch.batch_id, goods_ids=goods_ids)
+
+
+@bp.route('/api/batch/action', methods=['POST'])
+@login_required
+def api_batch_action():
+    """
+    批次操作：{batch_id, action}
+    action = offshelf（整批下架在售商品）/ onshelf（整批重新上架）/ price_cut（整批降价，需 percent）
+    """
+    data = request.get_json() or {}
+    batch_id = data.get('batch_id')
+    action = data.get('action')
+    if not batch_id or action not in ('offshelf', 'onshelf', 'price_cut'):
+        return jsonify(code=400, msg='参数错误')
+
+    batch = GraduateBatch.query.filter_by(batch_id=batch_id, user_id=session['user_id']).first()
+    if not batch:
+        return jsonify(code=404, msg='批次不存在')
+
+    params = {'bid': batch.batch_id, 'uid': session['user_id']}
+    if action == 'price_cut':
+        try:
+            percent = float(data.get('percent'))
+        except (TypeError, ValueError):
+            return jsonify(code=400, msg='请填写降价百分比')
+        if not 0 < percent <= BATCH_PRICE_CUT_MAX:
+            return jsonify(code=400, msg=f'降价幅度应在 0 到 {BATCH_PRICE_CUT_MAX}% 之间')
+        params['ratio'] = (100 - percent) / 100
+        where = "batch_id = :bid AND user_id = :uid AND status = 1"
+        update = """
+            UPDATE goods SET price = CASE WHEN ROUND(price * :ratio, 2) < 0.01 THEN 0.01
+                                          ELSE ROUND(price * :ratio, 2) END
+            WHERE """ + where
+    else:
+        # 已售出（status=2）的商品不受影响
+        old_status, new_status = (1, 0) if action == 'offshelf' else (0, 1)
+        params.update(old=old_status, new=new_status)
+        where = "batch_id = :bid AND user_id = :uid AND status = :old"
+        update = "UPDATE goods SET status = :new WHERE " + where
+
+    goods_ids = db.session.execute(db.text("SELECT goods_id FROM goods WHERE " + where), params).scalars().all()
+    if not goods_ids:
+        return jsonify(code=200, msg='没有需要处理的商品', affected=0)
+    db.session.execute(db.text(update), params)
+    db.session.commit()
+
+    for gid in goods_ids:
+        if action != 'price_cut':
+            suggest_refresh(gid)
+        catalog_goods_changed(gid)
+    college_hot_changed(session['user_id'])
+    return jsonify(code=200, msg='操作成功', affected=len(goods_ids))
+
+
+# ====================== 评论系统：发表评论（支持回复） ======================
+@bp.route('/api/comment/publish', methods=['POST'])
+@rate_limit('comment', limit=10, window=60, msg='评论太频繁，请稍后再试')
+@login_required
+def api_comment_publish():
+    data = request.get_json() or {}
+    goods_id = data.get('goods_id')
+    content = data.get('content', '').strip()
+    parent_id = int(data.get('parent_id', 0))
+
+    if not goods_id or not content:
+        return jsonify(code=400, msg='内容不能为空')
+
+    if len(content) > 500:
+        return jsonify(code=400, msg='评论最多500字')
+
+    # 检查商品是否存在
+    g_count = db.session.execute(
+        db.text("SELECT 1 FROM goods WHERE goods_id=:gid AND status=1"),
+        {'gid': goods_id}
+    ).fetchone()
+    if not g_count:
+        return jsonify(code=404, msg='商品不存在或已下架')
+
+    try:
+        db.session.execute(db.text("""
+            INSERT INTO comment (goods_id, user_id, parent_id, content)
+            VALUES (:gid, :uid, :pid, :content)
+        """), {
+            'gid': goods_id,
+            'uid': session['user_id'],
+            'pid': parent_id,
+            'content': content
+        })
+        db.session.commit()
+        invalidate_comment_tree(goods_id=goods_id)
+        return jsonify(code=200, msg='评论成功')
+    except Exception as e:
+        db.session.rollback()
+        print("评论失败:", e)
+        return jsonify(code=500, msg='服务器错误')
+
+
+# ====================== 评论系统：点赞/取消点赞 ======================
+@bp.route('/api/comment/like', methods=['POST'])
+@login_required
+def api_comment_like():
+    """
+    点赞开关：存储过程 comment_like_toggle（见 sqlwords.sql 第 10 节）在服务端翻转 liked、增减点赞数、
+    维护“N 人赞了你的评论”摘要，一次往返返回 (liked, like_count, goods_id)；评论不存在时 liked 为 NULL
+    """
+    data = request.get_json() or {}
+    try:
+        comment_id = int(data.get('comment_id') or 0)
+    except (TypeError, ValueError):
+        comment_id = 0
+    if not comment_id:
+        return jsonify(code=400, msg='参数错误')
+
+    try:
+        row = db.session.execute(db.text("CALL comment_like_toggle(:cid, :uid)"),
+                                 {'cid': comment_id, 'uid': session['user_id']}).first()
+        if row is None or row.liked is None:
+            db.session.rollback()
+            return jsonify(code=404, msg='评论不存在')
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print("点赞失败:", e)
+        return jsonify(code=500, msg='服务器错误')
+
+    patch_comment_like_count(comment_id, row.like_count, row.goods_id)
+    return jsonify(code=200, action='like' if row.liked else 'cancel', like_count=row.like_count)
+
+
+# ====================== 评论系统：获取评论列表（游标分页） ======================
+@bp.route('/api/comment/list')
+def api_comment_list():
+    """
+    顶级评论按游标分页：?goods_id=1&cursor=上一页最后一条comment_id&size=20
+    每条评论只带第一页直接回复，剩余回复通过 /api/comment/replies 加载
+    """
+    goods_id = request.args.get('goods_id', type=int)
+    if not goods_id:
+        return jsonify(code=400, msg='参数错误')
+
+    cursor = request.args.get('cursor', 0, type=int)
+    size = min(max(request.args.get('size', COMMENT_PAGE_SIZE, type=int), 1), 100)
+
+    tree = get_comment_tree(goods_id)
+    liked_ids = get_liked_comment_ids(goods_id, session.get('user_id'))
+
+    roots, next_cursor = _page_after(tree['roots'], cursor, size)
+    data = [_render_comment(c, liked_ids) for c in roots]
+
+    return jsonify(code=200, data=data, next_cursor=next_cursor, total=len(tree['roots']))
+
+
+@bp.route('/api/comment/replies')
+def api_comment_replies():
+    """加载某条评论的更多直接回复：?goods_id=1&parent_id=5&cursor=上一页最后一条comment_id"""
+    goods_id = request.args.get('goods_id', type=int)
+    parent_id = request.args.get('parent_id', type=int)
+    if not goods_id or not parent_id:
+        return jsonify(code=400, msg='参数错误')
+
+    cursor = request.args.get('cursor', 0, type=int)
+    size = min(max(request.args.get('size', COMMENT_PAGE_SIZE, type=int), 1), 100)
+
+    tree = get_comment_tree(goods_id)
+    parent = tree['nodes'].get(parent_id)
+    if not parent:
+        return jsonify(code=404, msg='评论不存在')
+
+    liked_ids = get_liked_comment_ids(goods_id, session.get('user_id'))
+    replies, next_cursor = _page_after(parent['children'], cursor, size)
+    data = [_render_comment(r, liked_ids) for r in replies]
+
+    return jsonify(code=200, data=data, next_cursor=next_cursor)
+
+# ====================== 举报功能 ======================
+@bp.route('/api/report/submit', methods=['POST'])
+@rate_limit('report', limit=10, window=3600, msg='举报次数过多，请稍后再试')
+def api_report_submit():
+    try:
+        if 'user_id' not in session:
+            return jsonify(code=401, msg='请先登录')
+
+        data = request.get_json()
+        if not data:
+            return jsonify(code=400, msg='请求数据为空')
+
+        target_type = data.get('target_type')
+        target_id = data.get('target_id')
+        reason = data.get('reason')
+        description = data.get('description', '')
+
+        if target_type not in ['goods', 'user']:
+            return jsonify(code=400, msg='举报类型错误')
+        if not target_id or not reason:
+            return jsonify(code=400, msg='参数不完整')
+
+        try:
+            target_id = int(target_id)
+        except:
+            return jsonify(code=400, msg='ID格式错误')
+
+        # 防刷：同一用户 30 分钟内对同一目标只能举报一次。查重和插入合成一条 INSERT ... SELECT ... WHERE NOT EXISTS，
+        # 以 report 表为准且不多一次查询；插入 0 行即为重复举报（整体频率由上面的 @rate_limit 先挡掉）
+        result = db.session.execute(
+            db.text("""
+                INSERT INTO report
+                (reporter_id, target_type, target_id, reason, description, evidence, status)
+                SELECT :reporter, :type, :tid, :reason, :desc, '', 0 FROM DUAL
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM report
+                    WHERE reporter_id = :reporter AND target_type = :type AND target_id = :tid
+                      AND created_at > :since
+                )
+            """),
+            {
+                'reporter': session['user_id'],
+                'type': target_type,
+                'tid': target_id,
+                'reason': reason,
+                'desc': description,
+                'since': datetime.datetime.now() - datetime.timedelta(minutes=30),
+            }
+        )
+        if not result.rowcount:
+            db.session.rollback()
+            return jsonify(code=403, msg='您已举报过该内容，请勿重复提交')
+        db.session.commit()
+
+        return jsonify(code=200, msg='举报已提交，感谢您的反馈！我们会尽快处理')
+
+    except Exception as e:
+        print("举报接口详细错误:", str(e))  # 控制台会打印具体错因
+        db.session.rollback()
+        return jsonify(code=500, msg='服务器错误，请稍后重试')
+    
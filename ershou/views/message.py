@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+消息中心路由：会话列表、未读数、聊天记录、发送消息、订单聊天页
+"""
+from flask import Blueprint, jsonify, render_template, request, session
+
+from ..auth import get_current_user, login_required
+from ..extensions import db
+from ..messaging import (
+    CHAT_MARK_READ_SQL, MESSAGE_LIST_SQL, MESSAGE_SEND_LIMIT, MESSAGE_SEND_LIMIT_MSG, MESSAGE_SEND_WINDOW,
+    UNREAD_COUNT_SQL,
+    check_message_send, format_chat_messages, format_conversation, format_sent_message,
+    load_chat_page, parse_chat_cursor
+)
+from ..models import Message, User
+from ..ratelimit import rate_limit
+
+bp = Blueprint('message', __name__)
+
+
+@bp.route('/api/message/list')
+@login_required
+def api_message_list():
+    uid = session['user_id']
+    rows = db.session.execute(db.text(MESSAGE_LIST_SQL), {'uid': uid}).fetchall()
+    conversations = [format_conversation(r) for r in rows]
+    return jsonify(code=200, data=conversations)
+
+@bp.route('/api/message/unread_count')
+@login_required
+def api_message_unread_count():
+    uid = session['user_id']
+    count = db.session.execute(db.text(UNREAD_COUNT_SQL), {'uid': uid}).scalar()
+    return jsonify(code=200, count=count or 0)
+
+@bp.route('/api/message/mark_read', methods=['POST'])
+@login_required
+def api_message_mark_read():
+    data = request.get_json() or {}
+    order_id = data.get('order_id')  # 可选：只标记某个订单的消息
+    msg_ids = data.get('msg_ids', [])  # 可选：标记指定消息
+
+    sql = "UPDATE message SET is_read = 1 WHERE to_user_id = :uid AND is_read = 0"
+    params = {'uid': session['user_id']}
+
+    if order_id:
+        sql += " AND order_id = :order_id"
+        params['order_id'] = order_id
+    elif msg_ids:
+        sql += " AND msg_id IN :msg_ids"
+        params['msg_ids'] = tuple(msg_ids)
+
+    db.session.execute(db.text(sql), params)
+    db.session.commit()
+    return jsonify(code=200, msg='已标记已读')
+
+@bp.route('/messages')
+@login_required
+def messages():
+    user = get_current_user()
+    to_user_id = request.args.get('to', type=int)
+    to_user = User.query.get(to_user_id) if to_user_id else None
+    return render_template('visiter/my_messages.html', user=user, to_user=to_user)
+
+@bp.route('/api/message/send', methods=['POST'])
+@rate_limit('message', limit=MESSAGE_SEND_LIMIT, window=MESSAGE_SEND_WINDOW, msg=MESSAGE_SEND_LIMIT_MSG)
+@login_required
+def api_message_send():
+    error, params = check_message_send(request.get_json() or {}, session['user_id'])
+    if error:
+        return jsonify(code=400, msg=error)
+
+    sender = get_current_user()
+
+    try:
+        msg = Message(
+            from_user_id=session['user_id'],
+            from_nickname=sender.nickname,
+            type='chat',
+            **params
+        )
+        db.session.add(msg)
+        db.session.commit()
+
+        msg_data = format_sent_message(msg.msg_id, session['user_id'], sender.nickname, sender.avatar,
+                                       params['content'], msg.created_at)
+        return jsonify(code=200, data=msg_data)
+
+    except Exception as e:
+        db.session.rollback()
+        print("发送失败:", str(e))
+        return jsonify(code=500, msg='发送失败')
+    
+@bp.route('/api/message/chat')
+@login_required
+def api_message_chat():
+    to_user_id = request.args.get('to_user_id', type=int)
+    if not to_user_id:
+        return jsonify(code=400, msg='缺少对方ID')
+
+    if to_user_id == session['user_id']:
+        return jsonify(code=400, msg='参数错误')
+
+    try:
+        before = parse_chat_cursor(request.args.get('before', ''))
+    except ValueError:
+        return jsonify(code=400, msg='参数错误')
+
+    # 查询两人之间的聊天消息（双向），before 为空时是最新一页，更早的记录可能在归档表里
+    rows, next_before = load_chat_page(session['user_id'], to_user_id, before)
+    messages = format_chat_messages(rows, session['user_id'])
+
+    if before is None:
+        db.session.execute(db.text(CHAT_MARK_READ_SQL), {'me': session['user_id'], 'you': to_user_id})
+        db.session.commit()
+
+    return jsonify(code=200, data=messages, next_before=next_before)
+
+@bp.route('/chat/<int:order_id>')
+@login_required
+def order_chat(order_id):
+    order = db.session.execute(db.text("""
+        SELECT o.*, g.title, buyer.nickname AS buyer_nick, seller.nickname AS seller_nick,
+               buyer.avatar AS buyer_avatar, seller.avatar AS seller_avatar
+        FROM `order` o
+        JOIN goods g ON o.goods_id = g.goods_id
+        JOIN user buyer ON o.buyer_id = buyer.user_id
+        JOIN user seller ON o.seller_id = seller.user_id
+        WHERE o.order_id = :oid AND (o.buyer_id = :uid OR o.seller_id = :uid)
+    """), {'oid': order_id, 'uid': session['user_id']}).fetchone()
+
+    if not order:
+        return "订单不存在或无权访问", 404
+
+    # 对方用户
+    opponent = {
+        'user_id': order.seller_id if order.buyer_id == session['user_id'] else order.buyer_id,
+        'nickname': order.seller_nick if order.buyer_id == session['user_id'] else order.buyer_nick,
+        'avatar': order.seller_avatar if order.buyer_id == session['user_id'] else order.buyer_avatar,
+        'college': ''  # 可后续加
+    }
+
+    return render_template('visiter/my_messages.html', 
+                       user=get_current_user(), 
+                       order=order, 
+                       opponent=opponent,
+                       is_order_chat=True)  # ← 新增标志
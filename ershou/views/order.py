@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+订单与支付流程：下单、支付、确认收货、订单详情
+"""
+import datetime
+from datetime import timedelta
+import random
+import string
+
+from flask import Blueprint, jsonify, render_template, request, session
+
+from ..audit import audit
+from ..auth import get_current_user, login_required
+from ..caches import college_hot_changed, lock_stock, unlock_stock
+from ..catalog import catalog_goods_changed
+from ..extensions import db
+from ..messaging import send_message
+from ..search import suggest_refresh
+from ..user_stats import bump_user_stats
+
+bp = Blueprint('order', __name__)
+
+
+# ====================== 订单与支付流程 ======================
+def generate_order_no():
+    """生成18位纯数字订单号"""
+    return ''.join(random.choices(string.digits, k=18))
+
+@bp.route('/order/create')
+@login_required
+def order_create_page():
+    """下单页面"""
+    goods_id = request.args.get('goods_id', type=int)
+    if not goods_id:
+        return "参数错误", 400
+    
+    goods_info = db.session.execute(db.text("""
+        SELECT g.*, c.name as cate_name,
+               (SELECT url FROM goods_image WHERE goods_id=g.goods_id ORDER BY sort LIMIT 1) as cover_img
+        FROM goods g 
+        LEFT JOIN category c ON g.cate_id=c.cate_id 
+        WHERE g.goods_id=:gid AND g.status=1 AND g.stock>0
+    """), {'gid': goods_id}).fetchone()
+    
+    if not goods_info:
+        return "商品不存在或已下架", 404
+        
+    return render_template('visiter/order_create.html', goods=goods_info, user=get_current_user())
+
+@bp.route('/api/order/create', methods=['POST'])
+@login_required
+def api_order_create():
+    """创建订单 + 内存锁库存"""
+    try:
+        data = request.get_json()
+        goods_id = data['goods_id']
+        quantity = int(data.get('quantity', 1))
+
+        # 校验商品是否存在且库存足够
+        goods_info = db.session.execute(db.text("""
+            SELECT goods_id, user_id, title, price, stock FROM goods 
+            WHERE goods_id=:gid AND status=1 AND stock>=:qty
+        """), {'gid': goods_id, 'qty': quantity}).fetchone()
+
+        if not goods_info:
+            return jsonify(code=400, msg='商品不存在或库存不足')
+
+        # 使用内存锁防止超卖
+        if not lock_stock(goods_id, quantity):
+            return jsonify(code=400, msg='商品正在被购买，请稍后再试')
+
+        order_no = generate_order_no()
+        order = {
+            'order_no': order_no,
+            'goods_id': goods_id,
+            'buyer_id': session['user_id'],
+            'seller_id': goods_info.user_id,
+            'quantity': quantity,
+            'buy_price': goods_info.price,
+            'total_amount': goods_info.price * quantity,
+            'pay_status': 0
+        }
+        
+        result = db.session.execute(db.text("""
+            INSERT INTO `order` 
+            (order_no, goods_id, buyer_id, seller_id, quantity, buy_price, total_amount, pay_status)
+            VALUES (:order_no, :goods_id, :buyer_id, :seller_id, :quantity, :buy_price, :total_amount, 0)
+        """), order)
+        bump_user_stats(session['user_id'], order_num=1)
+        db.session.commit()
+        audit('order_create', 'order', result.lastrowid, f'{order_no} 商品 {goods_id} × {quantity}')
+
+        return jsonify(code=200, msg='订单创建成功', order_no=order_no)
+
+    except Exception as e:
+        db.session.rollback()
+        print("【创建订单失败】", str(e))
+        return jsonify(code=500, msg='服务器错误')
+
+@bp.route('/api/order/pay/<order_no>', methods=['POST'])
+@login_required
+def api_order_pay(order_no):
+    """虚拟支付接口（模拟支付成功） - 加入超时判断"""
+    try:
+        # 查询订单，必须是当前用户、待支付状态
+        order = db.session.execute(db.text("""
+            SELECT o.*, g.stock AS current_stock 
+            FROM `order` o
+            JOIN goods g ON o.goods_id = g.goods_id
+            WHERE o.order_no = :no 
+              AND o.buyer_id = :uid 
+              AND o.pay_status = 0
+        """), {'no': order_no, 'uid': session['user_id']}).fetchone()
+
+        if not order:
+            return jsonify(code=400, msg='订单不存在、已支付或无权限')
+
+        # ==================== 关键：超时判断 ====================
+        # 订单创建时间 + 1小时
+        deadline = order.created_at + timedelta(hours=1)
+        if datetime.datetime.now() > deadline:
+            # 标记为已取消（建议数据库支持 pay_status=3）
+            db.session.execute(db.text("""
+                UPDATE `order` 
+                SET pay_status = 3, cancel_time = NOW(), cancel_reason = '支付超时自动取消'
+                WHERE order_no = :no
+            """), {'no': order_no})
+
+            # 释放内存锁
+            unlock_stock(order.goods_id)
+
+            # 可选：恢复商品库存（更准确，避免超卖遗留）
+            db.session.execute(db.text("""
+                UPDATE goods 
+                SET stock = stock + :qty 
+                WHERE goods_id = :gid AND stock + :qty <= (sold_num + stock + :qty)  -- 防止异常
+            """), {'qty': order.quantity, 'gid': order.goods_id})
+
+            db.session.commit()
+            audit('order_cancel', 'order', order.order_id, f'{order_no} 支付超时自动取消')
+            return jsonify(code=400, msg='订单支付超时，已自动取消，请重新下单')
+
+        # ==================== 正常支付流程 ====================
+        # 标记为已支付
+        db.session.execute(db.text("""
+            UPDATE `order` 
+            SET pay_status = 1, pay_time = NOW() 
+            WHERE order_no = :no
+        """), {'no': order_no})
+
+        # 真正扣减库存 + 增加销量
+        db.session.execute(db.text("""
+            UPDATE goods 
+            SET stock = stock - :qty, 
+                sold_num = sold_num + :qty
+            WHERE goods_id = :gid
+        """), {'qty': order.quantity, 'gid': order.goods_id})
+
+        # 如果库存扣为0或负，自动标记商品为已售（status=2）
+        db.session.execute(db.text("""
+            UPDATE goods 
+            SET status = CASE 
+                WHEN stock <= 0 THEN 2  -- 已售罄
+                ELSE status 
+            END
+            WHERE goods_id = :gid
+        """), {'gid': order.goods_id})
+
+        db.session.commit()
+        audit('order_pay', 'order', order.order_id, f'{order_no} 金额 {order.total_amount}')
+        catalog_goods_changed(order.goods_id)  # 销量变化，售罄时从列表快照移除
+        college_hot_changed(order.seller_id)
+        suggest_refresh(order.goods_id)  # 售罄（status=2）时从搜索联想中移除
+
+        # 释放内存锁（支付成功或超时都应释放）
+        unlock_stock(order.goods_id)
+
+        # 获取最新信息用于发消息
+        goods = db.session.execute(db.text("""
+            SELECT title FROM goods WHERE goods_id = :gid
+        """), {'gid': order.goods_id}).fetchone()
+
+        # 发送系统消息
+        send_message(order.buyer_id, f"您已成功支付订单 {order_no} 的商品《{goods.title}》，请尽快联系卖家当面交易~")
+        send_message(order.seller_id, f"买家已成功支付订单 {order_no} 的商品《{goods.title}》，请及时与买家联系！")
+
+        return jsonify(code=200, msg='支付成功')
+
+    except Exception as e:
+        db.session.rollback()
+        print("【支付失败】", str(e))
+        return jsonify(code=500, msg='支付失败，请重试')
+
+@bp.route('/api/order/confirm/<order_no>', methods=['POST'])
+@login_required
+def api_order_confirm(order_no):
+    """买家确认收货"""
+    order = db.session.execute(db.text("""
+        SELECT * FROM `order` WHERE order_no=:no AND buyer_id=:uid AND pay_status=1
+    """), {'no': order_no, 'uid': session['user_id']}).fetchone()
+    
+    if not order:
+        return jsonify(code=400, msg='订单状态错误')
+    
+    db.session.execute(db.text("""
+        UPDATE `order` SET pay_status=2, confirm_time=NOW() WHERE order_no=:no
+    """), {'no': order_no})
+    db.session.commit()
+    audit('order_confirm', 'order', order.order_id, order_no)
+    order = db.session.execute(db.text("SELECT * FROM `order` WHERE order_no=:no"), {'no': order_no}).fetchone()
+    goods = db.session.execute(db.text("SELECT title FROM goods WHERE goods_id=:gid"), {'gid': order.goods_id}).fetchone()
+
+    send_message(order.seller_id, f"买家已确认收货，订单 {order_no} 《{goods.title}》交易完成！")
+    send_message(order.buyer_id, f"您已确认收货，订单 {order_no} 《{goods.title}》交易完成，感谢使用！")
+    return jsonify(code=200, msg='交易完成')
+
+# ====================== 我的订单：按角色分查再合并的游标分页 ======================
+# (buyer_id = :uid OR seller_id = :uid) 用不上任何一个索引，只能全表扫。改成买家、卖家各查一路
+# （各自走 idx_buyer_created / idx_seller_created 或带状态的 idx_*_status），每路只取一页多一条，
+# UNION 后按 (created_at, order_id) 倒序取一页，再关联商品和用户信息。
+# 游标为上一页最后一条的 'YYYYmmddHHMMSS-order_id'。
+MY_ORDER_PAGE_SIZE = 20
+MY_ORDER_ROLES = {'buyer': ('buyer_id',), 'seller': ('seller_id',), 'all': ('buyer_id', 'seller_id')}
+MY_ORDER_BRANCH_SQL = """
+    SELECT * FROM (
+        SELECT order_id, created_at FROM `order`
+        WHERE {column} = :uid {where}
+        ORDER BY created_at DESC, order_id DESC
+        LIMIT :n
+    ) {alias}
+"""
+MY_ORDER_SQL = """
+    SELECT
+        o.order_id, o.order_no, o.goods_id, o.quantity, o.total_amount, o.pay_status, o.created_at,
+        g.title, g.price,
+        (SELECT url FROM goods_image WHERE goods_id=o.goods_id ORDER BY sort LIMIT 1) AS cover_img,
+        seller.nickname AS seller_nick, buyer.nickname AS buyer_nick,
+        seller.user_id AS seller_id, buyer.user_id AS buyer_id
+    FROM ({branches}) t
+    JOIN `order` o ON o.order_id = t.order_id
+    JOIN goods g ON o.goods_id = g.goods_id
+    JOIN user seller ON o.seller_id = seller.user_id
+    JOIN user buyer ON o.buyer_id = buyer.user_id
+    ORDER BY t.created_at DESC, t.order_id DESC
+    LIMIT :n
+"""
+
+
+def _parse_order_cursor(value):
+    """游标 → (created_at, order_id)；为空返回 None，格式错误抛 ValueError"""
+    if not value:
+        return None
+    ts, _, order_id = value.partition('-')
+    return datetime.datetime.strptime(ts, '%Y%m%d%H%M%S'), int(order_id)
+
+
+@bp.route('/api/my/order')
+@login_required
+def api_my_orders():
+    """
+    我的订单列表：?role=all|buyer|seller&status=all|0|1|2|3&cursor=&size=20
+    按下单时间倒序，next_cursor 为空表示没有更多
+    """
+    uid = session['user_id']
+    role = request.args.get('role', 'all')
+    status_filter = request.args.get('status', 'all')
+    size = min(max(request.args.get('size', MY_ORDER_PAGE_SIZE, type=int), 1), 100)
+    if role not in MY_ORDER_ROLES:
+        return jsonify(code=400, msg='参数错误')
+    try:
+        cursor = _parse_order_cursor(request.args.get('cursor', ''))
+        pay_status = None if status_filter == 'all' else int(status_filter)
+    except ValueError:
+        return jsonify(code=400, msg='参数错误')
+
+    where = ''
+    params = {'uid': uid, 'n': size + 1}
+    if pay_status is not None:
+        where += " AND pay_status = :pay_status"
+        params['pay_status'] = pay_status
+    if cursor:
+        where += " AND (created_at < :before_time OR (created_at = :before_time AND order_id < :before_id))"
+        params['before_time'], params['before_id'] = cursor
+
+    # UNION 去重：买家和卖家是同一人的订单只出现一次
+    branches = ' UNION '.join(
+        MY_ORDER_BRANCH_SQL.format(column=column, where=where, alias=column[0])
+        for column in MY_ORDER_ROLES[role]
+    )
+    rows = db.session.execute(db.text(MY_ORDER_SQL.format(branches=branches)), params).fetchall()
+
+    result = []
+    for r in rows[:size]:
+        item = dict(r._mapping)
+        item['total_amount'] = float(item['total_amount']) if item['total_amount'] else 0
+        item['role'] = 'buyer' if item['buyer_id'] == uid else 'seller'
+        item['created_at'] = r.created_at.strftime('%Y-%m-%d %H:%M') if r.created_at else None
+        result.append(item)
+    next_cursor = None
+    if len(rows) > size:
+        last = rows[size - 1]
+        next_cursor = f"{last.created_at:%Y%m%d%H%M%S}-{last.order_id}"
+
+    return jsonify(code=200, data=result, next_cursor=next_cursor)  # 前端必须用 data 字段接收
+
+
+@bp.route('/order/<order_no>')
+@login_required
+def order_detail(order_no):
+    """订单详情页"""
+    sql = """
+        SELECT 
+            o.order_id,                  -- ← 新增：主键 order_id，用于聊天跳转
+            o.order_no, 
+            o.quantity, 
+            o.total_amount, 
+            o.pay_status,
+            o.created_at, 
+            o.pay_time, 
+            o.confirm_time,
+            g.title, 
+            g.price AS goods_price,
+            (SELECT url FROM goods_image WHERE goods_id = o.goods_id ORDER BY sort LIMIT 1) AS cover_img,
+            u1.nickname AS seller_nick,
+            u1.avatar AS seller_avatar,   -- 可选：如果想显示对方头像
+            u2.nickname AS buyer_nick,
+            u2.avatar AS buyer_avatar,     -- 可选
+            u1.user_id AS seller_id,
+            u2.user_id AS buyer_id
+        FROM `order` o
+        JOIN goods g ON o.goods_id = g.goods_id
+        JOIN user u1 ON o.seller_id = u1.user_id
+        JOIN user u2 ON o.buyer_id = u2.user_id
+        WHERE o.order_no = :no 
+          AND (o.buyer_id = :uid OR o.seller_id = :uid)
+    """
+    order_row = db.session.execute(db.text(sql), {'no': order_no, 'uid': session['user_id']}).fetchone()
+    
+    if not order_row:
+        return "订单不存在或无权查看", 404
+    
+    # 转为字典，方便模板使用
+    order = dict(order_row._mapping)
+    
+    # 必要的类型转换
+    order['total_amount'] = float(order['total_amount'] or 0)
+    order['quantity'] = int(order['quantity'] or 1)
+    
+    # pay_status 为 int，确保模板判断正常
+    order['pay_status'] = int(order['pay_status'])
+
+    current_user = get_current_user()
+    
+    return render_template('visiter/order_detail.html', 
+                           order=order, 
+                           user=current_user)
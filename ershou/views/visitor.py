@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+用户与访客页面：首页、注册登录、个人资料、我的发布 / 想要 / 收藏
+"""
+import datetime
+import os
+import re
+
+from flask import (
+    Blueprint, current_app, jsonify, redirect, render_template, request,
+    send_from_directory, session, url_for
+)
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from ..auth import get_current_user, invalidate_user_cache, login_required
+from ..caches import college_hot_changed, college_hot_top, get_category_catalog
+from ..extensions import db, read_only
+from ..models import User
+from ..ratelimit import rate_limit
+from ..recommend import get_guess_goods
+from ..user_stats import get_user_stats
+
+bp = Blueprint('visitor', __name__)
+
+
+@bp.route('/')
+@read_only
+def index():
+    """网站首页：支持关键词搜索 + 分类过滤 + 智能隐藏推荐区"""
+    user = None
+    unread_count = 0
+
+    if 'user_id' in session:
+        user = get_current_user()
+        unread_count = db.session.execute(
+            db.text("SELECT COUNT(*) FROM message WHERE to_user_id = :uid AND is_read = 0"),
+            {'uid': session['user_id']}
+        ).scalar() or 0
+
+    # 获取参数
+    keyword = request.args.get('keyword', '').strip()
+    cate_id = request.args.get('cate_id', type=int)
+
+    catalog = get_category_catalog()
+    current_category = catalog['by_id'].get(cate_id) if cate_id else None
+    categories = catalog['enabled']
+
+    # 是否处于搜索模式
+    is_search_mode = bool(keyword)
+
+    # 基础 SQL（用于推荐区和搜索结果）
+    base_sql = f"""
+        SELECT 
+            g.goods_id, g.title, g.price, g.degree, g.favor_num, g.view_num, g.is_batch,
+            u.nickname AS user_nickname,
+            gi.url AS cover_img
+        FROM goods g
+        LEFT JOIN user u ON g.user_id = u.user_id
+        LEFT JOIN goods_image gi ON gi.goods_id = g.goods_id AND gi.sort = 0
+        WHERE g.status = 1
+    """
+    params = {}
+    conditions = []
+
+    # 关键词搜索（标题或描述）
+    if keyword:
+        conditions.append("(g.title LIKE :keyword OR g.description LIKE :keyword)")
+        params['keyword'] = f"%{keyword}%"
+
+    # 分类过滤
+    if cate_id:
+        conditions.append("g.cate_id = :cate_id")
+        params['cate_id'] = cate_id
+
+    if conditions:
+        base_sql += " AND " + " AND ".join(conditions)
+
+    hot_expr_str = "(g.favor_num * 5 + g.wish_num * 3 + g.view_num + g.sold_num * 10)"
+
+    # 如果是搜索模式 → 不显示四大推荐区，只显示搜索结果
+    if is_search_mode:
+        search_sql = f"{base_sql} ORDER BY {hot_expr_str} DESC LIMIT 50"
+        search_goods = db.session.execute(db.text(search_sql), params).fetchall()
+        search_goods = [dict(row._mapping) for row in search_goods]
+
+        default_cover = '/static/avatars/goodspictures/default.jpg'
+        for g in search_goods:
+            g['cover_img'] = g['cover_img'] or default_cover
+            g['user_nickname'] = g['user_nickname'] or '未知用户'
+
+        return render_template('visiter/index.html',
+                               user=user,
+                               categories=categories,
+                               current_category=current_category,
+                               keyword=keyword,
+                               search_goods=search_goods,  # 搜索结果
+                               unread_count=unread_count)
+
+    # 非搜索模式：显示四大推荐区（受分类过滤）
+    else:
+        # 热门推荐
+        hot_goods = db.session.execute(db.text(f"{base_sql} ORDER BY {hot_expr_str} DESC LIMIT 12"), params).fetchall()
+
+        # 最新上架
+        newest_goods = db.session.execute(db.text(f"{base_sql} ORDER BY g.on_shelf_time DESC LIMIT 12"), params).fetchall()
+
+        # 应届毕业生清仓
+        batch_sql = f"{base_sql} AND g.is_batch = 1 AND u.is_graduating = 1 ORDER BY {hot_expr_str} DESC LIMIT 12"
+        batch_goods = db.session.execute(db.text(batch_sql), params).fetchall()
+
+        # 本院热销：优先读学院热榜缓存，按分类过滤后不够 12 件才回退 SQL
+        same_college_goods = []
+        college_cached = None
+        if user and user.college:
+            college_cached = college_hot_top(user.college, 12, cate_id)
+            if college_cached is None:
+                college_sql = f"{base_sql} AND u.college = :college ORDER BY {hot_expr_str} DESC LIMIT 12"
+                same_college_goods = db.session.execute(
+                    db.text(college_sql),
+                    {**params, 'college': user.college}
+                ).fetchall()
+
+        default_cover = '/static/avatars/goodspictures/default.jpg'
+        def process(rows):
+            result = [dict(row._mapping) for row in rows]
+            for item in result:
+                item['cover_img'] = item['cover_img'] or default_cover
+                item['user_nickname'] = item['user_nickname'] or '未知用户'
+            return result
+
+        # 猜你喜欢：按用户最近的收藏 / 想要 / 购买，从预计算的相似商品表里取（不受分类过滤）
+        guess_goods = get_guess_goods(user.user_id) if user else []
+
+        hot_goods = process(hot_goods)
+        newest_goods = process(newest_goods)
+        batch_goods = process(batch_goods)
+        same_college_goods = college_cached if college_cached is not None else process(same_college_goods)
+
+        return render_template('visiter/index.html',
+                               user=user,
+                               categories=categories,
+                               current_category=current_category,
+                               hot_goods=hot_goods if hot_goods else None,
+                               newest_goods=newest_goods if newest_goods else None,
+                               batch_goods=batch_goods if batch_goods else None,
+                               same_college_goods=same_college_goods if same_college_goods else None,
+                               guess_goods=guess_goods if guess_goods else None,
+                               unread_count=unread_count)
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    """注册路由：GET 显示注册页，POST 处理注册逻辑"""
+    if request.method == 'POST':
+        try:
+            raw_data = request.get_json(force=True)  # 强制解析 JSON，防止前端传错
+            data = raw_data if isinstance(raw_data, dict) else {}
+
+            account = data.get('account', '').strip()
+            password = data.get('password', '')
+            nickname = data.get('nickname', '').strip() or '校园用户'
+            email = data.get('email', '').strip() or None
+
+            # 基础校验
+            if not account:
+                return jsonify(code=400, msg='账号不能为空')
+            if not password:
+                return jsonify(code=400, msg='密码不能为空')
+            if len(password) < 6:
+                return jsonify(code=400, msg='密码至少6位')
+            if User.query.filter_by(account=account).first():
+                return jsonify(code=400, msg='账号已存在')
+
+            # 创建新用户，密码使用 werkzeug 安全哈希
+            new_user = User(
+                account=account,
+                password=generate_password_hash(password),
+                nickname=nickname,
+                email=email
+            )
+            db.session.add(new_user)
+            db.session.commit()
+            return jsonify(code=200, msg='注册成功！请登录')
+
+        except Exception as e:
+            db.session.rollback()
+            print("【注册失败】", str(e))
+            return jsonify(code=500, msg='服务器异常，请稍后重试')
+
+    return render_template('visiter/register.html')  # GET 请求返回注册页面
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', limit=10, window=300, per='ip', msg='登录尝试次数过多，请 5 分钟后再试')
+def login():
+    """登录路由"""
+    if request.method == 'POST':
+        try:
+            raw_data = request.get_json(force=True)
+            data = raw_data if isinstance(raw_data, dict) else {}
+
+            account = data.get('account', '').strip()
+            password = data.get('password', '')
+
+            if not account or not password:
+                return jsonify(code=400, msg='请输入账号和密码')
+
+            user = User.query.filter_by(account=account).first()
+            if not user:
+                return jsonify(code=400, msg='账号不存在')
+            if not check_password_hash(user.password, password):
+                return jsonify(code=400, msg='密码错误')
+            if user.status == 0:
+                return jsonify(code=403, msg='账号已被禁用')
+            
+            session.clear()  # ← 关键：完全清除旧 session
+            # 登录成功 → 写入 session
+            session['user_id'] = user.user_id
+            return jsonify(code=200, msg='登录成功')
+
+        except Exception as e:
+            print("【登录失败】", str(e))
+            return jsonify(code=500, msg='服务器异常')
+
+    return render_template('visiter/login.html')
+
+
+@bp.route('/profile')
+@login_required
+def profile():
+    """个人中心页面"""
+    user = get_current_user()
+
+    # 发布商品数、订单数、收藏数、想买数：读 user_stats 计数行，不再每次 COUNT 源表
+    return render_template('visiter/profile.html', user=user, stats=get_user_stats(user.user_id))
+
+
+@bp.route('/api/auth/student', methods=['POST'])
+@login_required
+def auth_student():
+    """学籍认证接口（绑定学号）"""
+    data = request.get_json()
+    user = get_current_user()
+
+    if User.query.filter_by(stu_id=data['stu_id']).first():
+        return jsonify(code=400, msg='学号已被绑定')
+
+    if not re.match(r'^\d{8,12}$', data['stu_id']):
+        return jsonify(code=400, msg='学号格式错误（8~12位纯数字）')
+
+    user.stu_id = data['stu_id']
+    user.is_graduating = 1 if data.get('is_graduating') else 0
+    db.session.commit()
+    invalidate_user_cache(session['user_id'])
+    return jsonify(code=200, msg='认证成功')
+
+
+@bp.route('/api/upload/avatar', methods=['POST'])
+@login_required
+def api_upload_avatar():
+    try:
+        if 'file' not in request.files:
+            return jsonify(code=400, msg='未选择文件')
+
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify(code=400, msg='未选择文件')
+
+        # 安全获取扩展名
+        ext = os.path.splitext(file.filename)[1].lower()
+        if ext not in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
+            return jsonify(code=400, msg='不支持的文件格式')
+
+        # 生成新文件名：user_id + 时间戳 或 随机字符串
+        filename = f"{session['user_id']}_{int(datetime.datetime.now().timestamp())}{ext}"
+        upload_folder = current_app.config['UPLOAD_FOLDER']  # static/avatars/userspictures/
+        os.makedirs(upload_folder, exist_ok=True)  # 首次上传时才创建目录，启动时不再有副作用
+        filepath = os.path.join(upload_folder, filename)
+
+        file.save(filepath)
+
+        # 更新数据库中的 avatar 字段为新路径
+        new_avatar_url = f"/static/avatars/userspictures/{filename}"
+
+        user = get_current_user()
+        user.avatar = new_avatar_url
+        db.session.commit()
+        invalidate_user_cache(session['user_id'])
+
+        return jsonify(code=200, msg='上传成功', url=new_avatar_url)
+
+    except Exception as e:
+        db.session.rollback()
+        print("【头像上传失败】", str(e))
+        return jsonify(code=500, msg='上传失败，请重试')
+
+
+@bp.route('/api/profile/update', methods=['POST'])
+@login_required
+def update_profile():
+    """更新个人资料（昵称、学院、班级、性别）"""
+    data = request.get_json()
+    user = get_current_user()
+    old_college = user.college
+
+    allowed_fields = {'nickname': str, 'college': str, 'class_name': str}
+    for field, _ in allowed_fields.items():
+        if field in data:
+            value = data[field].strip() if isinstance(data[field], str) else None
+            setattr(user, field, value or None)
+
+    if 'gender' in data:
+        try:
+            g = int(data['gender'])
+            if g not in (0,1,2):
+                raise ValueError
+            user.gender = g
+        except:
+            return jsonify(code=400, msg='性别参数无效')
+
+    db.session.commit()
+    invalidate_user_cache(session['user_id'])
+    if user.college != old_college:
+        # 换学院后自己的商品要从旧学院热榜挪到新学院
+        college_hot_changed(college=old_college)
+        college_hot_changed(college=user.college)
+    return jsonify(code=200, msg='资料更新成功')
+
+
+@bp.route('/logout')
+def logout():
+    """退出登录"""
+    session.clear()
+    return redirect(url_for('visitor.login'))
+
+
+@bp.route('/static/avatars/userspictures/<filename>')
+def avatar(filename):
+    """安全提供头像访问路由（不直接暴露整个 static 目录）"""
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+
+
+# ====================== 我的页面相关 ======================
+@bp.route('/my')
+@login_required
+def my():
+    user = get_current_user()
+    return render_template('visiter/my.html', user=user)
+
+@bp.route('/api/my/publish')
+@login_required
+def api_my_publish():
+    uid = session['user_id']
+    rows = db.session.execute(db.text("""
+        SELECT g.goods_id, g.title, g.price, g.status,
+               (SELECT url FROM goods_image WHERE goods_id=g.goods_id ORDER BY sort LIMIT 1) as cover_img
+        FROM goods g 
+        WHERE g.user_id = :uid
+        ORDER BY g.on_shelf_time DESC
+    """), {'uid': uid}).fetchall()
+
+    result = []
+    for r in rows:
+        item = dict(r._mapping)
+        item['price'] = float(item['price'])
+        result.append(item)
+    return jsonify(data=result)
+
+@bp.route('/api/my/wish')
+@login_required
+def api_my_wish():
+    uid = session['user_id']
+    rows = db.session.execute(db.text("""
+        SELECT g.goods_id, g.title, g.price, g.status,
+               (SELECT url FROM goods_image WHERE goods_id=g.goods_id ORDER BY sort LIMIT 1) as cover_img
+        FROM goods g 
+        JOIN user_interaction ui ON g.goods_id = ui.goods_id
+        WHERE ui.user_id = :uid AND ui.type = 2
+        ORDER BY ui.created_at DESC
+    """), {'uid': uid}).fetchall()
+
+    result = []
+    for r in rows:
+        item = dict(r._mapping)
+        item['price'] = float(item['price'])
+        result.append(item)
+    return jsonify(data=result)
+
+@bp.route('/api/my/favor')
+@login_required
+def api_my_favor():
+    uid = session['user_id']
+    rows = db.session.execute(db.text("""
+        SELECT g.goods_id, g.title, g.price, g.status,
+               (SELECT url FROM goods_image WHERE goods_id=g.goods_id ORDER BY sort LIMIT 1) as cover_img
+        FROM goods g 
+        JOIN user_interaction ui ON g.goods_id = ui.goods_id
+        WHERE ui.user_id = :uid AND ui.type = 1
+        ORDER BY ui.created_at DESC
+    """), {'uid': uid}).fetchall()
+
+    result = []
+    for r in rows:
+        item = dict(r._mapping)
+        item['price'] = float(item['price'])
+        result.append(item)
+    return jsonify(data=result)
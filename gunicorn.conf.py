@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 配置：gunicorn -c gunicorn.conf.py app:app
+preload_app=True 时 master 进程先 import app 建好应用（模型、路由、模板环境），
+worker 由 fork 得到，只读内存写时复制共享，启动更快、总内存更省。
+fork 前父进程若已经连过数据库 / Redis，子进程不能复用这些 socket，post_fork 里丢弃即可。
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+timeout = 30
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from app import app
+    from ershou.extensions import reset_after_fork
+
+    with app.app_context():
+        reset_after_fork()
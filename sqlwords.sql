@@ -207,3 +207,110 @@ CREATE TABLE report (
     FOREIGN KEY (reporter_id) REFERENCES user(user_id) ON DELETE CASCADE
 ) ENGINE=InnoDB COMMENT='举报表';
 
+
+-- 3. 聚合通知：同一条评论的点赞通知只保留一条滚动摘要（“N 人赞了你的评论”），原地更新
+ALTER TABLE message
+  ADD COLUMN digest_key VARCHAR(64) DEFAULT NULL COMMENT '聚合通知键，如 comment_like:评论ID' AFTER is_read,
+  ADD UNIQUE KEY uk_digest (digest_key);
+
+
+-- 4. 猜你喜欢：离线任务（flask recommend）写入的商品相似度，每件商品保留前 N 个邻居
+CREATE TABLE goods_recommend (
+    goods_id     BIGINT NOT NULL,
+    rank_no      TINYINT UNSIGNED NOT NULL COMMENT '名次，从 1 开始',
+    rec_goods_id BIGINT NOT NULL COMMENT '相似商品',
+    score        FLOAT NOT NULL COMMENT '余弦相似度',
+    updated_at   DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (goods_id, rank_no),
+    INDEX idx_rec_goods (rec_goods_id)
+) ENGINE=InnoDB COMMENT='商品相似度（猜你喜欢）';
+
+-- 5. 本院热销按学院取卖家：给 user.college 加索引（学院热榜缓存重算时用）
+ALTER TABLE user ADD INDEX idx_college (college);
+
+-- 6. 历史消息归档：flask archive-messages 把已读的旧系统通知和已读的旧聊天记录挪到这里
+--    列与 message 相同（msg_id 保留原值），digest_key 不再唯一；只归档已读消息，聊天记录接口与热表各查一页后合并
+CREATE TABLE message_archive (
+    msg_id        BIGINT PRIMARY KEY,
+    from_user_id  BIGINT NOT NULL,
+    from_nickname VARCHAR(50) DEFAULT '系统',
+    to_user_id    BIGINT NOT NULL,
+    order_id      BIGINT DEFAULT NULL,
+    goods_id      BIGINT DEFAULT NULL,
+    type          ENUM('system', 'chat') NOT NULL DEFAULT 'chat',
+    content       TEXT NOT NULL,
+    is_read       TINYINT DEFAULT 0,
+    digest_key    VARCHAR(64) DEFAULT NULL,
+    created_at    DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_conv (from_user_id, to_user_id, created_at),
+    INDEX idx_to_created (to_user_id, created_at)
+) ENGINE=InnoDB COMMENT='站内消息归档表';
+
+-- 7. 我的订单按角色分查、按下单时间游标翻页：买家 / 卖家各一组 (用户, [状态,] 下单时间) 索引
+--    （InnoDB 二级索引自带主键 order_id，同一秒内的订单也能按索引顺序取）
+ALTER TABLE `order`
+  DROP INDEX idx_buyer_status,
+  DROP INDEX idx_seller_status,
+  ADD INDEX idx_buyer_status (buyer_id, pay_status, created_at),
+  ADD INDEX idx_seller_status (seller_id, pay_status, created_at),
+  ADD INDEX idx_buyer_created (buyer_id, created_at),
+  ADD INDEX idx_seller_created (seller_id, created_at);
+
+-- 8. 个人中心统计：每个用户一行计数，发布 / 下单 / 收藏想要时同一事务内增减，flask rebuild-user-stats 从源表重算
+CREATE TABLE user_stats (
+    user_id    BIGINT PRIMARY KEY,
+    goods_num  INT NOT NULL DEFAULT 0 COMMENT '发布商品数',
+    order_num  INT NOT NULL DEFAULT 0 COMMENT '购买订单数',
+    favor_num  INT NOT NULL DEFAULT 0 COMMENT '收藏数',
+    wish_num   INT NOT NULL DEFAULT 0 COMMENT '想要数',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES user(user_id) ON DELETE CASCADE
+) ENGINE=InnoDB COMMENT='用户统计计数';
+
+-- 9. 评论点赞改为软状态：取消点赞只把 liked 置 0，点赞开关一条 INSERT ... ON DUPLICATE KEY UPDATE 完成
+ALTER TABLE comment_like
+  ADD COLUMN liked TINYINT NOT NULL DEFAULT 1 COMMENT '1已赞 0已取消' AFTER user_id;
+
+-- 10. 点赞开关整合为一个存储过程：翻转 liked、增减 like_count、维护点赞摘要在服务端一次完成，应用只需一次往返
+--     评论不存在时返回 liked = NULL；摘要人数不含评论作者自己的赞，作者给自己点赞 / 取消不动摘要
+DROP PROCEDURE IF EXISTS comment_like_toggle;
+DELIMITER $$
+CREATE PROCEDURE comment_like_toggle(IN p_cid BIGINT, IN p_uid BIGINT)
+BEGIN
+    DECLARE v_author BIGINT DEFAULT NULL;
+    DECLARE v_goods BIGINT DEFAULT NULL;
+    DECLARE v_liked TINYINT;
+    DECLARE v_others INT;
+    DECLARE v_digest VARCHAR(64) DEFAULT CONCAT('comment_like:', p_cid);
+
+    SELECT user_id, goods_id INTO v_author, v_goods FROM comment WHERE comment_id = p_cid FOR UPDATE;
+    IF v_author IS NULL THEN
+        SELECT NULL AS liked, NULL AS like_count, NULL AS goods_id;
+    ELSE
+        INSERT INTO comment_like (comment_id, user_id, liked) VALUES (p_cid, p_uid, 1)
+        ON DUPLICATE KEY UPDATE liked = 1 - liked;
+        SELECT liked INTO v_liked FROM comment_like WHERE comment_id = p_cid AND user_id = p_uid;
+        UPDATE comment SET like_count = GREATEST(0, like_count + IF(v_liked = 1, 1, -1)) WHERE comment_id = p_cid;
+
+        IF v_author != p_uid THEN
+            SELECT COUNT(*) INTO v_others FROM comment_like
+            WHERE comment_id = p_cid AND liked = 1 AND user_id != v_author;
+            IF v_liked = 1 THEN
+                INSERT INTO message (from_user_id, to_user_id, goods_id, type, content, digest_key, is_read)
+                VALUES (p_uid, v_author, v_goods, 'system', CONCAT(v_others, ' 人赞了你的评论'), v_digest, 0)
+                ON DUPLICATE KEY UPDATE
+                    from_user_id = VALUES(from_user_id),
+                    content = VALUES(content),
+                    is_read = 0,
+                    created_at = NOW();
+            ELSEIF v_others = 0 THEN
+                DELETE FROM message WHERE digest_key = v_digest;
+            ELSE
+                UPDATE message SET content = CONCAT(v_others, ' 人赞了你的评论') WHERE digest_key = v_digest;
+            END IF;
+        END IF;
+
+        SELECT v_liked AS liked, like_count, goods_id FROM comment WHERE comment_id = p_cid;
+    END IF;
+END$$
+DELIMITER ;